@@ -1,12 +1,12 @@
+import startup_timing
 import sys
 import os
 from PyQt6.QtWidgets import QApplication, QSplashScreen
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt
 
-# We now import the main window from its own module
-from ui.main_window import AlphaBurnApp
 import constants
+startup_timing.mark('qt import')
 
 if __name__ == '__main__':
     # --- START OF FIX ---
@@ -26,6 +26,7 @@ if __name__ == '__main__':
 
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
+    startup_timing.mark('qt app')
     
     # Optional: Create a splash.png for a more polished look
     splash_pix = QPixmap(300, 200)
@@ -34,8 +35,19 @@ if __name__ == '__main__':
     splash.showMessage(f"Loading {constants.APP_NAME}...", Qt.AlignmentFlag.AlignCenter | Qt.AlignmentFlag.AlignBottom, Qt.GlobalColor.white)
     splash.show()
     app.processEvents()
-    
+    startup_timing.mark('splash')
+
+    # Imported after the splash is up; heavy subsystems load on first use or in the background
+    from ui.main_window import AlphaBurnApp
+    startup_timing.mark('app import')
+
     main_app = AlphaBurnApp()
     splash.finish(main_app)
     main_app.show()
+
+    def on_first_paint():
+        startup_timing.report()
+        main_app.start_background_warm_up()
+
+    startup_timing.watch_first_paint(app, main_app, on_first_paint)
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,78 @@
+import os
+import sys
+import math
+
+# Red Book audio: 44.1 kHz, 16-bit, stereo, in sectors ("frames") of 588 samples.
+SAMPLE_RATE = 44100
+CHANNELS = 2
+FRAME_BYTES = 2352
+FRAMES_PER_SECOND = 75
+# Two-second pause before the first track, which every disc has.
+LEAD_PREGAP_FRAMES = 2 * FRAMES_PER_SECOND
+MAX_TRACKS = 99
+DISC_MINUTES = (74, 80)
+DEFAULT_DISC_MINUTES = 80
+# Bytes of decoded PCM copied at a time.
+PCM_CHUNK_SIZE = 1024 * 1024
+
+AUDIO_CD_PRESET = "Standard Audio CD"
+
+
+def track_frames(duration):
+    """Sectors a track of duration seconds takes once padded to a whole sector."""
+    return math.ceil((duration or 0) * FRAMES_PER_SECOND)
+
+
+def capacity_frames(minutes=DEFAULT_DISC_MINUTES):
+    return minutes * 60 * FRAMES_PER_SECOND
+
+
+def format_frames(frames):
+    seconds = frames // FRAMES_PER_SECOND
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def ffmpeg_executable():
+    """The ffmpeg shipped next to the application if present, otherwise ffmpeg from PATH."""
+    bundled = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ffmpeg.exe' if sys.platform == 'win32' else 'ffmpeg')
+    return bundled if os.path.isfile(bundled) else 'ffmpeg'
+
+
+def decode_command(filepath):
+    """ffmpeg command that writes the file's audio to stdout as raw CD-DA (signed 16-bit big-endian stereo)."""
+    return [ffmpeg_executable(), '-v', 'error', '-nostdin', '-i', filepath, '-vn', '-map', '0:a:0',
+            '-ac', str(CHANNELS), '-ar', str(SAMPLE_RATE), '-f', 's16be', '-']
+
+
+def _inf_string(value):
+    return "'" + str(value or '').replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+
+def inf_text(track_number, frames, start_frame, title, performer, album_title, album_performer):
+    """Contents of the icedax-style .inf file wodim -useinfo reads the track length and CD-TEXT from."""
+    return "\n".join([
+        "# Written by Alpha_Burn",
+        f"Albumperformer=\t{_inf_string(album_performer)}",
+        f"Performer=\t{_inf_string(performer)}",
+        f"Albumtitle=\t{_inf_string(album_title)}",
+        f"Tracktitle=\t{_inf_string(title)}",
+        f"Tracknumber=\t{track_number}",
+        f"Trackstart=\t{start_frame}",
+        f"Tracklength=\t{frames}, 0",
+        "Pre-emphasis=\tno",
+        f"Channels=\t{CHANNELS}",
+        "Copy_permitted=\tyes",
+        "Endianess=\tbig",
+        "Index=\t\t0",
+        "Index0=\t\t-1",
+        "",
+    ])
+
+
+def album_fields(tracks):
+    """Disc-level CD-TEXT (title, performer): shared by every track, or a generic fallback."""
+    albums = {album for _, _, album, _ in tracks if album}
+    artists = {artist for _, artist, _, _ in tracks if artist}
+    album_title = albums.pop() if len(albums) == 1 else "Audio CD"
+    album_performer = artists.pop() if len(artists) == 1 else "Various Artists"
+    return album_title, album_performer
@@ -0,0 +1,58 @@
+import unittest
+import audio_cd
+
+
+class TrackFramesTest(unittest.TestCase):
+    def test_rounds_up_to_whole_frames(self):
+        self.assertEqual(audio_cd.track_frames(1.0), 75)
+        self.assertEqual(audio_cd.track_frames(0.001), 1)
+        self.assertEqual(audio_cd.track_frames(180.5), 13538)
+
+    def test_unknown_duration(self):
+        self.assertEqual(audio_cd.track_frames(None), 0)
+        self.assertEqual(audio_cd.track_frames(0), 0)
+
+    def test_capacity_and_format(self):
+        self.assertEqual(audio_cd.capacity_frames(80), 80 * 60 * 75)
+        self.assertEqual(audio_cd.capacity_frames(74), 333000)
+        self.assertEqual(audio_cd.format_frames(audio_cd.capacity_frames(80)), "80:00")
+        self.assertEqual(audio_cd.format_frames(61 * 75 + 74), "1:01")
+
+
+class InfTextTest(unittest.TestCase):
+    def fields(self, text):
+        return dict(line.split('=', 1) for line in text.splitlines() if '=' in line)
+
+    def test_track_fields(self):
+        fields = self.fields(audio_cd.inf_text(3, 13538, 450, "Title", "Artist", "Album", "Various Artists"))
+        self.assertEqual(fields['Tracknumber'], "\t3")
+        self.assertEqual(fields['Trackstart'], "\t450")
+        self.assertEqual(fields['Tracklength'], "\t13538, 0")
+        self.assertEqual(fields['Tracktitle'], "\t'Title'")
+        self.assertEqual(fields['Performer'], "\t'Artist'")
+        self.assertEqual(fields['Albumtitle'], "\t'Album'")
+        self.assertEqual(fields['Albumperformer'], "\t'Various Artists'")
+        self.assertEqual(fields['Endianess'], "\tbig")
+        self.assertEqual(fields['Channels'], f"\t{audio_cd.CHANNELS}")
+
+    def test_quotes_and_backslashes_are_escaped(self):
+        fields = self.fields(audio_cd.inf_text(1, 75, 0, "Don't \\ Stop", None, "", "A"))
+        self.assertEqual(fields['Tracktitle'], "\t'Don\\'t \\\\ Stop'")
+        self.assertEqual(fields['Performer'], "\t''")
+
+    def test_ends_with_newline(self):
+        self.assertTrue(audio_cd.inf_text(1, 75, 0, "", "", "", "").endswith("\n"))
+
+
+class AlbumFieldsTest(unittest.TestCase):
+    def test_shared_album(self):
+        tracks = [("One", "Artist", "Album", 60.0), ("Two", "Artist", "Album", 60.0)]
+        self.assertEqual(audio_cd.album_fields(tracks), ("Album", "Artist"))
+
+    def test_mixed_tracks(self):
+        tracks = [("One", "A", "First", 60.0), ("Two", "B", "Second", 60.0), ("Three", "", "", None)]
+        self.assertEqual(audio_cd.album_fields(tracks), ("Audio CD", "Various Artists"))
+
+
+if __name__ == '__main__':
+    unittest.main()
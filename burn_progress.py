@@ -0,0 +1,181 @@
+import re
+import time
+import threading
+
+# Bytes per second at 1x: data CDs (mode 1) and audio CDs (CD-DA).
+DATA_BYTES_PER_X = 153600
+AUDIO_BYTES_PER_X = 176400
+MEGABYTE = 1024 * 1024
+# Drive buffer fill (percent) below which the drive is counted as close to an underrun.
+LOW_BUFFER_PERCENT = 20
+READ_SIZE = 4096
+
+# wodim: "Track 01:   12 of  512 MB written (fifo 100%) [buf  99%]  16.1x."
+_WODIM_PROGRESS = re.compile(
+    r'Track\s+(\d+):\s+(\d+)(?:\s+of\s+(\d+))?\s+MB written'
+    r'(?:\s+\(fifo\s+(\d+)%\))?(?:\s+\[buf\s+(\d+)%\])?(?:\s+([\d.]+)x)?')
+_WODIM_TOTAL = re.compile(r'Total size:\s+(\d+)\s+MB')
+_WODIM_BURNFREE = re.compile(r'BURN-Free was (\d+) times used')
+_WODIM_MIN_BUFFER = re.compile(r'Min drive buffer fill was (\d+)%')
+_WODIM_AVERAGE_SPEED = re.compile(r'Average write speed\s+([\d.]+)x')
+_WODIM_MEDIA = re.compile(r'Manufacturer:\s+(.+)')
+# cdburn and other tools: a bare percentage
+_PERCENT = re.compile(r'(\d{1,3}(?:\.\d+)?)\s*%')
+
+
+def iter_lines(pipe):
+    """Yields decoded lines from a binary pipe, splitting on \\r as well as \\n.
+
+    Burners redraw their progress line with carriage returns, so reading
+    up to newlines would only see it once the burn is over.
+    """
+    read = getattr(pipe, 'read1', pipe.read)
+    pending = b''
+    while True:
+        chunk = read(READ_SIZE)
+        if not chunk:
+            break
+        parts = re.split(rb'[\r\n]', pending + chunk)
+        pending = parts.pop()
+        for part in parts:
+            line = part.decode(errors='replace').strip()
+            if line:
+                yield line
+    line = pending.decode(errors='replace').strip()
+    if line:
+        yield line
+
+
+class BurnProgress:
+    """One progress reading from a burner."""
+    __slots__ = ('percent', 'written_mb', 'total_mb', 'speed', 'buffer_fill', 'fifo_fill', 'eta', 'track')
+
+    def __init__(self, percent=None, written_mb=None, total_mb=None, speed=None, buffer_fill=None, fifo_fill=None, eta=None, track=None):
+        self.percent = percent
+        self.written_mb = written_mb
+        self.total_mb = total_mb
+        self.speed = speed
+        self.buffer_fill = buffer_fill
+        self.fifo_fill = fifo_fill
+        self.eta = eta
+        self.track = track
+
+    def describe(self):
+        parts = []
+        if self.track is not None:
+            parts.append(f"Track {self.track}")
+        if self.written_mb is not None:
+            parts.append(f"{self.written_mb} of {self.total_mb} MB" if self.total_mb else f"{self.written_mb} MB")
+        elif self.percent is not None:
+            parts.append(f"{self.percent:.0f}%")
+        if self.speed:
+            parts.append(f"{self.speed:.1f}x")
+        if self.buffer_fill is not None:
+            parts.append(f"buffer {self.buffer_fill}%")
+        if self.eta is not None:
+            parts.append(f"ETA {int(self.eta) // 60}:{int(self.eta) % 60:02d}")
+        return " · ".join(parts)
+
+
+class ProgressParser:
+    """Turns burner output into BurnProgress readings and keeps statistics for the burn log.
+
+    feed() may be called from the stdout and stderr reader threads at once.
+    """
+    def __init__(self, total_bytes=None, bytes_per_x=DATA_BYTES_PER_X):
+        self._lock = threading.Lock()
+        self.bytes_per_x = bytes_per_x
+        self.total_mb = total_bytes / MEGABYTE if total_bytes else None
+        self.started = time.time()
+        self.written_mb = 0
+        self._track = None
+        self._track_mb = 0
+        self._done_mb = 0  # Finished tracks of a multi-track burn
+        self.speeds = []
+        self.min_buffer_fill = None
+        self.min_fifo_fill = None
+        self.low_buffer_count = 0
+        self.burnfree_count = None
+        self.average_speed = None
+        self.media = None
+        self.last = None
+
+    def feed(self, line):
+        """Returns a BurnProgress if line is a progress line, otherwise None (after noting any statistics in it)."""
+        with self._lock:
+            match = _WODIM_PROGRESS.search(line)
+            if match:
+                return self._wodim_progress(match)
+            self._statistics(line)
+            match = _PERCENT.search(line)
+            if match and 'fifo' not in line and 'buf' not in line:
+                percent = min(100.0, float(match.group(1)))
+                self.last = BurnProgress(percent=percent, eta=self._eta_from_percent(percent))
+                return self.last
+            return None
+
+    def _wodim_progress(self, match):
+        track, written, track_total, fifo, buffer_fill, speed = match.groups()
+        track, written = int(track), int(written)
+        if track != self._track:
+            if self._track is not None:
+                self._done_mb += self._track_mb
+            self._track = track
+        self._track_mb = int(track_total) if track_total else written
+        self.written_mb = self._done_mb + written
+        total_mb = self.total_mb or (self._done_mb + int(track_total) if track_total else None)
+        speed = float(speed) if speed else None
+        if speed:
+            self.speeds.append(speed)
+        if buffer_fill is not None:
+            buffer_fill = int(buffer_fill)
+            self.min_buffer_fill = buffer_fill if self.min_buffer_fill is None else min(self.min_buffer_fill, buffer_fill)
+            if buffer_fill < LOW_BUFFER_PERCENT:
+                self.low_buffer_count += 1
+        if fifo is not None:
+            fifo = int(fifo)
+            self.min_fifo_fill = fifo if self.min_fifo_fill is None else min(self.min_fifo_fill, fifo)
+        percent = min(100.0, 100.0 * self.written_mb / total_mb) if total_mb else None
+        eta = None
+        if total_mb:
+            remaining = max(0, total_mb - self.written_mb) * MEGABYTE
+            rate = speed * self.bytes_per_x if speed else self._observed_rate()
+            eta = remaining / rate if rate else None
+        self.last = BurnProgress(percent, self.written_mb, int(total_mb) if total_mb else None, speed, buffer_fill, fifo, eta, track)
+        return self.last
+
+    def _statistics(self, line):
+        for pattern, name, cast in ((_WODIM_TOTAL, 'total_mb', int), (_WODIM_BURNFREE, 'burnfree_count', int),
+                                    (_WODIM_AVERAGE_SPEED, 'average_speed', float), (_WODIM_MEDIA, 'media', str.strip)):
+            match = pattern.search(line)
+            if match:
+                setattr(self, name, cast(match.group(1)))
+        match = _WODIM_MIN_BUFFER.search(line)
+        if match:
+            fill = int(match.group(1))
+            self.min_buffer_fill = fill if self.min_buffer_fill is None else min(self.min_buffer_fill, fill)
+
+    def _observed_rate(self):
+        elapsed = time.time() - self.started
+        return self.written_mb * MEGABYTE / elapsed if elapsed > 0 and self.written_mb else None
+
+    def _eta_from_percent(self, percent):
+        elapsed = time.time() - self.started
+        return elapsed * (100 - percent) / percent if percent > 0 else None
+
+    def summary(self):
+        """Statistics for database.add_burn_log()."""
+        with self._lock:
+            average = self.average_speed or (sum(self.speeds) / len(self.speeds) if self.speeds else None)
+            return {
+                'media': self.media,
+                'total_mb': self.total_mb,
+                'written_mb': self.written_mb or (self.last.written_mb if self.last else None),
+                'average_speed': average,
+                'max_speed': max(self.speeds) if self.speeds else None,
+                'min_speed': min(self.speeds) if self.speeds else None,
+                'min_buffer_fill': self.min_buffer_fill,
+                'min_fifo_fill': self.min_fifo_fill,
+                'low_buffer_count': self.low_buffer_count,
+                'burnfree_count': self.burnfree_count,
+            }
@@ -0,0 +1,80 @@
+import io
+import unittest
+import burn_progress
+from burn_progress import ProgressParser, MEGABYTE
+
+
+class WodimProgressTest(unittest.TestCase):
+    def test_progress_line(self):
+        parser = ProgressParser(total_bytes=512 * MEGABYTE)
+        progress = parser.feed("Track 01:   12 of  512 MB written (fifo 100%) [buf  99%]  16.1x.")
+        self.assertEqual((progress.track, progress.written_mb, progress.total_mb), (1, 12, 512))
+        self.assertEqual((progress.fifo_fill, progress.buffer_fill, progress.speed), (100, 99, 16.1))
+        self.assertAlmostEqual(progress.percent, 100 * 12 / 512)
+        self.assertAlmostEqual(progress.eta, 500 * MEGABYTE / (16.1 * burn_progress.DATA_BYTES_PER_X))
+
+    def test_progress_without_total_or_speed(self):
+        progress = ProgressParser().feed("Track 01:    3 MB written.")
+        self.assertEqual(progress.written_mb, 3)
+        self.assertIsNone(progress.total_mb)
+        self.assertIsNone(progress.percent)
+        self.assertIsNone(progress.speed)
+
+    def test_tracks_add_up(self):
+        parser = ProgressParser()
+        parser.feed("Track 01:  100 of  100 MB written (fifo 100%) [buf 100%]  8.0x.")
+        progress = parser.feed("Track 02:   10 of   50 MB written (fifo  98%) [buf  95%]  8.0x.")
+        self.assertEqual((progress.track, progress.written_mb, progress.total_mb), (2, 110, 150))
+
+    def test_buffer_statistics(self):
+        parser = ProgressParser()
+        for fifo, buffer_fill in ((100, 99), (80, 15), (90, 10), (100, 98)):
+            parser.feed(f"Track 01:    1 of   10 MB written (fifo {fifo:3d}%) [buf {buffer_fill:3d}%]  4.0x.")
+        self.assertEqual((parser.min_fifo_fill, parser.min_buffer_fill, parser.low_buffer_count), (80, 10, 2))
+
+    def test_summary_lines(self):
+        parser = ProgressParser()
+        for line in ("  Manufacturer: CMC Magnetics Corporation", "Total size:      690 MB (78:31.28) = 353346 sectors",
+                     "Track 01:  690 of  690 MB written (fifo 100%) [buf  97%]  24.0x.",
+                     "Min drive buffer fill was 91%", "Average write speed  20.3x.", "BURN-Free was 2 times used."):
+            parser.feed(line)
+        summary = parser.summary()
+        self.assertEqual(summary['media'], "CMC Magnetics Corporation")
+        self.assertEqual(summary['total_mb'], 690)
+        self.assertEqual(summary['written_mb'], 690)
+        self.assertEqual(summary['average_speed'], 20.3)
+        self.assertEqual((summary['min_speed'], summary['max_speed']), (24.0, 24.0))
+        self.assertEqual(summary['min_buffer_fill'], 91)
+        self.assertEqual(summary['burnfree_count'], 2)
+
+    def test_other_lines(self):
+        parser = ProgressParser()
+        self.assertIsNone(parser.feed("Starting to write CD/DVD at speed 24.0 in real TAO mode for single session."))
+        self.assertIsNone(parser.feed("FIFO size      : 4194304 = 4096 KB (fifo 100%)"))
+        self.assertIsNone(parser.last)
+
+
+class PercentProgressTest(unittest.TestCase):
+    def test_bare_percentage(self):
+        progress = ProgressParser().feed("Burning: 45.5% complete")
+        self.assertEqual(progress.percent, 45.5)
+        self.assertIsNone(progress.written_mb)
+
+    def test_capped_at_100(self):
+        self.assertEqual(ProgressParser().feed("105%").percent, 100.0)
+
+
+class IterLinesTest(unittest.TestCase):
+    def test_splits_on_carriage_returns(self):
+        pipe = io.BytesIO(b"first\nTrack 01: 1 MB written.\rTrack 01: 2 MB written.\r\n\nlast")
+        self.assertEqual(list(burn_progress.iter_lines(pipe)),
+                         ["first", "Track 01: 1 MB written.", "Track 01: 2 MB written.", "last"])
+
+    def test_lines_across_reads(self):
+        data = b"x" * (burn_progress.READ_SIZE - 2) + b"\r\nsecond\r"
+        lines = list(burn_progress.iter_lines(io.BytesIO(data)))
+        self.assertEqual([len(line) for line in lines], [burn_progress.READ_SIZE - 2, 6])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,18 @@
 import configparser
+import contextlib
 import os
+import tempfile
+import threading
 
 CONFIG_FILE = 'config.ini'
 
+# One parsed copy of config.ini per process, re-read only when the file changes on disk.
+_lock = threading.RLock()
+_cached = None
+_cached_signature = None
+# The working copy of the transaction the lock holder has open, if any
+_transaction = None
+
 def create_default_config():
     """Creates a default config.ini file if one doesn't exist."""
     if not os.path.exists(CONFIG_FILE):
@@ -19,49 +29,115 @@ def create_default_config():
             'gemini_model': 'gemini-1.5-pro',
             'system_instructions': 'You are the AI assistant inside this CD burner application. You can search for music, download playlists, and assist with burning discs. Respond as a helpful in-app assistant.'
         }
-        with open(CONFIG_FILE, 'w') as configfile:
-            config.write(configfile)
+        _write(config)
     else:
         # Ensure system_instructions and LocalMusicFolder are present for existing users
+        with transaction() as config:
+            if not config.has_option('API_KEYS', 'system_instructions'):
+                config.set('API_KEYS', 'system_instructions', (
+                    'You are Alpha, the AI assistant in control of a CD burning and music downloader application called Alpha_Burn. '
+                    'You always know your environment, your role, and your purpose: to help the user download, tag, manage, and burn music. '
+                    'You can interact with the application to start burns, set settings, and answer questions about features (e.g., "what does finalize disc do?"). '
+                    'You always filter your responses to only show the text output, and prefix your answers with "Alpha:". '
+                    'If you need instructions for how to use the app, you have access to them. '
+                    'You can move files, manage directories, and help the user with all music and disc operations.'
+                ))
+            if not config.has_option('PATHS', 'LocalMusicFolder'):
+                config.set('PATHS', 'LocalMusicFolder', '')
+
+def _signature():
+    try:
+        stat = os.stat(CONFIG_FILE)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+def _copy(config):
+    # Raw values: reading through the parser would interpolate them, turning an escaped %% into a lone %
+    copy = configparser.ConfigParser()
+    copy.read_dict(_snapshot(config))
+    return copy
+
+def _snapshot(config):
+    return {section: dict(config.items(section, raw=True)) for section in config.sections()}
+
+def _load():
+    """The cached parser, re-read if config.ini changed since it was parsed. Call with _lock held."""
+    global _cached, _cached_signature
+    if _transaction is not None:
+        return _transaction
+    signature = _signature()
+    if _cached is None or signature != _cached_signature:
         config = configparser.ConfigParser()
         config.read(CONFIG_FILE)
-        changed = False
-        if not config.has_option('API_KEYS', 'system_instructions'):
-            config.set('API_KEYS', 'system_instructions', (
-                'You are Alpha, the AI assistant in control of a CD burning and music downloader application called Alpha_Burn. '
-                'You always know your environment, your role, and your purpose: to help the user download, tag, manage, and burn music. '
-                'You can interact with the application to start burns, set settings, and answer questions about features (e.g., "what does finalize disc do?"). '
-                'You always filter your responses to only show the text output, and prefix your answers with "Alpha:". '
-                'If you need instructions for how to use the app, you have access to them. '
-                'You can move files, manage directories, and help the user with all music and disc operations.'
-            ))
-            changed = True
-        if not config.has_option('PATHS', 'LocalMusicFolder'):
-            config.set('PATHS', 'LocalMusicFolder', '')
-            changed = True
-        if changed:
-            with open(CONFIG_FILE, 'w') as configfile:
-                config.write(configfile)
+        _cached, _cached_signature = config, signature
+    return _cached
+
+def _write(config):
+    """Replaces config.ini with config in one atomic rename and makes it the cached copy. Call with _lock held."""
+    global _cached, _cached_signature
+    directory = os.path.dirname(os.path.abspath(CONFIG_FILE))
+    fd, temp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+    try:
+        if os.path.exists(CONFIG_FILE):
+            os.chmod(temp_path, os.stat(CONFIG_FILE).st_mode & 0o777)
+        with os.fdopen(fd, 'w') as configfile:
+            config.write(configfile)
+            configfile.flush()
+            os.fsync(configfile.fileno())
+        os.replace(temp_path, CONFIG_FILE)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    _cached, _cached_signature = config, _signature()
+
+@contextlib.contextmanager
+def transaction():
+    """Groups setting changes into one write of config.ini.
+
+    Yields a working copy of the config; update_setting() and
+    remove_setting() calls made inside the block (from this thread) change
+    the same copy. When the outermost block exits without an error, the
+    copy is written once, atomically, if anything changed. Other threads wait for the block to
+    finish, so concurrent writers never lose each other's changes.
+    """
+    global _transaction
+    with _lock:
+        if _transaction is not None:
+            yield _transaction  # Nested: the outer block writes
+            return
+        original = _load()
+        _transaction = _copy(original)
+        try:
+            yield _transaction
+            if _snapshot(_transaction) != _snapshot(original):
+                _write(_transaction)
+        finally:
+            _transaction = None
 
 def get_config():
-    """Reads and returns the configuration object."""
-    config = configparser.ConfigParser()
-    config.read(CONFIG_FILE)
-    return config
+    """Returns a copy of the configuration, safe to modify."""
+    with _lock:
+        return _copy(_load())
 
 def get_setting(section, key, default_value=None):
-    """Gets a specific setting from the config file."""
-    config = get_config()
-    return config.get(section, key, fallback=default_value)
+    """Gets a specific setting from the cached config."""
+    with _lock:
+        return _load().get(section, key, fallback=default_value)
 
 def update_setting(section, key, value):
-    """Updates a specific setting in the config file."""
-    config = get_config()
-    if not config.has_section(section):
-        config.add_section(section)
-    config.set(section, key, value)
-    with open(CONFIG_FILE, 'w') as configfile:
-        config.write(configfile)
+    """Updates a specific setting in the config file (or in the open transaction)."""
+    with transaction() as config:
+        if not config.has_section(section):
+            config.add_section(section)
+        config.set(section, key, value)
+
+def remove_setting(section, key):
+    """Removes a setting from the config file (or from the open transaction)."""
+    with transaction() as config:
+        if config.has_section(section):
+            config.remove_option(section, key)
 
 # Create the default config on import
 create_default_config()
@@ -9,6 +9,12 @@ ARTIST_WIDTH = 150
 ALBUM_WIDTH = 200
 RATING_WIDTH = 80
 
+# Disc capacity assumed until the media in the selected drive has been read
+DEFAULT_DISC_CAPACITY_MB = 700
+
+# Delay after the last keystroke before the library search runs
+SEARCH_DEBOUNCE_MS = 200
+
 # Colors
 BURN_BUTTON_COLOR = "#4CAF50"
 STAR_COLOR = "#FFCD00"
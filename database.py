@@ -1,13 +1,149 @@
 import sqlite3
 import os
+import re
+import json
+import itertools
+import threading
+from contextlib import contextmanager
 
 DB_FILE = "alphaburn_library.db"
 
+# Connection tuning applied to every connection. WAL lets the UI read while a
+# worker thread writes, and NORMAL sync only fsyncs at checkpoints in WAL mode.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA foreign_keys=ON",
+)
+
+# Sort orders offered by get_songs_page(). Each maps to the columns of a
+# supporting index; the row id is appended as the final tie-breaker.
+SORT_ORDERS = {
+    'artist': ('artist', 'album', 'title'),
+    'album': ('album', 'title'),
+    'title': ('title',),
+}
+
+# Full-text index over the searchable columns. It is an external-content
+# table, so the triggers below keep it in step with the music table.
+FTS_COLUMNS = ('title', 'artist', 'album', 'genre')
+
+# File identity columns used by incremental rescans to skip unchanged files
+# and to recognise moved files without re-reading them.
+FILE_STAT_COLUMNS = {
+    'file_size': 'INTEGER',
+    'mtime_ns': 'INTEGER',
+    'inode': 'INTEGER',
+}
+
+# Details read once at scan time, so capacity and timing calculations never
+# have to reopen the files. content_hash covers the audio payload only (see
+# tag_reader.hash_payload), so retagged copies of a song still match.
+AUDIO_INFO_COLUMNS = {
+    'duration': 'REAL',
+    'bitrate': 'INTEGER',
+    'sample_rate': 'INTEGER',
+    'content_hash': 'TEXT',
+}
+
+# Set by the library scanner once it has tried to read a song's audio info,
+# so a file whose duration can't be determined isn't reopened on every rescan.
+INFO_ATTEMPTED_COLUMN = 'info_attempted'
+
+# Target of every INSERT into music; values come from _song_values()
+_INSERT_COLUMNS = ('filepath', 'title', 'artist', 'album', 'year', 'genre', 'rating') + tuple(FILE_STAT_COLUMNS) + tuple(AUDIO_INFO_COLUMNS) + (INFO_ATTEMPTED_COLUMN,)
+_INSERT_SONG_SQL = f"INTO music ({', '.join(_INSERT_COLUMNS)}) VALUES ({', '.join('?' * len(_INSERT_COLUMNS))})"
+
+# Columns returned for library rows, in the order get_all_songs() uses, with
+# the song id appended so views can apply change notifications by id.
+LIBRARY_COLUMNS = "title, artist, album, year, genre, rating, filepath, id"
+
+# Callbacks registered with add_change_listener(). Each is called as
+# callback(kind, rows) after a write commits, on the thread that wrote:
+# kind is 'insert' or 'update' with LIBRARY_COLUMNS rows, or 'delete' with ids.
+_change_listeners = []
+
+# sqlite3 connections can't be shared between threads, so each thread (the UI
+# thread and every worker) keeps its own long-lived connection here.
+_local = threading.local()
+
+def get_connection():
+    """Returns this thread's database connection, opening it on first use."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(DB_FILE, timeout=10.0)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        _local.conn = conn
+    return conn
+
+def close_connection():
+    """Closes this thread's connection. Worker threads call this before exiting."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+@contextmanager
+def transaction():
+    """Yields a cursor whose statements are committed together (or rolled back on error)."""
+    conn = get_connection()
+    with conn:
+        yield conn.cursor()
+
+def add_change_listener(callback):
+    """Registers a callback for row-level library changes."""
+    _change_listeners.append(callback)
+
+def remove_change_listener(callback):
+    if callback in _change_listeners:
+        _change_listeners.remove(callback)
+
+def _notify(kind, rows):
+    if rows:
+        for callback in list(_change_listeners):
+            callback(kind, rows)
+
+def _rows_for_filepaths(filepaths):
+    cursor = get_connection().cursor()
+    cursor.execute(f"SELECT {LIBRARY_COLUMNS} FROM music WHERE filepath IN (SELECT value FROM json_each(?))",
+                   (json.dumps(list(filepaths)),))
+    return cursor.fetchall()
+
+def _song_values(filepath, metadata):
+    return (
+        filepath,
+        metadata.get('title', 'Unknown Title'),
+        metadata.get('artist', 'Unknown Artist'),
+        metadata.get('album', 'Unknown Album'),
+        metadata.get('year', '0000'),
+        metadata.get('genre', 'Unknown'),
+        0, # Default rating
+    ) + _stat_values(metadata) + _audio_info_values(metadata) + (metadata.get(INFO_ATTEMPTED_COLUMN),)
+
+def _stat_values(stats):
+    return tuple(stats.get(column) for column in FILE_STAT_COLUMNS)
+
+def _audio_info_values(metadata):
+    return tuple(metadata.get(column) for column in AUDIO_INFO_COLUMNS)
+
+def _ensure_column(cursor, name, declaration):
+    try:
+        cursor.execute(f"SELECT {name} FROM music LIMIT 1")
+    except sqlite3.OperationalError:
+        cursor.execute(f"ALTER TABLE music ADD COLUMN {name} {declaration}")
+
+def _prefix_range(folder):
+    """Returns (low, high) bounds matching every filepath inside folder via the filepath index."""
+    prefix = os.path.join(folder, '')
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
 def init_db():
     """Initializes the database and creates/updates the music table."""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        
+    with transaction() as cursor:
         # Create table if it doesn't exist
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS music (
@@ -21,38 +157,171 @@ def init_db():
                 rating INTEGER DEFAULT 0
             )
         """)
-        
+
         # Add rating column if it doesn't exist (for backward compatibility)
         try:
             cursor.execute("SELECT rating FROM music LIMIT 1")
         except sqlite3.OperationalError:
             cursor.execute("ALTER TABLE music ADD COLUMN rating INTEGER DEFAULT 0")
 
+        for name, declaration in {**FILE_STAT_COLUMNS, **AUDIO_INFO_COLUMNS}.items():
+            _ensure_column(cursor, name, declaration)
+        _ensure_column(cursor, INFO_ATTEMPTED_COLUMN, 'INTEGER')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_music_content_hash ON music (content_hash)")
+
+        # Keyset pagination compares row values, which never match NULLs
+        for column in ('title', 'artist', 'album', 'year', 'genre'):
+            cursor.execute(f"UPDATE music SET {column} = '' WHERE {column} IS NULL")
+
+        # One index per sort order so paging never has to sort the table
+        for name, columns in SORT_ORDERS.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_music_sort_{name} ON music ({', '.join(columns)})")
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS burn_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at REAL,
+                finished_at REAL,
+                drive TEXT,
+                mode TEXT,
+                media TEXT,
+                total_mb REAL,
+                written_mb REAL,
+                average_speed REAL,
+                max_speed REAL,
+                min_speed REAL,
+                min_buffer_fill INTEGER,
+                min_fifo_fill INTEGER,
+                low_buffer_count INTEGER,
+                burnfree_count INTEGER,
+                success INTEGER,
+                message TEXT
+            )
+        """)
+
+        # Burn presets. Items point at library songs by id, so presets follow
+        # files the scanner sees moved; files outside the library are kept by path.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS presets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL UNIQUE
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS preset_items (
+                preset_id INTEGER NOT NULL REFERENCES presets (id) ON DELETE CASCADE,
+                position INTEGER NOT NULL,
+                song_id INTEGER REFERENCES music (id) ON DELETE SET NULL,
+                filepath TEXT,
+                PRIMARY KEY (preset_id, position)
+            ) WITHOUT ROWID
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_preset_items_song ON preset_items (song_id)")
+        # A song that leaves the library (e.g. a file missing during a scan)
+        # stays in its presets by path, and is linked again when it comes back.
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS preset_items_song_deleted BEFORE DELETE ON music BEGIN
+                UPDATE preset_items SET song_id = NULL, filepath = old.filepath WHERE song_id = old.id;
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS preset_items_song_added AFTER INSERT ON music BEGIN
+                UPDATE preset_items SET song_id = new.id, filepath = NULL WHERE song_id IS NULL AND filepath = new.filepath;
+            END
+        """)
+
+        # What each drive model can do with each media (ATIP) ID, probed once,
+        # and the fastest speed that burned well / slowest that made a coaster.
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS drive_capabilities (
+                drive_id TEXT NOT NULL,
+                media_id TEXT NOT NULL,
+                write_speeds TEXT,
+                modes TEXT,
+                buffer_kb INTEGER,
+                burnfree INTEGER,
+                media_speed REAL,
+                erasable INTEGER,
+                validated_speed REAL,
+                failed_speed REAL,
+                probed_at REAL,
+                PRIMARY KEY (drive_id, media_id)
+            ) WITHOUT ROWID
+        """)
+
+    try:
+        _init_fts()
+    except sqlite3.OperationalError as e:
+        # SQLite builds without FTS5 fall back to LIKE matching in search_songs()
+        print(f"[Database] Full-text search unavailable: {e}")
+
+def _init_fts():
+    cols = ', '.join(FTS_COLUMNS)
+    new_cols = ', '.join(f"new.{c}" for c in FTS_COLUMNS)
+    old_cols = ', '.join(f"old.{c}" for c in FTS_COLUMNS)
+    with transaction() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'music_fts'")
+        is_new = cursor.fetchone() is None
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS music_fts USING fts5(
+                {cols}, content='music', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS music_fts_ai AFTER INSERT ON music BEGIN
+                INSERT INTO music_fts (rowid, {cols}) VALUES (new.id, {new_cols});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS music_fts_ad AFTER DELETE ON music BEGIN
+                INSERT INTO music_fts (music_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS music_fts_au AFTER UPDATE OF {cols} ON music BEGIN
+                INSERT INTO music_fts (music_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+                INSERT INTO music_fts (rowid, {cols}) VALUES (new.id, {new_cols});
+            END
+        """)
+        if is_new:
+            # Index the rows that existed before the search table was added
+            cursor.execute("INSERT INTO music_fts (music_fts) VALUES ('rebuild')")
+
+def _fts_available():
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'music_fts'")
+    return cursor.fetchone() is not None
+
 def add_song(filepath, metadata):
     """Adds a new song to the database. Ignores duplicates based on filepath."""
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO music (filepath, title, artist, album, year, genre, rating)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                filepath,
-                metadata.get('title', 'Unknown Title'),
-                metadata.get('artist', 'Unknown Artist'),
-                metadata.get('album', 'Unknown Album'),
-                metadata.get('year', '0000'),
-                metadata.get('genre', 'Unknown'),
-                0 # Default rating
-            ))
+        with transaction() as cursor:
+            cursor.execute(f"INSERT {_INSERT_SONG_SQL}", _song_values(filepath, metadata))
     except sqlite3.IntegrityError:
         # This will happen if the filepath is already in the database, which is fine.
-        pass
+        return
+    if _change_listeners:
+        _notify('insert', _rows_for_filepaths([filepath]))
+
+def add_songs_bulk(songs):
+    """Adds many (filepath, metadata) pairs in one transaction. Returns how many were new."""
+    songs = list(songs)
+    new_paths = None
+    if _change_listeners:
+        known = existing_filepaths(filepath for filepath, _ in songs)
+        new_paths = [filepath for filepath, _ in songs if filepath not in known]
+    with transaction() as cursor:
+        cursor.executemany(f"INSERT OR IGNORE {_INSERT_SONG_SQL}",
+                           (_song_values(filepath, metadata) for filepath, metadata in songs))
+        inserted = cursor.rowcount
+    if new_paths:
+        _notify('insert', _rows_for_filepaths(new_paths))
+    return inserted
 
 def update_song_metadata(filepath, new_metadata):
     """Updates the metadata for a specific song."""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
+    with transaction() as cursor:
         cursor.execute("""
             UPDATE music
             SET title = ?, artist = ?, album = ?, year = ?, genre = ?
@@ -65,24 +334,334 @@ def update_song_metadata(filepath, new_metadata):
             new_metadata['genre'],
             filepath
         ))
+    if _change_listeners:
+        _notify('update', _rows_for_filepaths([filepath]))
+
+def update_songs_bulk(songs):
+    """Re-writes tags, file stats and audio info for many re-scanned (filepath, metadata) pairs in one transaction."""
+    songs = list(songs)
+    columns = ('title', 'artist', 'album', 'year', 'genre') + tuple(FILE_STAT_COLUMNS) + tuple(AUDIO_INFO_COLUMNS) + (INFO_ATTEMPTED_COLUMN,)
+    assignments = ', '.join(f"{column} = ?" for column in columns)
+    with transaction() as cursor:
+        cursor.executemany(f"UPDATE music SET {assignments} WHERE filepath = ?",
+                           (values[1:6] + values[7:] + values[:1]
+                            for values in (_song_values(filepath, metadata) for filepath, metadata in songs)))
+    if _change_listeners:
+        _notify('update', _rows_for_filepaths(filepath for filepath, _ in songs))
+
+def mark_info_attempted(filepaths):
+    """Records that reading audio info failed for filepaths, so unchanged rescans don't retry them."""
+    with transaction() as cursor:
+        cursor.execute(f"UPDATE music SET {INFO_ATTEMPTED_COLUMN} = 1 WHERE filepath IN (SELECT value FROM json_each(?))",
+                       (json.dumps(list(filepaths)),))
+
+def update_audio_info(info):
+    """Stores audio info read outside a scan, given {filepath: (duration, bitrate)}; files it couldn't be read for (None) are marked as attempted."""
+    read = [(duration, bitrate, filepath) for filepath, (duration, bitrate) in info.items() if duration is not None]
+    failed = [filepath for filepath, (duration, _) in info.items() if duration is None]
+    with transaction() as cursor:
+        cursor.executemany("UPDATE music SET duration = ?, bitrate = ? WHERE filepath = ?", read)
+        cursor.execute(f"UPDATE music SET {INFO_ATTEMPTED_COLUMN} = 1 WHERE filepath IN (SELECT value FROM json_each(?))",
+                       (json.dumps(failed),))
+
+def move_songs(moves):
+    """Points existing rows at new locations, given (old_filepath, new_filepath, stats) triples.
+
+    Row ids, ratings and tags are kept, so nothing has to be re-read.
+    """
+    moves = list(moves)
+    assignments = ', '.join(f"{column} = ?" for column in FILE_STAT_COLUMNS)
+    with transaction() as cursor:
+        cursor.executemany(f"UPDATE music SET filepath = ?, {assignments} WHERE filepath = ?",
+                           ((new_path,) + _stat_values(stats) + (old_path,) for old_path, new_path, stats in moves))
+    if _change_listeners:
+        _notify('update', _rows_for_filepaths(new_path for _, new_path, _ in moves))
+
+# Selected by the file index lookups: stats plus a flag for rows whose audio
+# info or content hash was never read (added before those columns existed).
+_FILE_INDEX_COLUMNS = f"filepath, {', '.join(FILE_STAT_COLUMNS)}, (duration IS NULL OR content_hash IS NULL) AND {INFO_ATTEMPTED_COLUMN} IS NULL"
+
+def get_file_index(folder):
+    """Returns {filepath: (file_size, mtime_ns, inode, needs_info)} for every song stored under folder."""
+    cursor = get_connection().cursor()
+    cursor.execute(f"SELECT {_FILE_INDEX_COLUMNS} FROM music WHERE filepath >= ? AND filepath < ?",
+                   _prefix_range(folder))
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def get_file_index_for_paths(filepaths):
+    """Returns {filepath: (file_size, mtime_ns, inode, needs_info)} for the given filepaths that are in the library."""
+    cursor = get_connection().cursor()
+    cursor.execute(f"SELECT {_FILE_INDEX_COLUMNS} FROM music WHERE filepath IN (SELECT value FROM json_each(?))",
+                   (json.dumps(list(filepaths)),))
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def get_audio_info(filepaths):
+    """Returns {filepath: (file_size, duration, bitrate, sample_rate, content_hash)} from the stored scan results."""
+    cursor = get_connection().cursor()
+    cursor.execute(f"SELECT filepath, file_size, {', '.join(AUDIO_INFO_COLUMNS)} FROM music "
+                   "WHERE filepath IN (SELECT value FROM json_each(?))",
+                   (json.dumps(list(filepaths)),))
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def get_burn_queue_entries(filepaths):
+    """Returns {filepath: (title, artist, file_size, duration, bitrate, content_hash)} for the given filepaths that are in the library."""
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT filepath, title, artist, file_size, duration, bitrate, content_hash FROM music "
+                   "WHERE filepath IN (SELECT value FROM json_each(?))",
+                   (json.dumps(list(filepaths)),))
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def get_audio_cd_tracks(filepaths):
+    """Returns {filepath: (title, artist, album, duration)} for the given filepaths that are in the library."""
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT filepath, title, artist, album, duration FROM music WHERE filepath IN (SELECT value FROM json_each(?))",
+                   (json.dumps(list(filepaths)),))
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def get_disc_plan_entries(filepaths):
+    """Returns {filepath: (artist, album, file_size, duration)} for the given filepaths that are in the library."""
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT filepath, artist, album, file_size, duration FROM music WHERE filepath IN (SELECT value FROM json_each(?))",
+                   (json.dumps(list(filepaths)),))
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def get_duplicate_groups():
+    """Returns [(content_hash, rows)] for every payload stored more than once.
+
+    Rows are (file_size, title, artist, album, year, genre, rating, filepath, id).
+    """
+    cursor = get_connection().cursor()
+    cursor.execute(f"""
+        SELECT content_hash, file_size, {LIBRARY_COLUMNS} FROM music
+        WHERE content_hash IN (
+            SELECT content_hash FROM music WHERE content_hash IS NOT NULL
+            GROUP BY content_hash HAVING COUNT(*) > 1
+        )
+        ORDER BY content_hash, filepath
+    """)
+    return [(content_hash, [row[1:] for row in rows])
+            for content_hash, rows in itertools.groupby(cursor.fetchall(), key=lambda row: row[0])]
+
+BURN_LOG_COLUMNS = ('started_at', 'finished_at', 'drive', 'mode', 'media', 'total_mb', 'written_mb', 'average_speed',
+                    'max_speed', 'min_speed', 'min_buffer_fill', 'min_fifo_fill', 'low_buffer_count', 'burnfree_count',
+                    'success', 'message')
+
+def add_burn_log(entry):
+    """Records one burn; entry maps BURN_LOG_COLUMNS names to values (missing ones are stored as NULL)."""
+    with transaction() as cursor:
+        cursor.execute(f"INSERT INTO burn_log ({', '.join(BURN_LOG_COLUMNS)}) VALUES ({', '.join('?' * len(BURN_LOG_COLUMNS))})",
+                       [entry.get(column) for column in BURN_LOG_COLUMNS])
+
+def get_burn_log(limit=200):
+    """Returns the most recent burns, newest first, as tuples in BURN_LOG_COLUMNS order."""
+    cursor = get_connection().cursor()
+    cursor.execute(f"SELECT {', '.join(BURN_LOG_COLUMNS)} FROM burn_log ORDER BY started_at DESC LIMIT ?", (limit,))
+    return cursor.fetchall()
+
+def save_preset(name, filepaths):
+    """Creates or replaces the preset name with filepaths, in order, in one transaction."""
+    save_presets({name: filepaths})
+
+def save_presets(presets, replace=True):
+    """Saves {name: filepaths} presets in one transaction. With replace=False existing presets are left alone."""
+    with transaction() as cursor:
+        for name, filepaths in presets.items():
+            cursor.execute("SELECT id FROM presets WHERE name = ?", (name,))
+            row = cursor.fetchone()
+            if row is not None and not replace:
+                continue
+            if row is None:
+                cursor.execute("INSERT INTO presets (name) VALUES (?)", (name,))
+                preset_id = cursor.lastrowid
+            else:
+                preset_id = row[0]
+                cursor.execute("DELETE FROM preset_items WHERE preset_id = ?", (preset_id,))
+            cursor.execute("""
+                INSERT INTO preset_items (preset_id, position, song_id, filepath)
+                SELECT ?, j.key, m.id, CASE WHEN m.id IS NULL THEN j.value END
+                FROM json_each(?) j LEFT JOIN music m ON m.filepath = j.value
+            """, (preset_id, json.dumps(list(filepaths))))
+
+def get_preset_names():
+    """Returns the saved preset names, oldest first."""
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT name FROM presets ORDER BY id")
+    return [row[0] for row in cursor.fetchall()]
+
+def get_preset_filepaths(name):
+    """Returns the current filepaths of the preset's tracks in order, or None if there is no such preset."""
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT id FROM presets WHERE name = ?", (name,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    cursor.execute("""
+        SELECT COALESCE(m.filepath, i.filepath) FROM preset_items i LEFT JOIN music m ON m.id = i.song_id
+        WHERE i.preset_id = ? ORDER BY i.position
+    """, (row[0],))
+    return [row[0] for row in cursor.fetchall()]
+
+def get_presets_for_song(filepath):
+    """Returns the names of the presets that include filepath."""
+    cursor = get_connection().cursor()
+    cursor.execute("""
+        SELECT DISTINCT p.name FROM presets p JOIN preset_items i ON i.preset_id = p.id
+        WHERE i.song_id = (SELECT id FROM music WHERE filepath = ?) OR i.filepath = ?
+        ORDER BY p.id
+    """, (filepath, filepath))
+    return [row[0] for row in cursor.fetchall()]
+
+def delete_preset(name):
+    """Deletes a preset and its items."""
+    with transaction() as cursor:
+        cursor.execute("DELETE FROM presets WHERE name = ?", (name,))
+
+DRIVE_CAPABILITY_COLUMNS = ('drive_id', 'media_id', 'write_speeds', 'modes', 'buffer_kb', 'burnfree', 'media_speed',
+                            'erasable', 'validated_speed', 'failed_speed', 'probed_at')
+
+def get_drive_capabilities(drive_id, media_id):
+    """Returns the cached capabilities as a dict of DRIVE_CAPABILITY_COLUMNS, or None if not probed yet.
+
+    write_speeds (fastest first) and modes are lists.
+    """
+    cursor = get_connection().cursor()
+    cursor.execute(f"SELECT {', '.join(DRIVE_CAPABILITY_COLUMNS)} FROM drive_capabilities WHERE drive_id = ? AND media_id = ?",
+                   (drive_id, media_id))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    capabilities = dict(zip(DRIVE_CAPABILITY_COLUMNS, row))
+    capabilities['write_speeds'] = json.loads(capabilities['write_speeds'] or '[]')
+    capabilities['modes'] = json.loads(capabilities['modes'] or '[]')
+    capabilities['burnfree'] = bool(capabilities['burnfree'])
+    return capabilities
+
+def save_drive_capabilities(capabilities):
+    """Stores probed capabilities (a dict like get_drive_capabilities() returns), keeping the recorded burn results."""
+    values = dict(capabilities, write_speeds=json.dumps(capabilities.get('write_speeds') or []),
+                  modes=json.dumps(capabilities.get('modes') or []))
+    columns = [column for column in DRIVE_CAPABILITY_COLUMNS if column not in ('validated_speed', 'failed_speed')]
+    with transaction() as cursor:
+        cursor.execute(f"""
+            INSERT INTO drive_capabilities ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})
+            ON CONFLICT (drive_id, media_id) DO UPDATE SET {', '.join(f'{column} = excluded.{column}' for column in columns[2:])}
+        """, [values.get(column) for column in columns])
+
+def record_drive_burn(drive_id, media_id, speed, success):
+    """Records a burn at speed: raises validated_speed on success, lowers failed_speed on a write failure."""
+    with transaction() as cursor:
+        cursor.execute("INSERT OR IGNORE INTO drive_capabilities (drive_id, media_id) VALUES (?, ?)", (drive_id, media_id))
+        if success:
+            # A success at or above the failed speed means that failure was a bad disc, not the speed
+            cursor.execute("""
+                UPDATE drive_capabilities SET validated_speed = MAX(COALESCE(validated_speed, 0), ?),
+                    failed_speed = CASE WHEN failed_speed <= ? THEN NULL ELSE failed_speed END
+                WHERE drive_id = ? AND media_id = ?
+            """, (speed, speed, drive_id, media_id))
+        else:
+            cursor.execute("""
+                UPDATE drive_capabilities SET failed_speed = MIN(COALESCE(failed_speed, ?), ?),
+                    validated_speed = CASE WHEN validated_speed >= ? THEN NULL ELSE validated_speed END
+                WHERE drive_id = ? AND media_id = ?
+            """, (speed, speed, speed, drive_id, media_id))
 
 def update_song_rating(filepath, rating):
     """Updates the rating for a specific song."""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("UPDATE music SET rating = ? WHERE filepath = ?", (rating, filepath))
+    update_ratings_bulk([(filepath, rating)])
+
+def update_ratings_bulk(ratings):
+    """Updates ratings for many (filepath, rating) pairs in one transaction."""
+    ratings = list(ratings)
+    with transaction() as cursor:
+        cursor.executemany("UPDATE music SET rating = ? WHERE filepath = ?",
+                           ((rating, filepath) for filepath, rating in ratings))
+    if _change_listeners:
+        _notify('update', _rows_for_filepaths(filepath for filepath, _ in ratings))
+
+def delete_songs(filepaths):
+    """Removes the given filepaths from the library in one transaction."""
+    payload = json.dumps(list(filepaths))
+    with transaction() as cursor:
+        cursor.execute("SELECT id FROM music WHERE filepath IN (SELECT value FROM json_each(?))", (payload,))
+        ids = [row[0] for row in cursor.fetchall()]
+        cursor.execute("DELETE FROM music WHERE filepath IN (SELECT value FROM json_each(?))", (payload,))
+    _notify('delete', ids)
+    return len(ids)
 
 def get_all_songs():
     """Retrieves all songs from the database."""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT title, artist, album, year, genre, rating, filepath FROM music ORDER BY artist, album, title")
-        return cursor.fetchall()
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT title, artist, album, year, genre, rating, filepath FROM music ORDER BY artist, album, title")
+    return cursor.fetchall()
+
+def count_songs():
+    """Returns the number of songs in the library."""
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT COUNT(*) FROM music")
+    return cursor.fetchone()[0]
+
+def get_songs_page(after_key=None, limit=500, sort='artist'):
+    """Returns (rows, next_key) for one page of songs using keyset pagination.
+
+    Rows have the LIBRARY_COLUMNS layout. Pass next_key back as after_key
+    to get the following page; it is None after the last page.
+    """
+    sort_columns = SORT_ORDERS[sort] + ('id',)
+    key_sql = f"({', '.join(sort_columns)})"
+    query = f"SELECT {LIBRARY_COLUMNS}, {', '.join(sort_columns)} FROM music"
+    params = []
+    if after_key is not None:
+        query += f" WHERE {key_sql} > ({', '.join('?' * len(sort_columns))})"
+        params.extend(after_key)
+    query += f" ORDER BY {', '.join(sort_columns)} LIMIT ?"
+    params.append(limit)
+    cursor = get_connection().cursor()
+    cursor.execute(query, params)
+    fetched = cursor.fetchall()
+    rows = [row[:8] for row in fetched]
+    next_key = tuple(fetched[-1][8:]) if len(fetched) == limit else None
+    return rows, next_key
+
+def filepath_exists(filepath):
+    """Returns True if the filepath is already in the library."""
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT 1 FROM music WHERE filepath = ?", (filepath,))
+    return cursor.fetchone() is not None
+
+def existing_filepaths(filepaths):
+    """Returns the subset of the given filepaths that are already in the library."""
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT filepath FROM music WHERE filepath IN (SELECT value FROM json_each(?))",
+                   (json.dumps(list(filepaths)),))
+    return {row[0] for row in cursor.fetchall()}
+
+def search_songs(text, limit=1000):
+    """Returns songs whose title, artist, album or genre match every word of text as a prefix.
+
+    Rows have the LIBRARY_COLUMNS layout, best matches first.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return []
+    cursor = get_connection().cursor()
+    if _fts_available():
+        match = ' '.join(f'"{word}"*' for word in words)
+        cursor.execute("""
+            SELECT m.title, m.artist, m.album, m.year, m.genre, m.rating, m.filepath, m.id
+            FROM music_fts JOIN music m ON m.id = music_fts.rowid
+            WHERE music_fts MATCH ? ORDER BY rank LIMIT ?
+        """, (match, limit))
+    else:
+        haystack = " || ' ' || ".join(FTS_COLUMNS)
+        cursor.execute(f"""
+            SELECT {LIBRARY_COLUMNS} FROM music
+            WHERE {' AND '.join(f"({haystack}) LIKE ?" for _ in words)}
+            ORDER BY artist, album, title LIMIT ?
+        """, [f"%{word}%" for word in words] + [limit])
+    return cursor.fetchall()
 
 def get_song_by_filepath(filepath):
     """Retrieves a single song's data by its filepath."""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT title, artist, album, year, genre, rating FROM music WHERE filepath = ?", (filepath,))
-        return cursor.fetchone()
-
+    cursor = get_connection().cursor()
+    cursor.execute("SELECT title, artist, album, year, genre, rating FROM music WHERE filepath = ?", (filepath,))
+    return cursor.fetchone()
@@ -0,0 +1,152 @@
+import os
+import re
+import sys
+import time
+import subprocess
+
+SECTOR_SIZE = 2048
+# Sectors of an empty ISO 9660 + Joliet image as written by pycdlib: system
+# area, primary/Joliet/terminator descriptors, path tables and root dirs.
+BASE_IMAGE_SECTORS = 30
+# Joliet directory records are 33 bytes plus the UCS-2 name, padded to even,
+# and never span a sector, so directory sectors are counted conservatively.
+DIRECTORY_RECORD_BASE = 33
+MAX_DIRECTORY_RECORD = DIRECTORY_RECORD_BASE + 2 * 64 + 1
+ROOT_DIRECTORY_BYTES = 2 * 34
+
+# Seconds to wait for the burner tool when reading media capacity.
+MEDIA_QUERY_TIMEOUT = 30
+
+# Latest wodim -atip output per device, as (time.monotonic(), output); see read_atip().
+_atip_outputs = {}
+
+
+def device_path(drive):
+    """Maps a drive selector entry to the device node the burner tools expect on Linux."""
+    if sys.platform.startswith('linux') and not drive.startswith('/dev/'):
+        return f"/dev/{drive}"
+    return drive
+
+
+def file_sectors(size):
+    return (size + SECTOR_SIZE - 1) // SECTOR_SIZE
+
+
+def directory_record_size(filepath):
+    """Size of the Joliet directory record for a file added under its upper-cased basename."""
+    size = DIRECTORY_RECORD_BASE + 2 * len(os.path.basename(filepath))
+    return size + (size & 1)
+
+
+class ImageSizeTally:
+    """Running size of the disc image for a set of files.
+
+    Adding or removing a file is O(1) and never touches the disk; sizes
+    come from the caller (normally the library database).
+    """
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._sizes = {}
+        self.data_bytes = 0
+        self._data_sectors = 0
+        self._directory_bytes = ROOT_DIRECTORY_BYTES
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def __contains__(self, filepath):
+        return filepath in self._sizes
+
+    def add(self, filepath, size):
+        if filepath in self._sizes:
+            return
+        self._sizes[filepath] = size
+        self.data_bytes += size
+        self._data_sectors += file_sectors(size)
+        self._directory_bytes += directory_record_size(filepath)
+
+    def remove(self, filepath):
+        size = self._sizes.pop(filepath, None)
+        if size is None:
+            return
+        self.data_bytes -= size
+        self._data_sectors -= file_sectors(size)
+        self._directory_bytes -= directory_record_size(filepath)
+
+    @property
+    def image_bytes(self):
+        """Estimated ISO 9660/Joliet image size: file data rounded to sectors plus filesystem structures."""
+        directory_sectors = -(-self._directory_bytes // (SECTOR_SIZE - MAX_DIRECTORY_RECORD))
+        return (BASE_IMAGE_SECTORS - 1 + directory_sectors + self._data_sectors) * SECTOR_SIZE
+
+
+def read_atip(drive, max_age=None):
+    """Returns wodim's -atip output for drive.
+
+    With max_age, output read at most that many seconds ago (e.g. by the
+    media capacity query when the disc went in) is returned instead of
+    spinning the drive up again.
+    """
+    device = device_path(drive)
+    if max_age is not None and device in _atip_outputs:
+        read_at, output = _atip_outputs[device]
+        if time.monotonic() - read_at <= max_age:
+            return output
+    result = subprocess.run(['wodim', f'dev={device}', '-atip'], capture_output=True, text=True, timeout=MEDIA_QUERY_TIMEOUT)
+    output = result.stdout + result.stderr
+    _atip_outputs[device] = (time.monotonic(), output)
+    return output
+
+
+def _query_linux_media(drive):
+    # Blank CD-R/RW: the ATIP lead-out start is the number of writable sectors
+    match = re.search(r'ATIP start of lead out:\s*(\d+)', read_atip(drive))
+    if not match:
+        return None
+    # Already written media report where the next session would start
+    msinfo = subprocess.run(['wodim', f'dev={device_path(drive)}', '-msinfo'],
+                            capture_output=True, text=True, timeout=MEDIA_QUERY_TIMEOUT)
+    used = re.search(r'^\s*\d+,(\d+)\s*$', msinfo.stdout, re.MULTILINE)
+    free_sectors = int(match.group(1)) - (int(used.group(1)) if used and msinfo.returncode == 0 else 0)
+    return max(0, free_sectors) * SECTOR_SIZE
+
+
+_IMAPI_SCRIPT = r"""
+$master = New-Object -ComObject IMAPI2.MsftDiscMaster2
+foreach ($id in $master) {
+    $recorder = New-Object -ComObject IMAPI2.MsftDiscRecorder2
+    $recorder.InitializeDiscRecorder($id)
+    if ($recorder.VolumePathNames -contains '%s\') {
+        $format = New-Object -ComObject IMAPI2.MsftDiscFormat2Data
+        $format.Recorder = $recorder
+        Write-Output $format.FreeSectorsOnMedia
+    }
+}
+"""
+
+
+def _query_windows_media(drive):
+    drive_letter = drive.rstrip('\\').rstrip(':') + ':'
+    result = subprocess.run(['powershell', '-NoProfile', '-Command', _IMAPI_SCRIPT % drive_letter],
+                            capture_output=True, text=True, timeout=MEDIA_QUERY_TIMEOUT,
+                            creationflags=subprocess.CREATE_NO_WINDOW)
+    match = re.search(r'^\s*(\d+)\s*$', result.stdout, re.MULTILINE)
+    return int(match.group(1)) * SECTOR_SIZE if match else None
+
+
+def query_media_free_bytes(drive):
+    """Returns the writable bytes left on the media in drive, or None if it can't be read.
+
+    Uses IMAPI2 on Windows and wodim's ATIP/multi-session info on Linux. Slow
+    (it spins up the drive), so call it from a worker thread.
+    """
+    try:
+        if sys.platform == 'win32':
+            return _query_windows_media(drive)
+        if sys.platform.startswith('linux'):
+            return _query_linux_media(drive)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"[Disc] Could not read media capacity for {drive}: {e}")
+    return None
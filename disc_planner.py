@@ -0,0 +1,143 @@
+import os
+import bisect
+import disc
+import audio_cd
+
+# Fixed filesystem structures of a data disc image, plus a sector of slack for directory rounding.
+IMAGE_OVERHEAD_BYTES = (disc.BASE_IMAGE_SECTORS + 1) * disc.SECTOR_SIZE
+
+
+class PlanItem:
+    """One track to place: its weight in the plan's unit and the artist and album it belongs to."""
+    __slots__ = ('filepath', 'weight', 'album', 'order', 'artist')
+
+    def __init__(self, filepath, weight, album=None, order=0, artist=None):
+        self.filepath = filepath
+        self.weight = weight
+        self.album = album
+        self.order = order
+        self.artist = artist
+
+
+def data_disc_weight(filepath, size):
+    """Bytes a file adds to an ISO 9660/Joliet image, counting its directory record conservatively."""
+    record = disc.directory_record_size(filepath)
+    usable = disc.SECTOR_SIZE - disc.MAX_DIRECTORY_RECORD
+    return disc.file_sectors(size or 0) * disc.SECTOR_SIZE + -(-record * disc.SECTOR_SIZE // usable)
+
+
+def data_disc_capacity(capacity_bytes):
+    """Bytes left for files on a data disc after the fixed filesystem structures."""
+    return capacity_bytes - IMAGE_OVERHEAD_BYTES
+
+
+def audio_disc_capacity(capacity_frames):
+    return capacity_frames - audio_cd.LEAD_PREGAP_FRAMES
+
+
+def _units(items, capacity, keep_albums):
+    """Groups items into the units that are packed whole: albums (if they fit on one disc) or single tracks.
+
+    Albums are told apart by artist too, so e.g. every "Greatest Hits" isn't one unit.
+    """
+    if not keep_albums:
+        return [[item] for item in items]
+    albums = {}
+    units = []
+    for item in items:
+        if item.album:
+            key = (item.artist, item.album)
+            if key not in albums:
+                albums[key] = []
+                units.append(albums[key])
+            albums[key].append(item)
+        else:
+            units.append([item])
+    packed = []
+    for unit in units:
+        if sum(item.weight for item in unit) <= capacity:
+            packed.append(unit)
+        else:
+            # An album longer than a disc is split like loose tracks
+            packed.extend([item] for item in unit)
+    return packed
+
+
+def plan_discs(items, capacity, keep_albums=False, max_items=None):
+    """Packs items onto as few discs as possible. Returns a list of discs, each a list of filepaths.
+
+    Uses best-fit decreasing: units (albums or tracks) are placed largest
+    first on the open disc with the least room that still fits them. Open
+    discs are kept sorted by remaining room, so each placement is a binary
+    search and thousands of tracks plan instantly. Tracks keep their input
+    order on each disc, and discs are ordered by their first track.
+    max_items caps the tracks per disc (99 for audio CDs). Raises ValueError
+    if a single track is larger than a disc.
+    """
+    too_big = [item.filepath for item in items if item.weight > capacity]
+    if too_big:
+        raise ValueError(f"{len(too_big)} tracks are too large for one disc, e.g. {too_big[0]}")
+    units = _units(items, capacity, keep_albums)
+    units.sort(key=lambda unit: sum(item.weight for item in unit), reverse=True)
+
+    discs = []       # [[items], ...]
+    room = []        # sorted [(remaining, disc index)] of discs that may take more
+    counts = []
+    for unit in units:
+        weight = sum(item.weight for item in unit)
+        position = bisect.bisect_left(room, (weight, -1))
+        while position < len(room):
+            remaining, index = room[position]
+            if max_items is None or counts[index] + len(unit) <= max_items:
+                break
+            position += 1
+        if position < len(room):
+            remaining, index = room.pop(position)
+        else:
+            index = len(discs)
+            discs.append([])
+            counts.append(0)
+            remaining = capacity
+        discs[index].extend(unit)
+        counts[index] += len(unit)
+        remaining -= weight
+        if remaining > 0 and (max_items is None or counts[index] < max_items):
+            bisect.insort(room, (remaining, index))
+
+    planned = [sorted(disc_items, key=lambda item: item.order) for disc_items in discs]
+    planned.sort(key=lambda disc_items: disc_items[0].order)
+    return [[item.filepath for item in disc_items] for disc_items in planned]
+
+
+def missing_durations(entries, filepaths):
+    """The filepaths in entries (database.get_disc_plan_entries() rows) with no stored duration."""
+    return [filepath for filepath in filepaths if filepath in entries and entries[filepath][3] is None]
+
+
+def plan_items(entries, filepaths, by_duration=False, durations=None):
+    """PlanItems for the filepaths found in entries (database.get_disc_plan_entries() rows).
+
+    Weighted by CD sectors when by_duration is set, otherwise by image bytes.
+    Missing sizes are read from the file system; missing durations come
+    from durations ({filepath: seconds}, see missing_durations()) or count
+    as zero.
+    """
+    durations = durations or {}
+    items = []
+    for order, filepath in enumerate(filepaths):
+        if filepath not in entries:
+            continue  # Only songs in the library can be planned
+        artist, album, size, duration = entries[filepath]
+        if by_duration:
+            if duration is None:
+                duration = durations.get(filepath)
+            weight = audio_cd.track_frames(duration)
+        else:
+            if size is None:
+                try:
+                    size = os.path.getsize(filepath)
+                except OSError:
+                    size = 0
+            weight = data_disc_weight(filepath, size)
+        items.append(PlanItem(filepath, weight, album or None, order, artist or None))
+    return items
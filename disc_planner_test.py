@@ -0,0 +1,83 @@
+import unittest
+import audio_cd
+import disc_planner
+from disc_planner import PlanItem
+
+
+def _items(*weights, album=None, artist=None, start=0):
+    return [PlanItem(f'/music/{start + order}.mp3', weight, album, start + order, artist)
+            for order, weight in enumerate(weights)]
+
+
+class PlanDiscsTest(unittest.TestCase):
+    def assertValidPlan(self, plan, items, capacity):
+        weights = {item.filepath: item.weight for item in items}
+        self.assertCountEqual([filepath for disc in plan for filepath in disc], weights)
+        for disc in plan:
+            self.assertLessEqual(sum(weights[filepath] for filepath in disc), capacity)
+
+    def test_best_fit_uses_fewest_discs(self):
+        items = _items(6, 5, 4, 3, 2)
+        plan = disc_planner.plan_discs(items, 10)
+        self.assertEqual(len(plan), 2)
+        self.assertValidPlan(plan, items, 10)
+
+    def test_tracks_keep_input_order(self):
+        items = _items(2, 9, 3, 8)
+        plan = disc_planner.plan_discs(items, 11)
+        self.assertEqual(plan, [['/music/0.mp3', '/music/1.mp3'], ['/music/2.mp3', '/music/3.mp3']])
+
+    def test_max_items_per_disc(self):
+        items = _items(*[1] * 10)
+        plan = disc_planner.plan_discs(items, 100, max_items=4)
+        self.assertEqual([len(disc) for disc in plan], [4, 4, 2])
+
+    def test_track_larger_than_a_disc(self):
+        with self.assertRaises(ValueError):
+            disc_planner.plan_discs(_items(5, 11), 10)
+
+    def test_keep_albums_together(self):
+        items = _items(6, 2, album='A', artist='X') + _items(4, 4, album='B', artist='X', start=2)
+        self.assertEqual(disc_planner.plan_discs(items, 10), [['/music/0.mp3', '/music/2.mp3'], ['/music/1.mp3', '/music/3.mp3']])
+        plan = disc_planner.plan_discs(items, 10, keep_albums=True)
+        self.assertEqual(plan, [['/music/0.mp3', '/music/1.mp3'], ['/music/2.mp3', '/music/3.mp3']])
+
+    def test_albums_are_told_apart_by_artist(self):
+        items = _items(3, 3, album='Greatest Hits', artist='X') + _items(3, 3, album='Greatest Hits', artist='Y', start=2)
+        units = disc_planner._units(items, 100, keep_albums=True)
+        self.assertEqual([len(unit) for unit in units], [2, 2])
+
+    def test_album_larger_than_a_disc_is_split(self):
+        items = _items(6, 6, 6, album='Long', artist='X')
+        plan = disc_planner.plan_discs(items, 10, keep_albums=True)
+        self.assertEqual(len(plan), 3)
+        self.assertValidPlan(plan, items, 10)
+
+    def test_many_tracks(self):
+        items = _items(*[(order * 7919) % 97 + 1 for order in range(5000)])
+        capacity = 700
+        plan = disc_planner.plan_discs(items, capacity)
+        self.assertValidPlan(plan, items, capacity)
+        lower_bound = -(-sum(item.weight for item in items) // capacity)
+        self.assertLessEqual(len(plan), lower_bound + 1)
+
+
+class PlanItemsTest(unittest.TestCase):
+    def test_weights_by_duration(self):
+        entries = {'/a.mp3': ('X', 'A', 1000, 60.0), '/b.mp3': ('X', 'A', 1000, None)}
+        filepaths = ['/a.mp3', '/b.mp3', '/not-in-library.mp3']
+        self.assertEqual(disc_planner.missing_durations(entries, filepaths), ['/b.mp3'])
+        items = disc_planner.plan_items(entries, filepaths, by_duration=True, durations={'/b.mp3': 2.0})
+        self.assertEqual([item.weight for item in items], [audio_cd.track_frames(60.0), audio_cd.track_frames(2.0)])
+        self.assertEqual([(item.artist, item.album) for item in items], [('X', 'A'), ('X', 'A')])
+
+    def test_weights_by_image_bytes(self):
+        entries = {'/a.mp3': ('', '', 1, None)}
+        item, = disc_planner.plan_items(entries, ['/a.mp3'])
+        self.assertEqual(item.weight, disc_planner.data_disc_weight('/a.mp3', 1))
+        self.assertGreaterEqual(item.weight, 2048)
+        self.assertIsNone(item.album)
+
+
+if __name__ == '__main__':
+    unittest.main()
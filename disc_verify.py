@@ -0,0 +1,241 @@
+import io
+import os
+import sys
+import mmap
+import time
+import queue
+import hashlib
+import threading
+from disc import SECTOR_SIZE, device_path
+
+# Bytes per device read and per chunk digest; a multiple of the sector and page size.
+VERIFY_CHUNK_SIZE = 1024 * 1024
+# Chunks read ahead of the hashing, so the drive never waits on the comparison.
+READ_AHEAD_CHUNKS = 8
+CHUNK_DIGEST_SIZE = 16
+SECTOR_DIGEST_SIZE = 8
+
+
+class VerifyError(Exception):
+    """The disc doesn't match the image it was burned from, or couldn't be read back.
+
+    mismatch is True only when the disc was read and its data differs from
+    the image, i.e. the burn itself went wrong.
+    """
+    def __init__(self, message, mismatch=False):
+        super().__init__(message)
+        self.mismatch = mismatch
+
+
+class ImageDigests:
+    """Digests of a disc image per VERIFY_CHUNK_SIZE chunk and per sector.
+
+    Fed with the image bytes in order as the image is produced (update())
+    or from a finished image file (from_file()). Chunk digests make the
+    comparison cheap; a mismatching chunk is pinned down to its sector by
+    comparing against the image file, or, for a streamed image that was
+    never stored, against per-sector digests.
+    """
+    def __init__(self, image_path=None):
+        self.image_path = image_path
+        self.chunk_digests = []
+        self.sector_digests = bytearray()
+        self.size = 0
+        self._pending = bytearray()
+
+    def update(self, data):
+        view = memoryview(data)
+        if self._pending:
+            needed = VERIFY_CHUNK_SIZE - len(self._pending)
+            self._pending += view[:needed]
+            view = view[needed:]
+            if len(self._pending) < VERIFY_CHUNK_SIZE:
+                return
+            self._add_chunk(self._pending)
+            self._pending = bytearray()
+        while len(view) >= VERIFY_CHUNK_SIZE:
+            self._add_chunk(view[:VERIFY_CHUNK_SIZE])
+            view = view[VERIFY_CHUNK_SIZE:]
+        if len(view):
+            self._pending += view
+
+    def finish(self):
+        if self._pending:
+            self._add_chunk(self._pending)
+            self._pending = bytearray()
+        return self
+
+    def _add_chunk(self, chunk):
+        self.chunk_digests.append(hashlib.blake2b(chunk, digest_size=CHUNK_DIGEST_SIZE).digest())
+        if self.image_path is None:
+            self.sector_digests += sector_digests(chunk)
+        self.size += len(chunk)
+
+    @classmethod
+    def from_file(cls, path):
+        """Digests of an image file, read through a memory map."""
+        digests = cls(path)
+        if os.path.getsize(path):
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+                view = memoryview(mapping)
+                try:
+                    for offset in range(0, len(view), VERIFY_CHUNK_SIZE):
+                        digests.update(view[offset:offset + VERIFY_CHUNK_SIZE])
+                finally:
+                    view.release()
+        return digests.finish()
+
+
+    def matches(self, offset, data):
+        """True if data is the image's chunk at offset."""
+        expected_length = min(VERIFY_CHUNK_SIZE, self.size - offset)
+        return len(data) == expected_length and \
+            hashlib.blake2b(data, digest_size=CHUNK_DIGEST_SIZE).digest() == self.chunk_digests[offset // VERIFY_CHUNK_SIZE]
+
+    def first_bad_sector(self, offset, data):
+        """The first sector (from the start of the image) where data differs from the image chunk at offset."""
+        first_sector = offset // SECTOR_SIZE
+        sectors = min(VERIFY_CHUNK_SIZE, self.size - offset) // SECTOR_SIZE
+        if self.image_path is not None:
+            with open(self.image_path, 'rb') as f:
+                f.seek(offset)
+                expected = f.read(sectors * SECTOR_SIZE)
+            for sector in range(sectors):
+                start = sector * SECTOR_SIZE
+                if data[start:start + SECTOR_SIZE] != expected[start:start + SECTOR_SIZE]:
+                    return first_sector + sector
+        else:
+            read = sector_digests(data)
+            expected = self.sector_digests[first_sector * SECTOR_DIGEST_SIZE:(first_sector + sectors) * SECTOR_DIGEST_SIZE]
+            for sector in range(sectors):
+                start = sector * SECTOR_DIGEST_SIZE
+                if read[start:start + SECTOR_DIGEST_SIZE] != expected[start:start + SECTOR_DIGEST_SIZE] or (sector + 1) * SECTOR_SIZE > len(data):
+                    return first_sector + sector
+        return first_sector + len(data) // SECTOR_SIZE
+
+
+def sector_digests(data):
+    view = memoryview(data)
+    return b''.join(hashlib.blake2b(view[offset:offset + SECTOR_SIZE], digest_size=SECTOR_DIGEST_SIZE).digest()
+                    for offset in range(0, len(view), SECTOR_SIZE))
+
+
+def _device_path(drive):
+    if sys.platform == 'win32':
+        return '\\\\.\\' + drive.rstrip('\\')
+    return device_path(drive)
+
+
+def _open_device(drive):
+    """Opens the drive for raw sequential reads, bypassing the page cache where the OS allows it.
+
+    A block device's cache can still hold what the disc looked like before
+    the burn, so direct reads are preferred. Returns (file, direct).
+    """
+    path = _device_path(drive)
+    if hasattr(os, 'O_DIRECT'):
+        try:
+            return io.FileIO(os.open(path, os.O_RDONLY | os.O_DIRECT), 'rb', closefd=True), True
+        except OSError:
+            pass
+    return io.FileIO(path, 'rb'), False
+
+
+class VerifyResult:
+    __slots__ = ('first_bad_sector', 'bytes_verified', 'elapsed', 'error')
+
+    def __init__(self, first_bad_sector=None, bytes_verified=0, elapsed=0.0, error=None):
+        self.first_bad_sector = first_bad_sector
+        self.bytes_verified = bytes_verified
+        self.elapsed = elapsed
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.first_bad_sector is None
+
+    @property
+    def speed(self):
+        """Average read speed in bytes per second."""
+        return self.bytes_verified / self.elapsed if self.elapsed > 0 else 0.0
+
+    def describe(self):
+        if self.ok:
+            return f"Disc verified: {self.bytes_verified / (1024 * 1024):.1f} MB match the image ({self.speed / (1024 * 1024):.1f} MB/s)."
+        reason = f" ({self.error})" if self.error else ""
+        return f"Disc does not match the image: first bad sector is {self.first_bad_sector}{reason}."
+
+
+def _read_ahead(device, size, free_buffers, filled, stop):
+    """Reads the device sequentially into pooled page-aligned buffers and queues (offset, view or error)."""
+    offset = 0
+    try:
+        while offset < size and not stop.is_set():
+            buffer = free_buffers.get()
+            length = min(VERIFY_CHUNK_SIZE, size - offset)
+            view = memoryview(buffer)[:length]
+            read = 0
+            while read < length:
+                count = device.readinto(view[read:])
+                if not count:
+                    break
+                read += count
+            filled.put((offset, buffer, view[:read]))
+            if read < length:
+                return  # End of the disc
+            offset += length
+    except OSError as e:
+        filled.put((offset, None, e))
+        return
+    finally:
+        filled.put(None)
+
+
+def verify_disc(drive, digests, progress=None, stop=None):
+    """Reads the first digests.size bytes of the disc in drive and compares them with the image digests.
+
+    Reading runs on its own thread READ_AHEAD_CHUNKS ahead of the
+    comparison, so the drive streams at its full read speed. progress is
+    called with (bytes verified, total bytes, seconds elapsed). Returns a
+    VerifyResult with the first mismatching or unreadable sector, if any.
+    """
+    stop = stop or threading.Event()
+    started = time.time()
+    device, _ = _open_device(drive)
+    free_buffers = queue.Queue()
+    for _ in range(READ_AHEAD_CHUNKS + 2):
+        free_buffers.put(mmap.mmap(-1, VERIFY_CHUNK_SIZE))  # Anonymous maps are page aligned, as O_DIRECT needs
+    filled = queue.Queue()
+    reader = threading.Thread(target=_read_ahead, args=(device, digests.size, free_buffers, filled, stop), name="VerifyReader", daemon=True)
+    reader.start()
+    verified = 0
+    result = None
+    try:
+        while result is None:
+            item = filled.get()
+            if item is None:
+                break
+            offset, buffer, data = item
+            if buffer is None:
+                result = VerifyResult(offset // SECTOR_SIZE, verified, error=str(data))
+            elif digests.matches(offset, data):
+                verified += len(data)
+                free_buffers.put(buffer)
+                if progress:
+                    progress(verified, digests.size, time.time() - started)
+            else:
+                sector = digests.first_bad_sector(offset, data)
+                ended = (sector + 1) * SECTOR_SIZE > offset + len(data)
+                result = VerifyResult(sector, sector * SECTOR_SIZE, error="disc ended early" if ended else None)
+        if result is None:
+            result = VerifyResult(None, verified)
+            if verified < digests.size:
+                result = VerifyResult(verified // SECTOR_SIZE, verified, error="disc ended early")
+    finally:
+        stop.set()
+        # Unblock the reader if it is waiting for a free buffer
+        free_buffers.put(mmap.mmap(-1, VERIFY_CHUNK_SIZE))
+        reader.join()
+        device.close()
+    result.elapsed = time.time() - started
+    return result
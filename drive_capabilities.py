@@ -0,0 +1,215 @@
+import re
+import sys
+import time
+import subprocess
+import config
+import database
+import drives
+from disc import device_path, read_atip
+
+# Seconds to wait for a wodim capability query.
+PROBE_TIMEOUT = 60
+# Age up to which ATIP output read when the media went in is trusted to still describe it.
+ATIP_MAX_AGE = 300
+# Burner output meaning the media itself was written badly, as opposed to e.g. a missing disc.
+_WRITE_ERROR = re.compile(r'write (?:failed|error)|medium error|buffer underrun|Input/output error|fixating failed', re.IGNORECASE)
+
+_INQUIRY = re.compile(r"^(Vendor_info|Identification|Revision)\s*:\s*'([^']*)'", re.MULTILINE)
+_ATIP_LEAD_IN = re.compile(r'ATIP start of lead in:\s*(-?\d+)')
+_ATIP_LEAD_OUT = re.compile(r'ATIP start of lead out:\s*(\d+)')
+_ATIP_SUB_TYPE = re.compile(r'Disk sub type:\s*(.+)')
+_ATIP_MANUFACTURER = re.compile(r'^Manufacturer:\s*(.+)', re.MULTILINE)
+_ATIP_SPEED_HIGH = re.compile(r'speed high:\s*(\d+)')
+_ATIP_ERASABLE = re.compile(r'Is erasable')
+# "Write speed # 0: 8467 kB/s CLV/PCAV (CD  48x, DVD  6x)"
+_WRITE_SPEED = re.compile(r'Write speed #\s*\d+:\s*\d+ kB/s.*?CD\s+(\d+)x')
+_MAX_WRITE_SPEED = re.compile(r'Maximum write speed:\s*\d+ kB/s.*?CD\s+(\d+)x')
+_BUFFER_SIZE = re.compile(r'Buffer size in KB:\s*(\d+)')
+_BURNFREE = re.compile(r'Does support Buffer-Underrun-Free recording|BURN-Free')
+_MODES = re.compile(r'Supported modes:\s*(.+)')
+
+
+class WritePlan:
+    """How one burn writes: speed (x, None for the drive's default), mode ('SAO'/'TAO', None for the default) and flags."""
+    __slots__ = ('speed', 'mode', 'burnfree', 'dummy', 'drive_id', 'media_id', 'reason')
+
+    def __init__(self, speed=None, mode=None, burnfree=False, dummy=False, drive_id=None, media_id=None, reason=''):
+        self.speed = speed
+        self.mode = mode
+        self.burnfree = burnfree
+        self.dummy = dummy
+        self.drive_id = drive_id
+        self.media_id = media_id
+        self.reason = reason
+
+    def wodim_args(self):
+        args = []
+        if self.speed:
+            args.append(f'speed={self.speed}')
+        if self.mode == 'SAO':
+            args.append('-dao')
+        elif self.mode == 'TAO':
+            args.append('-tao')
+        if self.burnfree:
+            args.append('driveropts=burnfree')
+        if self.dummy:
+            args.append('-dummy')
+        return args
+
+    def cdburn_args(self):
+        return ['-speed', str(self.speed)] if self.speed else []
+
+    def describe(self):
+        parts = [f"{self.speed}x" if self.speed else "default speed"]
+        if self.mode:
+            parts.append('DAO' if self.mode == 'SAO' else self.mode)
+        if self.burnfree:
+            parts.append('BURN-Free')
+        if self.dummy:
+            parts.append('test mode')
+        text = f"Writing at {', '.join(parts)}"
+        return f"{text} ({self.reason})." if self.reason else f"{text}."
+
+
+def _wodim(drive, option):
+    result = subprocess.run(['wodim', f'dev={device_path(drive)}', option], capture_output=True, text=True,
+                            timeout=PROBE_TIMEOUT)
+    return result.stdout + result.stderr
+
+
+def parse_identity(output):
+    """'Vendor Identification Revision' of the drive from wodim's inquiry lines, or None."""
+    fields = {key: value.strip() for key, value in _INQUIRY.findall(output)}
+    identity = ' '.join(fields[key] for key in ('Vendor_info', 'Identification', 'Revision') if fields.get(key))
+    return identity or None
+
+
+def parse_atip(output):
+    """(media_id, rated max speed or None, erasable) from wodim -atip output; media_id is None without ATIP."""
+    lead_out = _ATIP_LEAD_OUT.search(output)
+    if not lead_out:
+        return None, None, None
+    parts = [match.group(1).strip() if match else ''
+             for match in (_ATIP_MANUFACTURER.search(output), _ATIP_SUB_TYPE.search(output), _ATIP_LEAD_IN.search(output))]
+    speed_high = _ATIP_SPEED_HIGH.search(output)
+    media_id = '|'.join(parts + [lead_out.group(1)])
+    return media_id, int(speed_high.group(1)) if speed_high and int(speed_high.group(1)) else None, bool(_ATIP_ERASABLE.search(output))
+
+
+def parse_capabilities(prcap_output, checkdrive_output=''):
+    """{write_speeds, modes, buffer_kb, burnfree} from wodim -prcap (and -checkdrive for the write modes)."""
+    speeds = sorted({int(speed) for speed in _WRITE_SPEED.findall(prcap_output)}, reverse=True)
+    if not speeds:
+        maximum = _MAX_WRITE_SPEED.search(prcap_output)
+        speeds = [int(maximum.group(1))] if maximum else []
+    modes = _MODES.search(checkdrive_output) or _MODES.search(prcap_output)
+    buffer_kb = _BUFFER_SIZE.search(prcap_output)
+    return {
+        'write_speeds': speeds,
+        'modes': modes.group(1).split() if modes else [],
+        'buffer_kb': int(buffer_kb.group(1)) if buffer_kb else None,
+        'burnfree': bool(_BURNFREE.search(prcap_output + checkdrive_output)),
+    }
+
+
+def drive_unit_id(drive, identity=None):
+    """Identifies one physical drive: its model plus its serial number, or its device path where that isn't known."""
+    unit = drives.drive_serial(drive) or device_path(drive)
+    return f"{identity} #{unit}" if identity else unit
+
+
+def probe(drive):
+    """Returns the capabilities of drive with the media in it, probing only what isn't cached yet.
+
+    The drive and the media are identified from ATIP output, reused from
+    the media capacity query when that ran in the last ATIP_MAX_AGE
+    seconds. The slower capability queries run once per drive unit and
+    media ID and are kept in the database, along with the burn results.
+    Media without ATIP can't be told apart, so those results aren't cached
+    (and record_result() ignores burns on them). Returns a dict (see
+    database.get_drive_capabilities()) or None if the drive can't be queried.
+    """
+    atip = read_atip(drive, ATIP_MAX_AGE)
+    drive_id = drive_unit_id(drive, parse_identity(atip))
+    media_id, media_speed, erasable = parse_atip(atip)
+    if media_id is not None:
+        cached = database.get_drive_capabilities(drive_id, media_id)
+        if cached is not None:
+            return cached
+    capabilities = parse_capabilities(_wodim(drive, '-prcap'), _wodim(drive, '-checkdrive'))
+    capabilities.update(drive_id=drive_id, media_id=media_id, media_speed=media_speed, erasable=erasable, probed_at=time.time())
+    if media_id is None:
+        print(f"[DriveCapabilities] Probed {drive_id} with unidentified media: {capabilities}")
+        return dict(capabilities, validated_speed=None, failed_speed=None)
+    database.save_drive_capabilities(capabilities)
+    print(f"[DriveCapabilities] Probed {drive_id} with media {media_id}: {capabilities}")
+    return database.get_drive_capabilities(drive_id, media_id)
+
+
+def _speed_cap():
+    setting = config.get_setting('BURN_SETTINGS', 'speed', 'Max')
+    match = re.match(r'(\d+)', setting or '')
+    return int(match.group(1)) if match else None
+
+
+def choose_speed(capabilities, cap=None):
+    """(speed, reason): the fastest supported speed within the media rating and cap that hasn't failed on this media."""
+    speeds = capabilities['write_speeds']
+    candidates = [speed for speed in speeds if not cap or speed <= cap]
+    if not candidates:
+        # No probed speeds, or all above the cap: the drive rounds the cap to a speed it supports
+        return cap, "speed from settings" if cap else "drive default"
+    # Fall back to the slowest speed within the cap where nothing is slow enough
+    if capabilities.get('media_speed'):
+        candidates = [speed for speed in candidates if speed <= capabilities['media_speed']] or candidates[-1:]
+    failed = capabilities.get('failed_speed')
+    if failed:
+        candidates = [speed for speed in candidates if speed < failed] or candidates[-1:]
+    speed = max(candidates)
+    validated = capabilities.get('validated_speed')
+    if validated and speed <= validated:
+        reason = "validated on this media"
+    elif failed and speed >= failed:
+        reason = f"slowest allowed speed; {failed:g}x failed on this media"
+    elif failed:
+        reason = f"below {failed:g}x, which failed on this media"
+    else:
+        reason = "fastest supported for this media"
+    return speed, reason
+
+
+def plan_burn(drive, audio=False):
+    """Picks the speed, write mode and flags for burning to drive, from its probed capabilities and the burn settings."""
+    cap = _speed_cap()
+    burn_proof = config.get_setting('BURN_SETTINGS', 'burn_proof', 'true').lower() == 'true'
+    dummy = config.get_setting('BURN_SETTINGS', 'test_mode', 'false').lower() == 'true'
+    if not sys.platform.startswith('linux'):
+        return WritePlan(cap, dummy=dummy, reason="speed from settings" if cap else "")
+    try:
+        capabilities = probe(drive)
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"[DriveCapabilities] Could not probe {drive}: {e}")
+        capabilities = None
+    if capabilities is None:
+        return WritePlan(cap, 'SAO' if audio else None, dummy=dummy, reason="drive capabilities unknown")
+    speed, reason = choose_speed(capabilities, cap)
+    modes = capabilities['modes']
+    # Disc-at-once writes no run-out blocks between tracks and no gaps between audio tracks
+    mode = 'SAO' if 'SAO' in modes or (audio and not modes) else ('TAO' if 'TAO' in modes else None)
+    return WritePlan(speed, mode, burn_proof and capabilities['burnfree'], dummy,
+                     capabilities['drive_id'], capabilities['media_id'], reason)
+
+
+def is_write_error(message):
+    """True if burner output shows the media was written badly (so the speed shouldn't be used again)."""
+    return bool(message and _WRITE_ERROR.search(message))
+
+
+def record_result(plan, success):
+    """Remembers a real burn's outcome at plan.speed, so later burns on the same media keep to speeds that worked."""
+    if plan is None or plan.dummy or not plan.speed or not plan.drive_id or not plan.media_id:
+        return
+    try:
+        database.record_drive_burn(plan.drive_id, plan.media_id, plan.speed, success)
+    except Exception as e:
+        print(f"[DriveCapabilities] Could not record burn result: {e}")
@@ -0,0 +1,187 @@
+import os
+import sys
+import glob
+import ctypes
+import threading
+import subprocess
+
+SYS_BLOCK = '/sys/block'
+# udev's database: one file per device ("b<major>:<minor>") with E:KEY=VALUE property lines
+UDEV_DATA = '/run/udev/data'
+# udev (cdrom_id) properties marking rewritable media
+REWRITABLE_MEDIA_KEYS = ('ID_CDROM_MEDIA_CD_RW', 'ID_CDROM_MEDIA_DVD_RW', 'ID_CDROM_MEDIA_DVD_RW_RO',
+                         'ID_CDROM_MEDIA_DVD_RW_SEQ', 'ID_CDROM_MEDIA_DVD_PLUS_RW', 'ID_CDROM_MEDIA_DVD_PLUS_RW_DL',
+                         'ID_CDROM_MEDIA_DVD_RAM', 'ID_CDROM_MEDIA_BD_RE')
+# Seconds the WMI query may take before the previous result is kept
+WMI_TIMEOUT = 30
+DRIVE_CDROM = 5
+
+_lock = threading.Lock()
+_cached = None
+
+
+class DriveInfo:
+    """One optical drive and what is known about the media in it (None where unknown)."""
+    __slots__ = ('name', 'vendor', 'model', 'media', 'media_state', 'rewritable', 'capacity_bytes', 'label')
+
+    def __init__(self, name, vendor=None, model=None, media=None, media_state=None, rewritable=None, capacity_bytes=None, label=None):
+        self.name = name
+        self.vendor = vendor
+        self.model = model
+        self.media = media
+        self.media_state = media_state
+        self.rewritable = rewritable
+        self.capacity_bytes = capacity_bytes
+        self.label = label
+
+    def _key(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __eq__(self, other):
+        return isinstance(other, DriveInfo) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"DriveInfo({', '.join(f'{slot}={getattr(self, slot)!r}' for slot in self.__slots__)})"
+
+    @property
+    def description(self):
+        product = ' '.join(part for part in (self.vendor, self.model) if part)
+        return f"{self.name} ({product})" if product else self.name
+
+    @property
+    def finalized(self):
+        return None if self.media_state is None else self.media_state == 'complete'
+
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _udev_properties(name):
+    """The udev database properties of /dev/<name>, or {} if udev hasn't recorded any."""
+    device_number = _read(os.path.join(SYS_BLOCK, name, 'dev'))
+    properties = {}
+    if device_number:
+        try:
+            with open(os.path.join(UDEV_DATA, f'b{device_number}'), encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    if line.startswith('E:') and '=' in line:
+                        key, value = line[2:].rstrip('\n').split('=', 1)
+                        properties[key] = value
+        except OSError:
+            pass
+    return properties
+
+
+def drive_serial(name):
+    """The serial number udev recorded for drive name (e.g. 'sr0'), or None if it isn't known."""
+    if not sys.platform.startswith('linux'):
+        return None
+    properties = _udev_properties(os.path.basename(name))
+    return properties.get('ID_SERIAL_SHORT') or properties.get('ID_SERIAL') or None
+
+
+def _linux_drives():
+    drives = []
+    for path in sorted(glob.glob(os.path.join(SYS_BLOCK, 'sr*')), key=lambda p: (len(p), p)):
+        name = os.path.basename(path)
+        size = _read(os.path.join(path, 'size'))
+        sectors = int(size) if size and size.isdigit() else 0
+        properties = _udev_properties(name)
+        if 'ID_CDROM' in properties:
+            media = properties.get('ID_CDROM_MEDIA') == '1'
+            media_state = properties.get('ID_CDROM_MEDIA_STATE') if media else None
+            rewritable = any(key in properties for key in REWRITABLE_MEDIA_KEYS) if media else None
+        else:
+            # No udev data: the kernel only knows the size of readable (written) media
+            media, media_state, rewritable = (True if sectors else None), None, None
+        drives.append(DriveInfo(name, _read(os.path.join(path, 'device', 'vendor')) or None,
+                                _read(os.path.join(path, 'device', 'model')) or None,
+                                media, media_state, rewritable, sectors * 512 or None, properties.get('ID_FS_LABEL')))
+    return drives
+
+
+_WMI_QUERY = ("Get-WmiObject Win32_LogicalDisk | Where-Object { $_.DriveType -eq 5 } | "
+              "ForEach-Object { \"$($_.DeviceID)|$($_.Size)|$($_.VolumeName)\" }")
+
+
+def _windows_drives():
+    # Win32_LogicalDisk DriveType 5 is an optical drive. Size is only set for
+    # readable media, so an empty drive and a blank disc both leave media unknown.
+    result = subprocess.run(["powershell", "-NoProfile", "-Command", _WMI_QUERY], capture_output=True, text=True,
+                            timeout=WMI_TIMEOUT, creationflags=subprocess.CREATE_NO_WINDOW)
+    drives = []
+    for line in result.stdout.splitlines():
+        device_id, _, rest = line.strip().partition('|')
+        if not device_id:
+            continue
+        size, _, volume = rest.partition('|')
+        media = True if size.strip() else None
+        drives.append(DriveInfo(device_id, media=media, media_state='complete' if media else None,
+                                capacity_bytes=int(size) if size.strip().isdigit() else None, label=volume.strip() or None))
+    return drives
+
+
+def list_drives():
+    """Enumerates the optical drives and caches the result (see cached_drives()).
+
+    Reads sysfs and the udev database on Linux, so it is cheap there; on
+    Windows it runs a WMI query through PowerShell, which takes a second or
+    more, so call it from a worker thread.
+    """
+    global _cached
+    try:
+        if sys.platform.startswith('linux'):
+            drives = _linux_drives()
+        elif sys.platform == 'win32':
+            drives = _windows_drives()
+        else:
+            drives = []
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"[Drives] Could not list drives: {e}")
+        with _lock:
+            return list(_cached or [])
+    with _lock:
+        _cached = drives
+    return list(drives)
+
+
+def cached_drives():
+    """The drives found by the last list_drives() call, or None before the first one."""
+    with _lock:
+        return list(_cached) if _cached is not None else None
+
+
+def windows_signature():
+    """Cheap fingerprint of the optical drives and their media on Windows; no subprocess involved.
+
+    Changes when a drive letter appears or disappears (GetLogicalDrives) or
+    when the volume serial of the media in a drive changes (a disc is
+    inserted, ejected or swapped).
+    """
+    kernel32 = ctypes.windll.kernel32
+    # Don't let an empty drive pop up "There is no disk in the drive"
+    previous_mode = kernel32.SetErrorMode(0x0001)
+    try:
+        mask = kernel32.GetLogicalDrives()
+        signature = []
+        for index in range(26):
+            if not mask & (1 << index):
+                continue
+            root = f"{chr(ord('A') + index)}:\\"
+            if kernel32.GetDriveTypeW(root) != DRIVE_CDROM:
+                continue
+            serial = ctypes.c_ulong(0)
+            has_media = kernel32.GetVolumeInformationW(root, None, 0, ctypes.byref(serial), None, None, None, 0)
+            signature.append((root, serial.value if has_media else None))
+        return tuple(signature)
+    finally:
+        kernel32.SetErrorMode(previous_mode)
+
@@ -0,0 +1,109 @@
+import os
+import json
+import uuid
+import hashlib
+import config
+
+IMAGE_SUFFIX = '.iso'
+PARTIAL_SUFFIX = '.part'
+DEFAULT_CACHE_DIR = 'image_cache'
+DEFAULT_MAX_SIZE_MB = 4096
+
+
+def image_key(file_list, options):
+    """Digest identifying a disc image: the ordered files with their sizes and mtimes, plus filesystem options.
+
+    Raises OSError if a file can't be stat'ed.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps(options, sort_keys=True).encode())
+    for filepath in file_list:
+        stat_result = os.stat(filepath)
+        digest.update(json.dumps([os.path.abspath(filepath), stat_result.st_size, stat_result.st_mtime_ns]).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ImageCache:
+    """Finished disc images kept on disk by image_key(), evicted least recently used first.
+
+    Settings come from the IMAGE_CACHE config section: directory,
+    max_size_mb (0 disables the cache) and cache_streamed (whether a
+    streamed burn also writes its image to the cache; off by default, as
+    streaming exists to avoid the scratch-disk writes). Images are written under a unique
+    partial name and renamed into place once complete, so readers never
+    see a half-written image.
+    """
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or config.get_setting('IMAGE_CACHE', 'directory', DEFAULT_CACHE_DIR)
+        if max_bytes is None:
+            try:
+                max_bytes = int(float(config.get_setting('IMAGE_CACHE', 'max_size_mb', str(DEFAULT_MAX_SIZE_MB))) * 1024 * 1024)
+            except ValueError:
+                max_bytes = DEFAULT_MAX_SIZE_MB * 1024 * 1024
+        self.max_bytes = max_bytes
+        self.cache_streamed = config.get_setting('IMAGE_CACHE', 'cache_streamed', 'false').lower() == 'true'
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def fits(self, size):
+        """True if an image of size bytes may be cached; one larger than the whole cache never is."""
+        return self.enabled and size <= self.max_bytes
+
+    def _image_path(self, key):
+        return os.path.join(self.directory, key + IMAGE_SUFFIX)
+
+    def lookup(self, key):
+        """Returns the path of the cached image for key, marking it recently used, or None."""
+        if not self.enabled:
+            return None
+        path = self._image_path(key)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def partial_path(self, key):
+        """Returns a fresh path to write a new image for key to; pass it to commit() or discard()."""
+        os.makedirs(self.directory, exist_ok=True)
+        return os.path.join(self.directory, f"{key}.{uuid.uuid4().hex}{PARTIAL_SUFFIX}")
+
+    def commit(self, key, partial_path):
+        """Moves a completed image into the cache and evicts old images over the size cap. Returns its path."""
+        path = self._image_path(key)
+        os.replace(partial_path, path)
+        self.evict(keep=path)
+        return path
+
+    def discard(self, partial_path):
+        try:
+            os.remove(partial_path)
+        except OSError:
+            pass
+
+    def evict(self, keep=None):
+        """Deletes least recently used images until the cache fits in max_bytes."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as scanned:
+                for entry in scanned:
+                    if entry.name.endswith(IMAGE_SUFFIX) and entry.is_file():
+                        stat_result = entry.stat()
+                        entries.append((stat_result.st_mtime_ns, stat_result.st_size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+                print(f"[ImageCache] Evicted {os.path.basename(path)}")
+            except OSError as e:
+                print(f"[ImageCache] Could not evict {path}: {e}")
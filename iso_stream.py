@@ -0,0 +1,159 @@
+import os
+import queue
+import threading
+from disc import SECTOR_SIZE
+
+# pycdlib copies file data in chunks of this size; it is also the unit of the stream buffer.
+STREAM_CHUNK_SIZE = 1024 * 1024
+# Chunks buffered between the image builder and the burner. The builder
+# blocks when the buffer is full, so memory use stays bounded.
+STREAM_BUFFER_CHUNKS = 64
+# Chunks gathered before the burner is started, so it starts with a full buffer.
+PREFILL_CHUNKS = 32
+
+
+def joliet_sort_key(joliet_path):
+    """Orders paths the way pycdlib orders Joliet directory records (and so assigns file extents)."""
+    return joliet_path.encode('utf-16-be')
+
+
+def plan_stream(iso, joliet_paths):
+    """Returns the size of the image head (everything before the first file's data), or None.
+
+    pycdlib seeks back and forth while writing the filesystem metadata, but
+    writes file data in one forward pass as long as the files were added in
+    extent order. The head is buffered in memory and everything after it is
+    streamed, so None is returned when the files are not in extent order.
+    joliet_paths must be in the order the files were added.
+    """
+    iso.force_consistency()
+    extents = []
+    for joliet_path in joliet_paths:
+        record = iso.get_record(joliet_path=joliet_path)
+        if record.get_data_length() > 0:
+            extents.append(record.extent_location())
+    if not extents or any(later <= earlier for earlier, later in zip(extents, extents[1:])):
+        return None
+    return extents[0] * SECTOR_SIZE
+
+
+class ImageStream:
+    """Writes a pycdlib image into a bounded queue of chunks instead of a file.
+
+    Acts as the seekable file object pycdlib writes to: writes inside the
+    head are kept in memory until the first file data arrives, after which
+    data must arrive in order (forward gaps are zero-filled). start() runs
+    pycdlib on a background thread; the consumer iterates chunks().
+    """
+    def __init__(self, iso, head_size):
+        self._iso = iso
+        self.head_size = head_size
+        self.total_size = None
+        self.error = None
+        self._head = bytearray(head_size)
+        self._head_sent = False
+        self._position = 0
+        self._end = 0
+        self._streamed = head_size
+        self._queue = queue.Queue(maxsize=STREAM_BUFFER_CHUNKS)
+        self._aborted = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._produce, name="ImageStream", daemon=True)
+        self._thread.start()
+
+    def _produce(self):
+        def on_progress(done, total):
+            # The first call, before anything is written, carries the image size
+            self.total_size = total
+        try:
+            self._iso.write_fp(self, blocksize=STREAM_CHUNK_SIZE, progress_cb=on_progress)
+            self._finish()
+        except Exception as e:
+            self.error = e
+        finally:
+            self._put(None)
+
+    def chunks(self):
+        """Yields image chunks in order; raises the image builder's error, if any, at the end."""
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                break
+            yield chunk
+        if self.error is not None:
+            raise self.error
+
+    def abort(self):
+        """Stops the image builder, e.g. because the burner went away."""
+        self._aborted.set()
+        try:
+            while True:
+                self._queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _put(self, chunk):
+        while not self._aborted.is_set():
+            try:
+                self._queue.put(chunk, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+        if chunk is not None:
+            raise BrokenPipeError("image stream was aborted")
+
+    def _send_head(self):
+        if not self._head_sent:
+            self._head_sent = True
+            self._put(bytes(self._head))
+
+    def _send_zeros(self, count):
+        while count > 0:
+            size = min(count, STREAM_CHUNK_SIZE)
+            self._put(bytes(size))
+            count -= size
+
+    def _finish(self):
+        self._send_head()
+        if self.total_size is not None and self._streamed < self.total_size:
+            self._send_zeros(self.total_size - self._streamed)
+            self._streamed = self.total_size
+
+    # --- File object interface used by pycdlib ---
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_SET:
+            self._position = offset
+        elif whence == os.SEEK_CUR:
+            self._position += offset
+        else:
+            self._position = self._end + offset
+        return self._position
+
+    def write(self, data):
+        length = len(data)
+        view = memoryview(data)
+        if self._position < self.head_size:
+            if self._head_sent:
+                raise OSError(f"image write at {self._position} after the head was streamed")
+            count = min(length, self.head_size - self._position)
+            self._head[self._position:self._position + count] = view[:count]
+            self._position += count
+            view = view[count:]
+        if len(view):
+            self._send_head()
+            if self._position < self._streamed:
+                raise OSError(f"image write at {self._position} is behind the stream at {self._streamed}")
+            self._send_zeros(self._position - self._streamed)
+            self._put(bytes(view))
+            self._position += len(view)
+            self._streamed = self._position
+        self._end = max(self._end, self._position)
+        return length
@@ -0,0 +1,100 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import pycdlib
+import iso_stream
+from disc import SECTOR_SIZE
+from disc_verify import ImageDigests
+
+
+class StreamTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Sizes around sector and stream chunk boundaries, and an empty file
+        sizes = {'b.mp3': 3 * iso_stream.STREAM_CHUNK_SIZE + 5, 'a.mp3': SECTOR_SIZE, 'empty.mp3': 0,
+                 'c.flac': 12345, 'Zz.ogg': iso_stream.STREAM_CHUNK_SIZE}
+        self.filepaths = []
+        for name, size in sizes.items():
+            path = os.path.join(self.directory, name)
+            with open(path, 'wb') as f:
+                f.write(os.urandom(size))
+            self.filepaths.append(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def build(self, in_extent_order=True):
+        """Lays out an image the way BurnWorker does, optionally adding the files in reverse order."""
+        iso = pycdlib.PyCdlib()
+        iso.new(joliet=True)
+        entries = sorted(((f'/{os.path.basename(path).upper()}', path) for path in self.filepaths),
+                         key=lambda entry: iso_stream.joliet_sort_key(entry[0]), reverse=not in_extent_order)
+        for joliet_path, path in entries:
+            iso.add_file(path, joliet_path=joliet_path)
+        return iso, [joliet_path for joliet_path, _ in entries]
+
+    def written_image(self):
+        iso, _ = self.build()
+        image = io.BytesIO()
+        iso.write_fp(image)
+        iso.close()
+        return image.getvalue()
+
+    def test_head_ends_at_first_file(self):
+        iso, joliet_paths = self.build()
+        head_size = iso_stream.plan_stream(iso, joliet_paths)
+        first = min(iso.get_record(joliet_path=path).extent_location() for path in joliet_paths
+                    if iso.get_record(joliet_path=path).get_data_length())
+        self.assertEqual(head_size, first * SECTOR_SIZE)
+        iso.close()
+
+    def test_files_out_of_extent_order(self):
+        iso, joliet_paths = self.build(in_extent_order=False)
+        self.assertIsNone(iso_stream.plan_stream(iso, joliet_paths))
+        iso.close()
+
+    def test_stream_matches_written_image(self):
+        expected = self.written_image()
+        iso, joliet_paths = self.build()
+        stream = iso_stream.ImageStream(iso, iso_stream.plan_stream(iso, joliet_paths))
+        stream.start()
+        chunks = list(stream.chunks())
+        iso.close()
+        self.assertEqual(stream.total_size, len(expected))
+        self.assertEqual(b''.join(chunks), expected)
+
+    def test_stream_digests_match_image_file(self):
+        expected = self.written_image()
+        image_path = os.path.join(self.directory, 'image.iso')
+        with open(image_path, 'wb') as f:
+            f.write(expected)
+        iso, joliet_paths = self.build()
+        stream = iso_stream.ImageStream(iso, iso_stream.plan_stream(iso, joliet_paths))
+        stream.start()
+        digests = ImageDigests()
+        for chunk in stream.chunks():
+            digests.update(chunk)
+        digests.finish()
+        iso.close()
+        from_file = ImageDigests.from_file(image_path)
+        self.assertEqual((digests.size, digests.chunk_digests), (from_file.size, from_file.chunk_digests))
+
+    def test_abort_stops_the_builder(self):
+        iso, joliet_paths = self.build()
+        # A one-chunk buffer, so the builder is blocked on the consumer when it aborts
+        with mock.patch.object(iso_stream, 'STREAM_BUFFER_CHUNKS', 1):
+            stream = iso_stream.ImageStream(iso, iso_stream.plan_stream(iso, joliet_paths))
+        stream.start()
+        next(stream.chunks())
+        stream.abort()
+        stream._thread.join(timeout=10)
+        self.assertFalse(stream._thread.is_alive())
+        self.assertIsInstance(stream.error, BrokenPipeError)
+        iso.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
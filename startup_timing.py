@@ -0,0 +1,59 @@
+import time
+import datetime
+
+# One line per launch is appended here, so startup regressions show up over time.
+LOG_FILE = 'startup_timing.log'
+
+# Imported first by AlphaBurn.py, so this is as close to launch as Python gets.
+_started = time.perf_counter()
+_last = _started
+_phases = []
+
+
+def mark(phase):
+    """Ends a startup phase: records the time since the previous mark under phase."""
+    global _last
+    now = time.perf_counter()
+    _phases.append((phase, now - _last))
+    _last = now
+
+
+def phases():
+    """[(phase, seconds)] in the order they were marked."""
+    return list(_phases)
+
+
+def report():
+    """Prints the phase breakdown and appends it to LOG_FILE. Returns the printed text."""
+    total = _last - _started
+    lines = [f"[Startup] {phase:<16} {seconds * 1000:8.1f} ms" for phase, seconds in _phases]
+    lines.append(f"[Startup] {'total':<16} {total * 1000:8.1f} ms")
+    text = '\n'.join(lines)
+    print(text)
+    entry = ' '.join(f"{phase.replace(' ', '_')}={seconds * 1000:.0f}ms" for phase, seconds in _phases)
+    try:
+        with open(LOG_FILE, 'a', encoding='utf-8') as log:
+            log.write(f"{datetime.datetime.now().isoformat(timespec='seconds')} total={total * 1000:.0f}ms {entry}\n")
+    except OSError as e:
+        print(f"[Startup] Could not write {LOG_FILE}: {e}")
+    return text
+
+
+def watch_first_paint(app, window, on_painted):
+    """Marks 'first paint' once window first paints, then calls on_painted()."""
+    # Qt is imported here so the Qt import itself is timed as a startup phase
+    from PyQt6.QtCore import QObject, QEvent, QTimer
+
+    class FirstPaintFilter(QObject):
+        def eventFilter(self, watched, event):
+            if event.type() == QEvent.Type.Paint and watched.isWidgetType() and watched.window() is window:
+                app.removeEventFilter(self)
+                # Runs once the event loop is idle again, i.e. after the window has finished painting
+                QTimer.singleShot(0, painted)
+            return False
+
+    def painted():
+        mark('first paint')
+        on_painted()
+
+    app.installEventFilter(FirstPaintFilter(window))
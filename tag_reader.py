@@ -0,0 +1,266 @@
+import os
+import struct
+import hashlib
+import mutagen
+from mutagen.id3 import ID3, ID3NoHeaderError, ParseID3v1
+
+# Easy-tag keys to try for each library field, covering formats (like ASF/WMA)
+# that have no mutagen "easy" interface.
+TAG_KEYS = {
+    'title': ('title', 'Title'),
+    'artist': ('artist', 'Author', 'WM/AlbumArtist'),
+    'album': ('album', 'WM/AlbumTitle'),
+    'year': ('date', 'WM/Year'),
+    'genre': ('genre', 'WM/Genre'),
+}
+# ID3 frames read by the fast MP3 path, matching mutagen's EasyID3 mapping.
+ID3_FRAMES = {'title': 'TIT2', 'artist': 'TPE1', 'album': 'TALB', 'year': 'TDRC', 'genre': 'TCON'}
+
+# Technical fields stored alongside the tags so nothing has to reopen the file later.
+AUDIO_INFO_KEYS = ('duration', 'bitrate', 'sample_rate')
+
+# Read size used when hashing the audio payload.
+HASH_CHUNK_SIZE = 1024 * 1024
+# Trailing bytes examined for ID3v1 and APEv2 tags.
+TRAILER_SIZE = 128 + 32
+
+# How far past the ID3 tag to look for the first MPEG frame.
+MPEG_SYNC_WINDOW = 64 * 1024
+
+# MPEG audio header tables, indexed by [version][layer][bitrate index] in kbps.
+# version: 0 = MPEG-1, 1 = MPEG-2/2.5; layer: 0 = Layer I, 1 = Layer II, 2 = Layer III
+MPEG_BITRATES = (
+    ((0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+     (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+     (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)),
+    ((0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+     (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+     (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)),
+)
+MPEG_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def id3v2_size(header):
+    """Returns the total size of an ID3v2 tag from its 10-byte header, or 0 if there isn't one."""
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0
+    size = 0
+    for byte in header[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    footer = 10 if header[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def parse_mpeg_header(data, offset):
+    """Decodes the 4-byte MPEG audio frame header at offset. Returns a dict or None if it isn't one."""
+    if offset + 4 > len(data):
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    if data[offset] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+    version_bits = (b1 >> 3) & 0x3
+    layer_bits = (b1 >> 1) & 0x3
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 0x3
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    version = 0 if version_bits == 3 else 1
+    layer = 3 - layer_bits
+    bitrate = MPEG_BITRATES[version][layer][bitrate_index] * 1000
+    sample_rate = MPEG_SAMPLE_RATES[version_bits][rate_index]
+    padding = (b2 >> 1) & 0x1
+    mono = (b3 >> 6) == 3
+    if layer == 0:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 576 if layer == 2 and version == 1 else 1152
+        length = samples // 8 * bitrate // sample_rate + padding
+    if layer == 2:
+        side_info = (17 if mono else 32) if version == 0 else (9 if mono else 17)
+    else:
+        side_info = 32 if version == 0 else 17
+    return {'bitrate': bitrate, 'sample_rate': sample_rate, 'samples': samples,
+            'length': length, 'side_info': side_info}
+
+
+def _mp3_stream_info(f, audio_start, file_size):
+    """Reads duration/bitrate/sample rate from the first MPEG frame (and its Xing/VBRI header)."""
+    f.seek(audio_start)
+    data = f.read(MPEG_SYNC_WINDOW)
+    offset = data.find(b'\xFF')
+    while offset != -1:
+        header = parse_mpeg_header(data, offset)
+        # Require the following frame to sync too, so stray 0xFF bytes aren't mistaken for a frame
+        if header and (offset + header['length'] + 4 > len(data) or parse_mpeg_header(data, offset + header['length'])):
+            break
+        offset = data.find(b'\xFF', offset + 1)
+    if offset == -1:
+        raise ValueError("can't sync to MPEG frame")
+
+    id3v1 = 0
+    if file_size >= 128:
+        f.seek(-128, os.SEEK_END)
+        id3v1 = 128 if f.read(3) == b'TAG' else 0
+    audio_bytes = file_size - audio_start - offset - id3v1
+
+    frames = None
+    xing = offset + 4 + header['side_info']
+    if data[xing:xing + 4] in (b'Xing', b'Info') and len(data) >= xing + 12:
+        flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        if flags & 0x1:
+            frames = struct.unpack('>I', data[xing + 8:xing + 12])[0]
+    elif data[offset + 36:offset + 40] == b'VBRI' and len(data) >= offset + 54:
+        frames = struct.unpack('>I', data[offset + 50:offset + 54])[0]
+
+    if frames:
+        duration = frames * header['samples'] / header['sample_rate']
+        bitrate = int(audio_bytes * 8 / duration) if duration else header['bitrate']
+    else:
+        bitrate = header['bitrate']
+        duration = audio_bytes * 8 / bitrate
+    return {'duration': duration, 'bitrate': bitrate, 'sample_rate': header['sample_rate']}
+
+
+def _frame_text(frame):
+    """First value of a text frame as EasyID3 gives it (genre numbers as names), or '' if there's none."""
+    if frame is None:
+        return ''
+    values = frame.genres if frame.FrameID == 'TCON' else frame.text
+    return str(values[0]) if values else ''
+
+
+def _read_id3v1(f, file_size):
+    """Returns the frames of the 128-byte ID3v1 'TAG' trailer, or {} if there isn't one."""
+    if file_size < 128:
+        return {}
+    f.seek(-128, os.SEEK_END)
+    return ParseID3v1(f.read(128)) or {}
+
+
+def _read_mp3_fast(f, file_size):
+    """Reads an MP3's tags and stream info touching only the ID3 tags and the first frames."""
+    audio_start = id3v2_size(f.read(10))
+    metadata = dict.fromkeys(ID3_FRAMES, '')
+    if audio_start:
+        f.seek(0)
+        try:
+            tags = ID3(f)
+            for field, frame_id in ID3_FRAMES.items():
+                metadata[field] = _frame_text(tags.get(frame_id))
+        except ID3NoHeaderError:
+            pass
+    if not all(metadata.values()):
+        # ID3v1-only files, and ID3v2 tags lacking fields the trailer has
+        frames = _read_id3v1(f, file_size)
+        for field, frame_id in ID3_FRAMES.items():
+            metadata[field] = metadata[field] or _frame_text(frames.get(frame_id))
+    metadata.update(_mp3_stream_info(f, audio_start, file_size))
+    return metadata
+
+
+def _read_with_mutagen(f):
+    audio = mutagen.File(f, easy=True)
+    if audio is None:
+        raise ValueError("unsupported or unreadable audio file")
+    tags = audio.tags or {}
+    metadata = {}
+    for field, keys in TAG_KEYS.items():
+        metadata[field] = ''
+        for key in keys:
+            values = tags.get(key)
+            if values:
+                metadata[field] = str(values[0])
+                break
+    info = audio.info
+    metadata['duration'] = getattr(info, 'length', None)
+    metadata['bitrate'] = getattr(info, 'bitrate', None) or None
+    metadata['sample_rate'] = getattr(info, 'sample_rate', None)
+    return metadata
+
+
+def payload_range(f, file_size):
+    """Returns the (start, end) byte range of the audio payload, leaving out tags.
+
+    Skips a leading ID3v2 tag (where embedded artwork lives), FLAC metadata
+    blocks, and trailing APEv2 and ID3v1 tags. Formats that keep tags
+    elsewhere are hashed whole.
+    """
+    f.seek(0)
+    start = id3v2_size(f.read(10))
+    f.seek(start)
+    if f.read(4) == b'fLaC':
+        position = start + 4
+        while True:
+            f.seek(position)
+            header = f.read(4)
+            if len(header) < 4:
+                break
+            position += 4 + int.from_bytes(header[1:], 'big')
+            if header[0] & 0x80:
+                break
+        start = min(position, file_size)
+
+    end = file_size
+    f.seek(max(0, file_size - TRAILER_SIZE))
+    trailer = f.read(TRAILER_SIZE)
+    if trailer[-128:-125] == b'TAG':
+        end -= 128
+        trailer = trailer[:-128]
+    if trailer[-32:-24] == b'APETAGEX':
+        # APEv2 footer: preamble, version, tag size, item count, flags, reserved
+        _, size, _, flags = struct.unpack('<IIII', trailer[-24:-8])
+        end -= size + (32 if flags & 0x80000000 else 0)
+    return start, max(start, end)
+
+
+def hash_payload(f, file_size):
+    """Returns a hex digest of the audio payload of an open file, read in HASH_CHUNK_SIZE chunks."""
+    start, end = payload_range(f, file_size)
+    digest = hashlib.blake2b(digest_size=16)
+    buffer = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buffer)
+    f.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        count = f.readinto(view[:min(remaining, HASH_CHUNK_SIZE)])
+        if not count:
+            break
+        digest.update(view[:count])
+        remaining -= count
+    return digest.hexdigest()
+
+
+def hash_file(filepath):
+    """Returns the content hash of an audio file, ignoring its tags."""
+    with open(filepath, 'rb') as f:
+        return hash_payload(f, os.fstat(f.fileno()).st_size)
+
+
+def read_tags(filepath, fast=True, with_hash=False):
+    """Reads the library fields plus duration, bitrate and sample rate from an audio file.
+
+    With fast=True, MP3s are read from the tag header region and the first
+    frame only; everything else, and any MP3 the fast path can't make sense
+    of, goes through mutagen. with_hash adds 'content_hash' (see hash_payload),
+    computed from the same open file.
+    """
+    with open(filepath, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        metadata = None
+        if fast and filepath.lower().endswith('.mp3'):
+            try:
+                metadata = _read_mp3_fast(f, file_size)
+            except (ValueError, struct.error, mutagen.MutagenError):
+                f.seek(0)
+        if metadata is None:
+            metadata = _read_with_mutagen(f)
+        if with_hash:
+            metadata['content_hash'] = hash_payload(f, file_size)
+    return metadata
+
+
+def read_audio_info(filepath, fast=True):
+    """Returns just the technical fields (duration, bitrate, sample_rate) for a file."""
+    metadata = read_tags(filepath, fast)
+    return {key: metadata[key] for key in AUDIO_INFO_KEYS}
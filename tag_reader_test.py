@@ -0,0 +1,195 @@
+import io
+import os
+import struct
+import shutil
+import tempfile
+import unittest
+from mutagen.id3 import ID3, TIT2, TPE1
+import tag_reader
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, stereo: 417-byte frames of 1152 samples
+CBR_HEADER = bytes([0xFF, 0xFB, 0x90, 0x00])
+CBR_FRAME = CBR_HEADER + bytes(413)
+# The same with the padding bit set: one byte longer
+PADDED_HEADER = bytes([0xFF, 0xFB, 0x92, 0x00])
+
+
+def id3v1(title='', artist='', album='', year='', genre=255):
+    fields = [value.encode('latin-1').ljust(size, b'\0') for value, size in ((title, 30), (artist, 30), (album, 30), (year, 4))]
+    return b'TAG' + b''.join(fields) + bytes(30) + bytes([genre])
+
+
+def xing_frame(frames):
+    """A first frame carrying a Xing header with the frame count, after the 32-byte side info."""
+    header = b'Xing' + struct.pack('>II', 0x1, frames)
+    return CBR_HEADER + bytes(32) + header + bytes(413 - 32 - len(header))
+
+
+def vbri_frame(frames):
+    """A first frame carrying a Fraunhofer VBRI header, 32 bytes after the frame header."""
+    header = b'VBRI' + bytes(10) + struct.pack('>I', frames)
+    return CBR_HEADER + bytes(32) + header + bytes(413 - 32 - len(header))
+
+
+class MpegHeaderTest(unittest.TestCase):
+    def test_layer3_header(self):
+        header = tag_reader.parse_mpeg_header(CBR_HEADER, 0)
+        self.assertEqual(header, {'bitrate': 128000, 'sample_rate': 44100, 'samples': 1152, 'length': 417, 'side_info': 32})
+
+    def test_padding(self):
+        self.assertEqual(tag_reader.parse_mpeg_header(PADDED_HEADER, 0)['length'], 418)
+
+    def test_mpeg2_mono_header(self):
+        # MPEG-2 Layer III, 64 kbps, 22.05 kHz, mono
+        header = tag_reader.parse_mpeg_header(bytes([0xFF, 0xF3, 0x80, 0xC0]), 0)
+        self.assertEqual((header['bitrate'], header['sample_rate'], header['samples'], header['side_info']), (64000, 22050, 576, 9))
+        self.assertEqual(header['length'], 576 // 8 * 64000 // 22050)
+
+    def test_not_a_header(self):
+        for data in (b'\xFF\xFB', b'ID3\x04', bytes([0xFF, 0xFB, 0xF0, 0x00]), bytes([0xFF, 0xFB, 0x9C, 0x00])):
+            self.assertIsNone(tag_reader.parse_mpeg_header(data, 0))
+
+    def test_id3v2_size(self):
+        # Sync-safe size 0x0201 = 257 bytes after the 10-byte header
+        self.assertEqual(tag_reader.id3v2_size(b'ID3\x04\x00\x00\x00\x00\x02\x01'), 10 + 257)
+        self.assertEqual(tag_reader.id3v2_size(b'ID3\x04\x00\x10\x00\x00\x00\x10'), 10 + 16 + 10)
+        self.assertEqual(tag_reader.id3v2_size(CBR_FRAME[:10]), 0)
+
+
+class StreamInfoTest(unittest.TestCase):
+    def stream_info(self, data, audio_start=0):
+        return tag_reader._mp3_stream_info(io.BytesIO(data), audio_start, len(data))
+
+    def test_cbr_duration_from_size(self):
+        info = self.stream_info(CBR_FRAME * 100)
+        self.assertEqual((info['bitrate'], info['sample_rate']), (128000, 44100))
+        self.assertAlmostEqual(info['duration'], 100 * 417 * 8 / 128000)
+
+    def test_id3v1_trailer_is_not_audio(self):
+        info = self.stream_info(CBR_FRAME * 100 + id3v1('Song'))
+        self.assertAlmostEqual(info['duration'], 100 * 417 * 8 / 128000)
+
+    def test_skips_junk_before_the_first_frame(self):
+        # A stray sync byte that isn't followed by a second frame is not taken for the stream
+        info = self.stream_info(b'\x00\xFF\xFB\x90' + bytes(60) + CBR_FRAME * 10)
+        self.assertEqual(info['bitrate'], 128000)
+
+    def test_xing_frame_count(self):
+        info = self.stream_info(xing_frame(1000) + CBR_FRAME * 10)
+        self.assertAlmostEqual(info['duration'], 1000 * 1152 / 44100)
+        self.assertEqual(info['bitrate'], int(11 * 417 * 8 / info['duration']))
+
+    def test_vbri_frame_count(self):
+        info = self.stream_info(vbri_frame(500) + CBR_FRAME * 10)
+        self.assertAlmostEqual(info['duration'], 500 * 1152 / 44100)
+
+    def test_no_frames(self):
+        with self.assertRaises(ValueError):
+            self.stream_info(bytes(4096))
+
+
+def apev2(items=b'\x00' * 20, with_header=True):
+    """An APEv2 tag: optional header, the items, and the footer, whose size covers items and footer."""
+    flags = 0x80000000 if with_header else 0
+    header = b'APETAGEX' + struct.pack('<IIII', 2000, len(items) + 32, 1, flags) + bytes(8)
+    return (header if with_header else b'') + items + header
+
+
+def flac(audio, block_sizes=(34, 100)):
+    blocks = b''
+    for number, size in enumerate(block_sizes):
+        last = 0x80 if number == len(block_sizes) - 1 else 0
+        blocks += bytes([last | number]) + size.to_bytes(3, 'big') + bytes(size)
+    return b'fLaC' + blocks + audio
+
+
+class PayloadTest(unittest.TestCase):
+    def payload(self, data):
+        start, end = tag_reader.payload_range(io.BytesIO(data), len(data))
+        return data[start:end]
+
+    def hash(self, data):
+        return tag_reader.hash_payload(io.BytesIO(data), len(data))
+
+    def test_untagged_file_is_all_payload(self):
+        self.assertEqual(self.payload(CBR_FRAME * 3), CBR_FRAME * 3)
+
+    def test_tags_are_left_out(self):
+        audio = CBR_FRAME * 3
+        id3v2 = b'ID3\x04\x00\x00\x00\x00\x00\x14' + bytes(20)
+        self.assertEqual(self.payload(id3v2 + audio), audio)
+        self.assertEqual(self.payload(audio + id3v1('Song')), audio)
+        self.assertEqual(self.payload(audio + apev2()), audio)
+        self.assertEqual(self.payload(audio + apev2(with_header=False)), audio)
+        self.assertEqual(self.payload(id3v2 + audio + apev2() + id3v1('Song')), audio)
+
+    def test_flac_metadata_blocks_are_left_out(self):
+        audio = b'\xFF\xF8' + bytes(500)
+        self.assertEqual(self.payload(flac(audio)), audio)
+        self.assertEqual(self.payload(flac(audio, block_sizes=(34,))), audio)
+
+    def test_retagged_copies_hash_alike(self):
+        audio = CBR_FRAME * 3
+        self.assertEqual(self.hash(audio), self.hash(b'ID3\x04\x00\x00\x00\x00\x00\x0a' + bytes(10) + audio + id3v1('Song')))
+        self.assertNotEqual(self.hash(audio), self.hash(CBR_FRAME * 2 + PADDED_HEADER + bytes(413)))
+
+    def test_hash_spans_chunks(self):
+        data = os.urandom(2 * tag_reader.HASH_CHUNK_SIZE + 123)
+        with tempfile.NamedTemporaryFile(delete=False) as f:
+            f.write(data)
+        try:
+            self.assertEqual(tag_reader.hash_file(f.name), self.hash(data))
+            self.assertNotEqual(self.hash(data), self.hash(data[:-1] + bytes([data[-1] ^ 1])))
+        finally:
+            os.remove(f.name)
+
+
+class ReadTagsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+    def test_id3v2_tags(self):
+        path = self.write('a.mp3', CBR_FRAME * 100)
+        tags = ID3()
+        tags.add(TIT2(encoding=3, text='Title'))
+        tags.add(TPE1(encoding=3, text='Artist'))
+        tags.save(path)
+        metadata = tag_reader.read_tags(path)
+        self.assertEqual((metadata['title'], metadata['artist'], metadata['album']), ('Title', 'Artist', ''))
+        self.assertAlmostEqual(metadata['duration'], 100 * 417 * 8 / 128000)
+
+    def test_id3v1_only_tags(self):
+        path = self.write('a.mp3', CBR_FRAME * 100 + id3v1('Title', 'Artist', 'Album', '1999', genre=17))
+        metadata = tag_reader.read_tags(path)
+        self.assertEqual([metadata[field] for field in ('title', 'artist', 'album', 'year', 'genre')],
+                         ['Title', 'Artist', 'Album', '1999', 'Rock'])
+
+    def test_id3v1_fills_fields_missing_from_id3v2(self):
+        path = self.write('a.mp3', CBR_FRAME * 100)
+        tags = ID3()
+        tags.add(TIT2(encoding=3, text='Title'))
+        tags.save(path)
+        with open(path, 'ab') as f:
+            f.write(id3v1('Old Title', 'Artist'))
+        metadata = tag_reader.read_tags(path)
+        self.assertEqual((metadata['title'], metadata['artist']), ('Title', 'Artist'))
+
+    def test_fast_and_mutagen_durations_agree(self):
+        path = self.write('a.mp3', CBR_FRAME * 400)
+        fast = tag_reader.read_audio_info(path)
+        slow = tag_reader.read_audio_info(path, fast=False)
+        self.assertEqual(fast['sample_rate'], slow['sample_rate'])
+        self.assertAlmostEqual(fast['duration'], slow['duration'], delta=0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+import os
+import sys
+import uuid
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import config
+import database
+import disc_planner
+import tag_reader
+from audio_cd import ffmpeg_executable
+
+# MPEG-1 Layer III bitrates (kbps), lowest first.
+MP3_BITRATES = (32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+# Lowest bitrate worth burning; below this the queue is reported as not fitting.
+MIN_FIT_BITRATE = 64
+# Allowance per re-encoded file for the ID3 tag and encoder header frames.
+TAG_OVERHEAD_BYTES = 8192
+DEFAULT_STAGING_DIR = 'transcode_cache'
+DEFAULT_MAX_SIZE_MB = 4096
+
+
+def encoded_size(duration, bitrate):
+    """Predicted size of a constant-bitrate MP3 of duration seconds at bitrate kbps."""
+    return int((duration or 0) * bitrate * 125) + TAG_OVERHEAD_BYTES
+
+
+def _keeps_original(track, bitrate):
+    """True if re-encoding the track to bitrate wouldn't make it any smaller."""
+    _, size, duration, source_bitrate, _ = track
+    return bool(source_bitrate and source_bitrate <= bitrate * 1000) or encoded_size(duration, bitrate) >= size
+
+
+def fitted_bytes(tracks, bitrate):
+    """Estimated image size of tracks with everything above bitrate re-encoded to it.
+
+    tracks are (filepath, size, duration, bitrate_bps, content_hash). Tracks
+    already at or below bitrate, or that re-encoding wouldn't shrink, are
+    burned as they are.
+    """
+    total = 0
+    for track in tracks:
+        filepath, size, duration = track[:3]
+        size = size if _keeps_original(track, bitrate) else encoded_size(duration, bitrate)
+        total += disc_planner.data_disc_weight(filepath, size)
+    return total + disc_planner.IMAGE_OVERHEAD_BYTES
+
+
+def choose_bitrate(tracks, capacity_bytes):
+    """Highest MP3 bitrate at which tracks fit in capacity_bytes of disc, or None."""
+    for bitrate in reversed(MP3_BITRATES):
+        if bitrate < MIN_FIT_BITRATE:
+            break
+        if fitted_bytes(tracks, bitrate) <= capacity_bytes:
+            return bitrate
+    return None
+
+
+def transcode_command(source, destination, bitrate):
+    return [ffmpeg_executable(), '-v', 'error', '-nostdin', '-y', '-i', source, '-map', '0:a:0', '-map_metadata', '0',
+            '-c:a', 'libmp3lame', '-b:a', f'{bitrate}k', '-id3v2_version', '3', '-f', 'mp3', destination]
+
+
+class StagingCache:
+    """Re-encoded copies kept by (content hash, bitrate), evicted least recently used first.
+
+    Each copy lives in its own <hash>-<bitrate>k directory under its
+    original file name with an .mp3 extension, so the name on the disc is
+    unchanged. Settings come from the TRANSCODE config section: directory
+    and max_size_mb.
+    """
+    def __init__(self, directory=None, max_bytes=None):
+        self.directory = directory or config.get_setting('TRANSCODE', 'directory', DEFAULT_STAGING_DIR)
+        if max_bytes is None:
+            try:
+                max_bytes = int(float(config.get_setting('TRANSCODE', 'max_size_mb', str(DEFAULT_MAX_SIZE_MB))) * 1024 * 1024)
+            except ValueError:
+                max_bytes = DEFAULT_MAX_SIZE_MB * 1024 * 1024
+        self.max_bytes = max_bytes
+
+    def path(self, content_hash, bitrate, filepath):
+        name = os.path.splitext(os.path.basename(filepath))[0] + '.mp3'
+        return os.path.join(self.directory, f"{content_hash}-{bitrate}k", name)
+
+    def lookup(self, content_hash, bitrate, filepath):
+        """Returns the staged copy's path, marking it recently used, or None if it isn't staged yet."""
+        path = self.path(content_hash, bitrate, filepath)
+        if not os.path.exists(path):
+            # The same audio may be staged under another file name
+            entry_dir = os.path.dirname(path)
+            try:
+                other = next((name for name in os.listdir(entry_dir) if name.endswith('.mp3')), None)
+            except OSError:
+                other = None
+            if other is None:
+                return None
+            try:
+                os.link(os.path.join(entry_dir, other), path)
+            except OSError:
+                shutil.copyfile(os.path.join(entry_dir, other), path)
+        os.utime(os.path.dirname(path))
+        return path
+
+    def evict(self, keep=()):
+        """Deletes least recently used copies until the staging area fits in max_bytes."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as scanned:
+                for entry in scanned:
+                    if entry.is_dir():
+                        size = sum(os.path.getsize(os.path.join(entry.path, name)) for name in os.listdir(entry.path))
+                        entries.append((entry.stat().st_mtime_ns, size, entry.path))
+        except OSError:
+            return
+        total = sum(size for _, size, _ in entries)
+        keep = {os.path.dirname(path) for path in keep}
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path in keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            print(f"[Transcoder] Evicted {os.path.basename(path)}")
+
+
+def queue_tracks(filepaths):
+    """(filepath, size, duration, bitrate, content_hash) for filepaths, from the library with file fallbacks."""
+    info = database.get_audio_info(filepaths)
+    tracks = []
+    for filepath in filepaths:
+        size, duration, bitrate, _, content_hash = info.get(filepath) or (None, None, None, None, None)
+        if size is None:
+            size = os.path.getsize(filepath)
+        if duration is None:
+            audio_info = tag_reader.read_audio_info(filepath)
+            duration, bitrate = audio_info['duration'], audio_info['bitrate']
+        tracks.append((filepath, size, duration, bitrate, content_hash))
+    return tracks
+
+
+def fit_to_disc(filepaths, capacity_bytes, progress=None, workers=None):
+    """Returns (filepaths to burn, bitrate) so the queue fits on a disc of capacity_bytes.
+
+    Tracks above the chosen bitrate are re-encoded in parallel, one ffmpeg
+    process per core, into the staging cache; copies staged by an earlier
+    burn are reused. The original files are never modified. Raises
+    ValueError if the queue doesn't fit even at MIN_FIT_BITRATE.
+    """
+    progress = progress or (lambda message: None)
+    tracks = queue_tracks(filepaths)
+    bitrate = choose_bitrate(tracks, capacity_bytes)
+    if bitrate is None:
+        raise ValueError(f"The queue doesn't fit on the disc even at {MIN_FIT_BITRATE} kbps.")
+    cache = StagingCache()
+    result = list(filepaths)
+    jobs = []
+    for index, track in enumerate(tracks):
+        if _keeps_original(track, bitrate):
+            continue
+        filepath, content_hash = track[0], track[4] or tag_reader.hash_file(track[0])
+        staged = cache.lookup(content_hash, bitrate, filepath)
+        if staged:
+            result[index] = staged
+        else:
+            jobs.append((index, filepath, cache.path(content_hash, bitrate, filepath)))
+    if jobs:
+        progress(f"Re-encoding {len(jobs)} tracks at {bitrate} kbps to fit the disc...")
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            futures = [(index, pool.submit(_transcode, filepath, destination, bitrate)) for index, filepath, destination in jobs]
+            for done, (index, future) in enumerate(futures, 1):
+                result[index] = future.result()
+                progress(f"Re-encoded {done} of {len(jobs)} tracks at {bitrate} kbps.")
+    else:
+        progress(f"Using {bitrate} kbps copies from the staging area.")
+    cache.evict(keep=result)
+    return result, bitrate
+
+
+def _transcode(source, destination, bitrate):
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    partial = f"{destination}.{uuid.uuid4().hex}.part"
+    try:
+        try:
+            result = subprocess.run(transcode_command(source, partial, bitrate), capture_output=True, text=True,
+                                    creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
+        except FileNotFoundError:
+            raise RuntimeError("ffmpeg was not found; it is needed to re-encode tracks to fit the disc.")
+        if result.returncode != 0:
+            raise RuntimeError(f"Could not re-encode {os.path.basename(source)}: {result.stderr.strip()}")
+        os.replace(partial, destination)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+    return destination
@@ -0,0 +1,176 @@
+import os
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, pyqtSignal
+import database
+import disc
+import audio_cd
+from workers.audio_info_worker import AudioInfoWorker
+
+
+class BurnQueueModel(QAbstractListModel):
+    """The ordered list of files queued for burning.
+
+    Keeps a filepath -> row index for O(1) duplicate checks, the running
+    image size of the queue (see disc.ImageSizeTally), its running length
+    as audio CD sectors and each track's size, duration and bitrate for
+    fitting the queue to a disc (see fit_tracks()). Paths are added in bulk
+    with one database query for their labels, sizes and durations; songs
+    the library has no duration for are read by an AudioInfoWorker, and
+    audio_info_updated is emitted once their lengths are in the totals.
+    """
+    audio_info_updated = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._filepaths = []
+        self._labels = []
+        self._row_of_path = {}
+        self.tally = disc.ImageSizeTally()
+        self._audio_frames = {}
+        self.audio_frames = 0
+        self._tracks = {}
+        # Kept referenced until QThread.finished
+        self._info_workers = set()
+
+    def filepaths(self):
+        return list(self._filepaths)
+
+    def fit_tracks(self):
+        """The queue as transcoder.queue_tracks() tuples (filepath, size, duration, bitrate, content_hash), without any lookups."""
+        return [self._tracks[filepath] for filepath in self._filepaths]
+
+    def __contains__(self, filepath):
+        return filepath in self._row_of_path
+
+    def _resolve(self, filepaths):
+        """Returns [(filepath, label, size, duration, bitrate, content_hash)] for the new, known library songs among filepaths, in order."""
+        new_paths = []
+        seen = set()
+        for filepath in filepaths:
+            if filepath and filepath not in self._row_of_path and filepath not in seen:
+                seen.add(filepath)
+                new_paths.append(filepath)
+        if not new_paths:
+            return []
+        entries = database.get_burn_queue_entries(new_paths)
+        resolved = []
+        for filepath in new_paths:
+            entry = entries.get(filepath)
+            if entry is None:
+                continue  # Only songs in the library can be queued
+            title, artist, size, duration, bitrate, content_hash = entry
+            if size is None:
+                # Not scanned since sizes were recorded; stat it this once
+                try:
+                    size = os.path.getsize(filepath)
+                except OSError:
+                    size = 0
+            resolved.append((filepath, f"{artist} - {title}", size, duration, bitrate, content_hash))
+        return resolved
+
+    def add_many(self, filepaths):
+        """Appends the given paths, skipping ones already queued. Returns the number added."""
+        resolved = self._resolve(filepaths)
+        if not resolved:
+            return 0
+        first = len(self._filepaths)
+        self.beginInsertRows(QModelIndex(), first, first + len(resolved) - 1)
+        for entry in resolved:
+            self._append(*entry)
+        self.endInsertRows()
+        self._read_missing_info(resolved)
+        return len(resolved)
+
+    def set_filepaths(self, filepaths):
+        """Replaces the whole queue in a single model reset."""
+        self.beginResetModel()
+        self._clear()
+        resolved = self._resolve(filepaths)
+        for entry in resolved:
+            self._append(*entry)
+        self.endResetModel()
+        self._read_missing_info(resolved)
+
+    def _read_missing_info(self, resolved):
+        missing = [entry[0] for entry in resolved if entry[3] is None]
+        if not missing:
+            return
+        worker = AudioInfoWorker(missing)
+        worker.info_read.connect(self._on_info_read)
+        worker.finished.connect(lambda: self._release_info_worker(worker))
+        self._info_workers.add(worker)
+        worker.start()
+
+    def _release_info_worker(self, worker):
+        self._info_workers.discard(worker)
+        worker.deleteLater()
+
+    def _on_info_read(self, info):
+        updated = False
+        for filepath, (duration, bitrate) in info.items():
+            track = self._tracks.get(filepath)
+            if track is None or track[2] is not None or duration is None:
+                continue  # Removed from the queue meanwhile, or unreadable
+            frames = audio_cd.track_frames(duration)
+            self.audio_frames += frames - self._audio_frames[filepath]
+            self._audio_frames[filepath] = frames
+            self._tracks[filepath] = (filepath, track[1], duration, bitrate, track[4])
+            updated = True
+        if updated:
+            self.audio_info_updated.emit()
+
+    def stop_workers(self):
+        """Waits for running audio info reads; call before the application exits."""
+        for worker in list(self._info_workers):
+            worker.requestInterruption()
+            worker.wait()
+
+    def _append(self, filepath, label, size, duration, bitrate, content_hash):
+        self._row_of_path[filepath] = len(self._filepaths)
+        self._filepaths.append(filepath)
+        self._labels.append(label)
+        self.tally.add(filepath, size)
+        frames = audio_cd.track_frames(duration)
+        self._audio_frames[filepath] = frames
+        self.audio_frames += frames
+        self._tracks[filepath] = (filepath, size, duration, bitrate, content_hash)
+
+    def remove_rows(self, rows):
+        rows = sorted(set(rows), reverse=True)
+        if not rows:
+            return
+        for row in rows:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.tally.remove(self._filepaths[row])
+            self.audio_frames -= self._audio_frames.pop(self._filepaths[row], 0)
+            self._tracks.pop(self._filepaths[row], None)
+            del self._filepaths[row]
+            del self._labels[row]
+            self.endRemoveRows()
+        self._row_of_path = {filepath: row for row, filepath in enumerate(self._filepaths)}
+
+    def clear(self):
+        self.beginResetModel()
+        self._clear()
+        self.endResetModel()
+
+    def _clear(self):
+        self._filepaths = []
+        self._labels = []
+        self._row_of_path = {}
+        self.tally.clear()
+        self._audio_frames = {}
+        self.audio_frames = 0
+        self._tracks = {}
+
+    # --- QAbstractListModel interface ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._filepaths)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._labels[index.row()]
+        if role in (Qt.ItemDataRole.UserRole, Qt.ItemDataRole.ToolTipRole):
+            return self._filepaths[index.row()]
+        return None
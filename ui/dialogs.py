@@ -1,10 +1,16 @@
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QGridLayout,
     QLineEdit, QPushButton, QComboBox, 
-    QCheckBox, QLabel, QDialogButtonBox, QFileDialog
+    QCheckBox, QLabel, QDialogButtonBox, QFileDialog,
+    QTreeWidget, QTreeWidgetItem, QMessageBox, QSpinBox,
+    QListWidget, QListWidgetItem, QProgressBar, QTableWidget, QTableWidgetItem
 )
+from PyQt6.QtCore import Qt
 import config
 import database
+import image_cache
+import audio_cd
+import disc_planner
 
 class EditSongDialog(QDialog):
     """A dialog for manually editing a song's metadata."""
@@ -63,7 +69,7 @@ class AdvancedBurnSettingsDialog(QDialog):
         speed_layout.addWidget(speed_label)
         self.burn_speed_selector = QComboBox()
         self.burn_speed_selector.addItems(["Max", "48x", "32x", "24x", "16x", "8x", "4x"])
-        self.burn_speed_selector.setToolTip("Choose the desired burn speed for your disc.")
+        self.burn_speed_selector.setToolTip("Highest speed to burn at. Max picks the fastest speed the drive supports for the inserted media, avoiding speeds that failed on that media before.")
         speed_layout.addWidget(self.burn_speed_selector)
         layout.addLayout(speed_layout)
         self.burn_proof_checkbox = QCheckBox("Enable Burn-Proof")
@@ -72,6 +78,34 @@ class AdvancedBurnSettingsDialog(QDialog):
         self.test_mode_checkbox = QCheckBox("Enable Test Mode")
         self.test_mode_checkbox.setToolTip("Simulate the burn process without actually writing data to the disc. Useful for testing.")
         layout.addWidget(self.test_mode_checkbox)
+        self.stream_image_checkbox = QCheckBox("Stream Image Directly to Burner")
+        self.stream_image_checkbox.setToolTip("Feed the disc image to the burner while it is being built instead of writing a temporary ISO file first. Linux only.")
+        layout.addWidget(self.stream_image_checkbox)
+        self.verify_checkbox = QCheckBox("Verify Disc After Burning")
+        self.verify_checkbox.setToolTip("Read the disc back after a data burn and compare it with the image, reporting the first bad sector. Audio CDs are not verified.")
+        layout.addWidget(self.verify_checkbox)
+        audio_cd_layout = QHBoxLayout()
+        audio_cd_label = QLabel("Audio CD Length:")
+        audio_cd_label.setToolTip("Playing time of blank audio CDs, used until the disc in the drive has been read.")
+        audio_cd_layout.addWidget(audio_cd_label)
+        self.audio_cd_minutes_selector = QComboBox()
+        self.audio_cd_minutes_selector.addItems([f"{minutes} min" for minutes in audio_cd.DISC_MINUTES])
+        self.audio_cd_minutes_selector.setToolTip("Choose 74 or 80 minute media for the audio CD capacity check.")
+        audio_cd_layout.addWidget(self.audio_cd_minutes_selector)
+        layout.addLayout(audio_cd_layout)
+        cache_layout = QHBoxLayout()
+        cache_label = QLabel("Image Cache Size (MB):")
+        cache_label.setToolTip("Disc images are kept so burning the same files again starts immediately. 0 turns the cache off.")
+        cache_layout.addWidget(cache_label)
+        self.image_cache_size_input = QSpinBox()
+        self.image_cache_size_input.setRange(0, 1024 * 1024)
+        self.image_cache_size_input.setSingleStep(1024)
+        self.image_cache_size_input.setToolTip("Maximum disk space used by cached disc images; the least recently used images are removed first.")
+        cache_layout.addWidget(self.image_cache_size_input)
+        layout.addLayout(cache_layout)
+        self.cache_streamed_checkbox = QCheckBox("Cache Streamed Images")
+        self.cache_streamed_checkbox.setToolTip("Also save streamed disc images to the image cache. This writes the whole image to disk during the burn, which streaming otherwise avoids.")
+        layout.addWidget(self.cache_streamed_checkbox)
         button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Apply | QDialogButtonBox.StandardButton.Cancel)
         button_box.button(QDialogButtonBox.StandardButton.Apply).setToolTip("Apply these advanced settings without closing the dialog.")
         button_box.button(QDialogButtonBox.StandardButton.Ok).setToolTip("Apply changes and close the dialog.")
@@ -90,14 +124,29 @@ class AdvancedBurnSettingsDialog(QDialog):
         self.burn_speed_selector.setCurrentText(speed)
         self.burn_proof_checkbox.setChecked(burn_proof)
         self.test_mode_checkbox.setChecked(test_mode)
+        self.stream_image_checkbox.setChecked(config.get_setting('BURN_SETTINGS', 'stream_image', 'true').lower() == 'true')
+        self.verify_checkbox.setChecked(config.get_setting('BURN_SETTINGS', 'verify', 'false').lower() == 'true')
+        self.audio_cd_minutes_selector.setCurrentText(f"{config.get_setting('BURN_SETTINGS', 'audio_cd_minutes', str(audio_cd.DEFAULT_DISC_MINUTES))} min")
+        try:
+            self.image_cache_size_input.setValue(int(float(config.get_setting('IMAGE_CACHE', 'max_size_mb', str(image_cache.DEFAULT_MAX_SIZE_MB)))))
+        except ValueError:
+            self.image_cache_size_input.setValue(image_cache.DEFAULT_MAX_SIZE_MB)
+        self.cache_streamed_checkbox.setChecked(config.get_setting('IMAGE_CACHE', 'cache_streamed', 'false').lower() == 'true')
 
     def apply_settings(self):
         """Saves the current settings to the config file."""
-        config.update_setting('BURN_SETTINGS', 'speed', self.burn_speed_selector.currentText())
-        config.update_setting('BURN_SETTINGS', 'burn_proof', str(self.burn_proof_checkbox.isChecked()).lower())
-        config.update_setting('BURN_SETTINGS', 'test_mode', str(self.test_mode_checkbox.isChecked()).lower())
+        with config.transaction():
+            config.update_setting('BURN_SETTINGS', 'speed', self.burn_speed_selector.currentText())
+            config.update_setting('BURN_SETTINGS', 'burn_proof', str(self.burn_proof_checkbox.isChecked()).lower())
+            config.update_setting('BURN_SETTINGS', 'test_mode', str(self.test_mode_checkbox.isChecked()).lower())
+            config.update_setting('BURN_SETTINGS', 'stream_image', str(self.stream_image_checkbox.isChecked()).lower())
+            config.update_setting('BURN_SETTINGS', 'verify', str(self.verify_checkbox.isChecked()).lower())
+            config.update_setting('BURN_SETTINGS', 'audio_cd_minutes', self.audio_cd_minutes_selector.currentText().split()[0])
+            config.update_setting('IMAGE_CACHE', 'max_size_mb', str(self.image_cache_size_input.value()))
+            config.update_setting('IMAGE_CACHE', 'cache_streamed', str(self.cache_streamed_checkbox.isChecked()).lower())
         if self.parent():
             self.parent().statusBar().showMessage("Advanced burn settings applied.", 3000)
+            self.parent().update_capacity_meter()
 
     def accept(self):
         """Saves settings and closes the dialog."""
@@ -201,6 +250,12 @@ class SettingsDialog(QDialog):
         localmusic_layout.addWidget(self.localmusic_browse_button)
         layout.addLayout(localmusic_layout)
 
+        # Folder watching
+        self.watch_folders_checkbox = QCheckBox("Watch music folders for changes")
+        self.watch_folders_checkbox.setToolTip("Add, update and remove library tracks automatically when files change in the download or local music folder.")
+        self.watch_folders_checkbox.setChecked(config.get_setting("LIBRARY", "watch_folders", "false").lower() == "true")
+        layout.addWidget(self.watch_folders_checkbox)
+
         # System Instructions File
         sysinst_layout = QHBoxLayout()
         sysinst_label = QLabel("AI System Instructions File:")
@@ -242,18 +297,291 @@ class SettingsDialog(QDialog):
 
     def apply_settings(self):
         """Saves all settings to the config.ini file, but does not close the dialog."""
-        config.update_setting("API_KEYS", "gemini_api_key", self.gemini_api_key_input.text())
-        if self.gemini_model_selector.currentText() == "custom":
-            config.update_setting("API_KEYS", "gemini_model", self.custom_gemini_model_input.text())
-        else:
-            config.update_setting("API_KEYS", "gemini_model", self.gemini_model_selector.currentText())
-        config.update_setting("API_KEYS", "spotify_client_id", self.spotify_id_input.text())
-        config.update_setting("API_KEYS", "spotify_client_secret", self.spotify_secret_input.text())
-        config.update_setting("API_KEYS", "system_instructions_file", self.system_instructions_path_input.text())
-        config.update_setting("PATHS", "LocalMusicFolder", self.localmusic_input.text())
+        with config.transaction():
+            config.update_setting("API_KEYS", "gemini_api_key", self.gemini_api_key_input.text())
+            if self.gemini_model_selector.currentText() == "custom":
+                config.update_setting("API_KEYS", "gemini_model", self.custom_gemini_model_input.text())
+            else:
+                config.update_setting("API_KEYS", "gemini_model", self.gemini_model_selector.currentText())
+            config.update_setting("API_KEYS", "spotify_client_id", self.spotify_id_input.text())
+            config.update_setting("API_KEYS", "spotify_client_secret", self.spotify_secret_input.text())
+            config.update_setting("API_KEYS", "system_instructions_file", self.system_instructions_path_input.text())
+            config.update_setting("PATHS", "LocalMusicFolder", self.localmusic_input.text())
+            config.update_setting("LIBRARY", "watch_folders", str(self.watch_folders_checkbox.isChecked()).lower())
         if self.parent():
             self.parent().restart_gemini_session()
+            self.parent().restart_folder_watcher()
 
     def ok_and_close(self):
         self.apply_settings()
         super().accept()
+
+
+class DuplicatesDialog(QDialog):
+    """Lists library songs whose audio is identical (same content hash), grouped by song."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Duplicate Songs")
+        self.resize(900, 500)
+        # Apply futuristic stylesheet if not already set by parent
+        if not self.styleSheet():
+            import os
+            qss_path = os.path.join(os.path.dirname(__file__), 'alphaburn_theme.qss')
+            if os.path.exists(qss_path):
+                with open(qss_path, 'r', encoding='utf-8') as f:
+                    self.setStyleSheet(f.read())
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Song", "File Path", "Size"])
+        self.tree.setSelectionMode(QTreeWidget.SelectionMode.ExtendedSelection)
+        self.tree.setColumnWidth(0, 280)
+        self.tree.setColumnWidth(1, 480)
+        layout.addWidget(self.tree)
+        button_layout = QHBoxLayout()
+        self.delete_button = QPushButton("Remove Selected from Library")
+        self.delete_button.setToolTip("Remove the selected copies from the library; the files stay on disk. At least one copy of each song is always kept.")
+        self.delete_button.clicked.connect(self.delete_selected)
+        button_layout.addWidget(self.delete_button)
+        button_layout.addStretch()
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+        self._load_groups()
+
+    def _load_groups(self):
+        self.tree.clear()
+        groups = database.get_duplicate_groups()
+        wasted = 0
+        for _, rows in groups:
+            first = rows[0]
+            group_item = QTreeWidgetItem([f"{first[2]} - {first[1]}", f"{len(rows)} copies", ""])
+            group_item.setFlags(group_item.flags() & ~Qt.ItemFlag.ItemIsSelectable)
+            for file_size, title, artist, album, year, genre, rating, filepath, song_id in rows:
+                size_mb = (file_size or 0) / (1024 * 1024)
+                child = QTreeWidgetItem([f"{artist} - {title} ({album})", filepath, f"{size_mb:.1f} MB"])
+                child.setData(0, Qt.ItemDataRole.UserRole, filepath)
+                group_item.addChild(child)
+            wasted += sum(row[0] or 0 for row in rows[1:])
+            self.tree.addTopLevelItem(group_item)
+        self.tree.expandAll()
+        self.summary_label.setText(f"{len(groups)} songs stored more than once, {wasted / (1024 * 1024):.1f} MB in extra copies.")
+        self.delete_button.setEnabled(bool(groups))
+
+    def delete_selected(self):
+        filepaths = []
+        for index in range(self.tree.topLevelItemCount()):
+            group_item = self.tree.topLevelItem(index)
+            children = [group_item.child(i) for i in range(group_item.childCount())]
+            selected = [child for child in children if child.isSelected()]
+            if len(selected) == len(children):
+                # Never remove every copy of a song
+                selected = selected[1:]
+            filepaths.extend(child.data(0, Qt.ItemDataRole.UserRole) for child in selected)
+        if not filepaths:
+            return
+        answer = QMessageBox.question(self, "Remove from Library",
+                                      f"Remove {len(filepaths)} copies from the library? The files are not deleted from disk.")
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        database.delete_songs(filepaths)
+        self._load_groups()
+
+
+class DriveSelectionDialog(QDialog):
+    """Lets the user tick the drives to burn the same disc on."""
+    def __init__(self, drives, checked=(), parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Burn to Multiple Drives")
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Burn the queue to these drives at the same time:"))
+        self.drive_list = QListWidget()
+        for drive in drives:
+            item = QListWidgetItem(drive)
+            item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+            item.setCheckState(Qt.CheckState.Checked if drive in checked else Qt.CheckState.Unchecked)
+            self.drive_list.addItem(item)
+        layout.addWidget(self.drive_list)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def selected_drives(self):
+        items = (self.drive_list.item(row) for row in range(self.drive_list.count()))
+        return [item.text() for item in items if item.checkState() == Qt.CheckState.Checked]
+
+
+class MultiBurnProgressDialog(QDialog):
+    """Shows the progress and latest burner output for each drive of a multi-drive burn."""
+    def __init__(self, drives, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Multi-Drive Burn")
+        self.resize(700, 80 + 50 * len(drives))
+        layout = QGridLayout(self)
+        self.status_labels = {}
+        self.progress_bars = {}
+        for row, drive in enumerate(drives):
+            layout.addWidget(QLabel(f"{drive}:"), 2 * row, 0)
+            label = QLabel("Waiting for disc image...")
+            self.status_labels[drive] = label
+            layout.addWidget(label, 2 * row, 1)
+            bar = QProgressBar()
+            self.progress_bars[drive] = bar
+            layout.addWidget(bar, 2 * row + 1, 1)
+        self.close_button = QPushButton("Close")
+        self.close_button.setEnabled(False)
+        self.close_button.clicked.connect(self.accept)
+        layout.addWidget(self.close_button, 2 * len(drives), 1, Qt.AlignmentFlag.AlignRight)
+
+    def update_drive(self, drive, message):
+        if drive in self.status_labels:
+            self.status_labels[drive].setText(message)
+
+    def update_drive_progress(self, drive, reading):
+        if drive in self.progress_bars:
+            if reading.percent is not None:
+                self.progress_bars[drive].setValue(int(reading.percent))
+            self.status_labels[drive].setText(reading.describe())
+
+    def finish_drive(self, drive, ok, message):
+        self.update_drive(drive, message if ok else f"FAILED: {message}")
+        if ok and drive in self.progress_bars:
+            self.progress_bars[drive].setValue(100)
+
+    def finish(self):
+        self.close_button.setEnabled(True)
+
+
+class DiscPlanDialog(QDialog):
+    """Splits a set of songs across as few discs as possible and shows the plan.
+
+    Sizes are image bytes for data discs and playing time for audio CDs.
+    After exec(), plan holds the burn queues, one list of filepaths per disc.
+    """
+    def __init__(self, filepaths, capacity, by_duration=False, max_items=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Split Across Discs")
+        self.resize(700, 500)
+        self.capacity = capacity
+        self.by_duration = by_duration
+        self.max_items = max_items
+        self.plan = []
+        self.filepaths = filepaths
+        self.entries = database.get_disc_plan_entries(filepaths)
+        self.items = disc_planner.plan_items(self.entries, filepaths, by_duration)
+        self.weights = {item.filepath: item.weight for item in self.items}
+        self.info_worker = None
+        self.missing = disc_planner.missing_durations(self.entries, filepaths) if by_duration else []
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+        self.keep_albums_checkbox = QCheckBox("Keep albums together")
+        self.keep_albums_checkbox.setToolTip("Put every track of an album on the same disc where the album fits on one disc.")
+        self.keep_albums_checkbox.setChecked(config.get_setting('BURN_SETTINGS', 'plan_keep_albums', 'true').lower() == 'true')
+        self.keep_albums_checkbox.toggled.connect(self._on_keep_albums_toggled)
+        layout.addWidget(self.keep_albums_checkbox)
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Disc / Track", "Size"])
+        self.tree.setColumnWidth(0, 520)
+        layout.addWidget(self.tree)
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Cancel)
+        self.burn_all_button = buttons.addButton("Burn All Discs", QDialogButtonBox.ButtonRole.AcceptRole)
+        self.burn_all_button.setToolTip("Burn the discs one after another, asking for a blank disc between them.")
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+        if self.missing:
+            # Lengths the library doesn't know are read in the background; the plan is redone once they are in
+            from workers.audio_info_worker import AudioInfoWorker
+            self.info_worker = AudioInfoWorker(self.missing)
+            self.info_worker.info_read.connect(self._on_durations_read)
+            self.info_worker.start()
+        self._replan()
+
+    def _on_durations_read(self, info):
+        self.missing = []
+        durations = {filepath: duration for filepath, (duration, _) in info.items()}
+        self.items = disc_planner.plan_items(self.entries, self.filepaths, self.by_duration, durations)
+        self.weights = {item.filepath: item.weight for item in self.items}
+        self._replan()
+
+    def done(self, result):
+        if self.info_worker is not None:
+            self.info_worker.requestInterruption()
+            self.info_worker.wait()
+        super().done(result)
+
+    def _format(self, weight):
+        if self.by_duration:
+            return audio_cd.format_frames(weight)
+        return f"{weight / (1024 * 1024):.1f} MB"
+
+    def _on_keep_albums_toggled(self, checked):
+        config.update_setting('BURN_SETTINGS', 'plan_keep_albums', str(checked).lower())
+        self._replan()
+
+    def _replan(self):
+        self.tree.clear()
+        try:
+            self.plan = disc_planner.plan_discs(self.items, self.capacity, self.keep_albums_checkbox.isChecked(), self.max_items)
+        except ValueError as e:
+            self.plan = []
+            self.summary_label.setText(str(e))
+            self.burn_all_button.setEnabled(False)
+            return
+        import os
+        for number, filepaths in enumerate(self.plan, 1):
+            used = sum(self.weights[filepath] for filepath in filepaths)
+            disc_item = QTreeWidgetItem([f"Disc {number}: {len(filepaths)} tracks", f"{self._format(used)} of {self._format(self.capacity)}"])
+            for filepath in filepaths:
+                track_item = QTreeWidgetItem([os.path.basename(filepath), self._format(self.weights[filepath])])
+                track_item.setToolTip(0, filepath)
+                disc_item.addChild(track_item)
+            self.tree.addTopLevelItem(disc_item)
+        if self.missing:
+            self.summary_label.setText(f"Reading the length of {len(self.missing)} tracks...")
+        else:
+            self.summary_label.setText(f"{len(self.items)} tracks fit on {len(self.plan)} discs.")
+        self.burn_all_button.setEnabled(bool(self.plan) and not self.missing)
+
+
+class BurnHistoryDialog(QDialog):
+    """Lists past burns with the write speed and buffer statistics recorded from the burner's progress output."""
+    HEADERS = ["Started", "Drive", "Mode", "Media", "Result", "Written (MB)", "Avg Speed", "Min Speed", "Max Speed",
+               "Min Buffer", "Min FIFO", "Low Buffer", "BURN-Free", "Message"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Burn History")
+        self.resize(1100, 450)
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Low buffer counts readings with the drive buffer under 20%; BURN-Free counts underruns the drive recovered from."))
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        layout.addWidget(self.table)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        layout.addWidget(close_button, alignment=Qt.AlignmentFlag.AlignRight)
+        self._load()
+
+    def _load(self):
+        import time
+        def show(value, suffix=''):
+            if value is None:
+                return ''
+            return f"{value:.1f}{suffix}" if isinstance(value, float) else f"{value}{suffix}"
+        rows = database.get_burn_log()
+        self.table.setRowCount(len(rows))
+        for row, (started_at, finished_at, drive, mode, media, total_mb, written_mb, average_speed, max_speed, min_speed,
+                  min_buffer_fill, min_fifo_fill, low_buffer_count, burnfree_count, success, message) in enumerate(rows):
+            values = [time.strftime('%Y-%m-%d %H:%M', time.localtime(started_at)) if started_at else '', drive, mode, media or '',
+                      "OK" if success else "Failed", show(written_mb), show(average_speed, 'x'), show(min_speed, 'x'), show(max_speed, 'x'),
+                      show(min_buffer_fill, '%'), show(min_fifo_fill, '%'), show(low_buffer_count), show(burnfree_count), message or '']
+            for column, value in enumerate(values):
+                self.table.setItem(row, column, QTableWidgetItem(str(value)))
+        self.table.resizeColumnsToContents()
@@ -0,0 +1,218 @@
+import sys
+from array import array
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+import database
+
+HEADERS = ['Title', 'Artist', 'Album', 'Year', 'Genre', 'Rating', 'File Path']
+RATING_COLUMN = 5
+FILEPATH_COLUMN = 6
+# Rows pulled from the database each time the view scrolls near the end
+PAGE_SIZE = 500
+
+
+class LibraryTableModel(QAbstractTableModel):
+    """A library model that fetches rows from the database page by page as the view scrolls.
+
+    Rows are stored column-wise: one list per text column and a byte array for
+    ratings, with repeated artist/album/year/genre strings interned. Row-level
+    change notifications from the database are applied in place, so edits and
+    scans never force a full reload.
+    """
+    # Re-emits database change notifications so they are handled on the UI thread
+    library_changed = pyqtSignal(str, list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._search_text = ''
+        self._next_key = None
+        self._has_more = False
+        self._clear_columns()
+        self.library_changed.connect(self._apply_change)
+        database.add_change_listener(self.library_changed.emit)
+
+    def _clear_columns(self):
+        self._titles = []
+        self._artists = []
+        self._albums = []
+        self._years = []
+        self._genres = []
+        self._ratings = array('B')
+        self._filepaths = []
+        self._ids = array('q')
+        self._text_columns = [self._titles, self._artists, self._albums, self._years, self._genres]
+        self._row_of_id = None
+
+    def _set_row(self, row, values):
+        title, artist, album, year, genre, rating, filepath, song_id = values
+        self._titles[row] = str(title)
+        self._artists[row] = sys.intern(str(artist))
+        self._albums[row] = sys.intern(str(album))
+        self._years[row] = sys.intern(str(year))
+        self._genres[row] = sys.intern(str(genre))
+        self._ratings[row] = max(0, min(int(rating or 0), 5))
+        self._filepaths[row] = filepath
+        self._ids[row] = song_id
+
+    def _insert_row(self, row, values):
+        for column in self._text_columns:
+            column.insert(row, '')
+        self._ratings.insert(row, 0)
+        self._filepaths.insert(row, '')
+        self._ids.insert(row, 0)
+        self._set_row(row, values)
+
+    def _remove_row(self, row):
+        for column in self._text_columns:
+            del column[row]
+        del self._ratings[row]
+        del self._filepaths[row]
+        del self._ids[row]
+
+    def _append_rows(self, rows):
+        for values in rows:
+            self._insert_row(len(self._ids), values)
+
+    def reload(self, search_text=''):
+        """Discards loaded rows and starts again, optionally limited to FTS search results."""
+        self.beginResetModel()
+        self._clear_columns()
+        self._search_text = search_text
+        self._next_key = None
+        if search_text:
+            self._append_rows(database.search_songs(search_text))
+            self._has_more = False
+        else:
+            self._has_more = True
+        self.endResetModel()
+
+    def is_searching(self):
+        return bool(self._search_text)
+
+    def filepath(self, row):
+        return self._filepaths[row]
+
+    # --- Incremental updates ---
+    def _sort_key(self, row):
+        # Mirrors the 'artist' sort order of database.get_songs_page()
+        return (self._artists[row], self._albums[row], self._titles[row], self._ids[row])
+
+    @staticmethod
+    def _values_key(values):
+        return (str(values[1]), str(values[2]), str(values[0]), values[7])
+
+    def _insert_position(self, key, skip_row=None):
+        """Binary-searches loaded rows for key, ignoring skip_row. Returns None if it falls past the loaded range."""
+        count = len(self._ids) - (0 if skip_row is None else 1)
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            actual = mid if skip_row is None or mid < skip_row else mid + 1
+            if self._sort_key(actual) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == count and self._has_more:
+            # Rows after the last loaded one arrive through fetchMore()
+            return None
+        return lo
+
+    def _find_row(self, song_id):
+        if self._row_of_id is None:
+            self._row_of_id = {value: row for row, value in enumerate(self._ids)}
+        return self._row_of_id.get(song_id)
+
+    def _apply_change(self, kind, rows):
+        if kind == 'insert':
+            self._apply_inserts(rows)
+        elif kind == 'update':
+            self._apply_updates(rows)
+        elif kind == 'delete':
+            self._apply_deletes(rows)
+
+    def _apply_inserts(self, rows):
+        if self._search_text:
+            return
+        # A page fetched after the write may already hold some of these rows
+        rows = [values for values in rows if self._find_row(values[7]) is None]
+        for values in sorted(rows, key=self._values_key):
+            position = self._insert_position(self._values_key(values))
+            if position is None:
+                continue
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._insert_row(position, values)
+            self.endInsertRows()
+        self._row_of_id = None
+
+    def _apply_updates(self, rows):
+        for values in rows:
+            row = self._find_row(values[7])
+            if row is None:
+                continue
+            key = self._values_key(values)
+            if self._search_text or key == self._sort_key(row):
+                self._set_row(row, values)
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(HEADERS) - 1))
+                continue
+            # The sort key changed, so move the row to its new place
+            position = self._insert_position(key, skip_row=row)
+            if position is None:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                self._remove_row(row)
+                self.endRemoveRows()
+            else:
+                destination = position if position < row else position + 1
+                if destination not in (row, row + 1):
+                    self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), destination)
+                    self._remove_row(row)
+                    self._insert_row(position, values)
+                    self.endMoveRows()
+                else:
+                    self._set_row(row, values)
+                    self.dataChanged.emit(self.index(row, 0), self.index(row, len(HEADERS) - 1))
+            self._row_of_id = None
+
+    def _apply_deletes(self, song_ids):
+        rows = sorted((row for row in map(self._find_row, song_ids) if row is not None), reverse=True)
+        for row in rows:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self._remove_row(row)
+            self.endRemoveRows()
+        if rows:
+            self._row_of_id = None
+
+    # --- QAbstractTableModel interface ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._filepaths)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        row, column = index.row(), index.column()
+        if column == RATING_COLUMN:
+            return self._ratings[row]
+        if column == FILEPATH_COLUMN:
+            return self._filepaths[row]
+        return self._text_columns[column][row]
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._has_more
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._has_more:
+            return
+        rows, self._next_key = database.get_songs_page(self._next_key, PAGE_SIZE)
+        self._has_more = self._next_key is not None
+        if rows:
+            first = len(self._filepaths)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._append_rows(rows)
+            self.endInsertRows()
+            self._row_of_id = None
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from PyQt6.QtCore import QCoreApplication
+import database
+from ui import library_model
+from ui.library_model import LibraryTableModel
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+def _song(artist, album, title):
+    return f'/music/{artist}/{album}/{title}.mp3', {'title': title, 'artist': artist, 'album': album, 'year': '2000', 'genre': 'Rock'}
+
+
+class IncrementalUpdateTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        patches = [mock.patch.object(database, 'DB_FILE', os.path.join(self.directory, 'library.db')),
+                   mock.patch.object(database, '_change_listeners', []),
+                   mock.patch.object(library_model, 'PAGE_SIZE', 4)]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        database.init_db()
+        database.add_songs_bulk(_song(artist, album, title) for artist in 'BDF' for album in 'xy' for title in 'ac')
+        self.model = LibraryTableModel()
+        self.model.reload()
+
+    def tearDown(self):
+        database.close_connection()
+        shutil.rmtree(self.directory)
+
+    def fetch_all(self):
+        while self.model.canFetchMore():
+            self.model.fetchMore()
+
+    def loaded(self):
+        return [self.model.filepath(row) for row in range(self.model.rowCount())]
+
+    def assertInDatabaseOrder(self):
+        rows, _ = database.get_songs_page(limit=10000)
+        expected = [row[6] for row in rows]
+        self.assertEqual(self.loaded(), expected[:self.model.rowCount()])
+
+    def test_inserts_land_in_sort_order(self):
+        self.fetch_all()
+        database.add_songs_bulk([_song('A', 'x', 'a'), _song('D', 'x', 'b'), _song('G', 'z', 'z')])
+        self.assertEqual(self.model.rowCount(), 15)
+        self.assertInDatabaseOrder()
+
+    def test_inserts_past_the_loaded_rows_wait_for_fetch_more(self):
+        self.model.fetchMore()
+        database.add_songs_bulk([_song('A', 'x', 'a'), _song('F', 'z', 'z')])
+        self.assertEqual(self.model.rowCount(), 5)
+        self.assertInDatabaseOrder()
+        self.fetch_all()
+        self.assertEqual(self.model.rowCount(), 14)
+        self.assertInDatabaseOrder()
+
+    def test_update_moves_row(self):
+        self.fetch_all()
+        filepath, metadata = _song('B', 'x', 'a')
+        database.update_song_metadata(filepath, dict(metadata, artist='E'))
+        self.assertEqual(self.model.rowCount(), 12)
+        self.assertInDatabaseOrder()
+        row = self.loaded().index(filepath)
+        self.assertEqual(self.model.data(self.model.index(row, 1)), 'E')
+
+    def test_update_in_place(self):
+        self.fetch_all()
+        filepath, metadata = _song('D', 'y', 'c')
+        database.update_song_metadata(filepath, dict(metadata, genre='Jazz'))
+        self.assertInDatabaseOrder()
+        self.assertEqual(self.model.data(self.model.index(self.loaded().index(filepath), 4)), 'Jazz')
+
+    def test_update_past_the_loaded_rows(self):
+        self.model.fetchMore()
+        filepath, metadata = _song('B', 'x', 'a')
+        database.update_song_metadata(filepath, dict(metadata, artist='Z'))
+        self.assertEqual(self.model.rowCount(), 3)
+        self.assertInDatabaseOrder()
+        self.fetch_all()
+        self.assertEqual(self.loaded().count(filepath), 1)
+        self.assertInDatabaseOrder()
+
+    def test_deletes(self):
+        self.fetch_all()
+        database.delete_songs([_song('B', 'x', 'a')[0], _song('F', 'y', 'c')[0]])
+        self.assertEqual(self.model.rowCount(), 10)
+        self.assertInDatabaseOrder()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,35 +4,59 @@ import subprocess
 import time
 import platform
 import ctypes
+import importlib
+import threading
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLineEdit, QPushButton, QFrame, QSplitter, QTableView, QListWidget, QListWidgetItem,
+    QLineEdit, QPushButton, QFrame, QSplitter, QTableView,
     QComboBox, QProgressBar, QLabel, QStatusBar, QMessageBox,
     QInputDialog, QMenu, QStyledItemDelegate, QTableWidgetItem
 )
-from PyQt6.QtGui import QStandardItemModel, QStandardItem, QAction, QKeyEvent, QPainter, QColor, QIcon
+from PyQt6.QtGui import QAction, QKeyEvent, QPainter, QColor, QIcon
 from PyQt6.QtCore import Qt, QTimer, QModelIndex, QUrl
-from PyQt6.QtMultimedia import QAudioOutput, QMediaPlayer
-
-import google.generativeai as genai
-
-# Import dialogs and workers from their respective modules
-from .dialogs import SettingsDialog, AdvancedBurnSettingsDialog, EditSongDialog
-from workers.download_worker import DownloadWorker
-from workers.tagger_worker import TaggerWorker
-from workers.burn_worker import BurnWorker
-from workers.gemini_sender import GeminiSender
-from workers.spotify_worker import SpotifyWorker
-from workers.library_worker import LibraryWorker
+
+# Import dialogs and workers from their respective modules. Workers that pull in
+# heavy packages (pycdlib, yt_dlp, spotipy, musicbrainzngs, google.generativeai)
+# and QtMultimedia are imported where they are first used; see WARM_UP_MODULES.
+from .dialogs import SettingsDialog, AdvancedBurnSettingsDialog, EditSongDialog, DuplicatesDialog, DriveSelectionDialog, MultiBurnProgressDialog, DiscPlanDialog, BurnHistoryDialog
+from workers.library_worker import LibraryWorker, file_stats
+from workers.folder_watcher import FolderWatcher
+from workers.media_info_worker import MediaInfoWorker
+from workers.drive_watcher import DriveWatcher
 import database
+import disc
+import audio_cd
+import disc_planner
+import transcoder
 import config
 import constants
+import startup_timing
 from .ui_setup import UiSetup
+from .library_model import LibraryTableModel, RATING_COLUMN, FILEPATH_COLUMN
+from .burn_queue_model import BurnQueueModel
+
+# Imported on a background thread once the window has painted, so the first
+# burn, download or chat doesn't wait for them.
+WARM_UP_MODULES = (
+    'workers.burn_worker', 'workers.multi_burn_worker', 'workers.audio_cd_worker',
+    'workers.download_worker', 'workers.spotify_worker', 'workers.tagger_worker',
+    'workers.gemini_sender', 'google.generativeai', 'PyQt6.QtMultimedia',
+)
+
+def _warm_up():
+    started = time.perf_counter()
+    for name in WARM_UP_MODULES:
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            # Reported properly when the feature is first used
+            print(f"[Startup] Could not preload {name}: {e}")
+    print(f"[Startup] Background warm-up finished in {(time.perf_counter() - started) * 1000:.1f} ms")
 
 class StarRatingDelegate(QStyledItemDelegate):
     """A custom delegate to display integer ratings as stars."""
     def paint(self, painter: QPainter, option, index: QModelIndex):
-        if index.column() == 5: # The rating column
+        if index.column() == RATING_COLUMN:
             rating = index.model().data(index, Qt.ItemDataRole.DisplayRole)
             if rating is not None:
                 rating = int(rating)
@@ -93,6 +117,7 @@ class AlphaBurnApp(QMainWindow):
             else:
                 raise NotImplementedError("Wipe not supported on this OS.")
             self.statusBar().showMessage(f"Successfully wiped drive {drive}")
+            self.refresh_media_capacity()
         except subprocess.CalledProcessError as e:
             self.statusBar().showMessage(f"Failed to wipe drive {drive}: {e.stderr}")
         except Exception as e:
@@ -141,19 +166,31 @@ class AlphaBurnApp(QMainWindow):
         if not selected_indexes:
             self.statusBar().showMessage("No track selected.")
             return
-        filepath = self.library_model.item(selected_indexes[0].row(), 6).text()
+        filepath = self.library_model.filepath(selected_indexes[0].row())
         if not os.path.exists(filepath):
             self.statusBar().showMessage("File not found.")
             return
-        self.media_player.setSource(QUrl.fromLocalFile(filepath))
-        self.media_player.play()
+        player = self._get_media_player()
+        player.setSource(QUrl.fromLocalFile(filepath))
+        player.play()
         self.statusBar().showMessage(f"Playing: {os.path.basename(filepath)}")
 
+    def _get_media_player(self):
+        """Creates the media player on first playback; QtMultimedia is slow to load."""
+        if self.media_player is None:
+            from PyQt6.QtMultimedia import QAudioOutput, QMediaPlayer
+            self.media_player = QMediaPlayer()
+            self.audio_output = QAudioOutput()
+            self.media_player.setAudioOutput(self.audio_output)
+        return self.media_player
+
     def pause_audio(self):
+        if self.media_player is None: return
         self.media_player.pause()
         self.statusBar().showMessage("Playback paused.")
 
     def stop_audio(self):
+        if self.media_player is None: return
         self.media_player.stop()
         self.statusBar().showMessage("Playback stopped.")
     def showEvent(self, event):
@@ -176,8 +213,23 @@ class AlphaBurnApp(QMainWindow):
             os.makedirs(self.download_path)
 
         database.init_db()
+        startup_timing.mark('db init')
         self.download_queue = []
         self.is_batch_downloading = False
+        # Free space on the media in the selected drive, once read
+        self.disc_capacity_bytes = None
+        # Media reads still running; kept referenced until QThread.finished, as a read can take up to 30 s
+        self.media_info_workers = set()
+        self.media_info_sequence = 0
+        self.drive_watcher = None
+        # drives.DriveInfo by drive name, from the drive watcher
+        self.drive_infos = {}
+        # Created on first playback (see _get_media_player)
+        self.media_player = None
+        self.audio_output = None
+        # Burn queues still to burn from a multi-disc plan
+        self.pending_disc_queues = []
+        self.planned_disc_count = 0
 
         self.chat_history = None  # Will be set by UiSetup
         self.chat_input = None    # Will be set by UiSetup
@@ -187,29 +239,52 @@ class AlphaBurnApp(QMainWindow):
 
         self._create_actions()
         self._create_menus()
+        startup_timing.mark('window setup')
         self._setup_library_model()
+        self.burn_queue_model = BurnQueueModel(self); self.burn_queue_model.audio_info_updated.connect(self.update_capacity_meter)
+        self.burn_queue_list.setModel(self.burn_queue_model)
+        # Data discs stay the default; "Standard Audio CD" switches burns to audio CD mode
+        self._migrate_config_presets()
+        self._load_presets()
+        self.preset_selector.setCurrentText("MP3 CD")
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(constants.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.load_library_from_db)
         self.load_library_from_db()
+        startup_timing.mark('model load')
         self._populate_drives()
 
+        self.folder_watcher = None
+        self.library_worker = None
+        self.library_rescan_pending = False
+        self.watch_scan_worker = None
+        self.pending_watch_paths = set()
+        self.restart_folder_watcher()
+
         self.statusBar().showMessage("Ready.")
         self.credit_label = QLabel("Developed by, Alpha & Joshua Perry")
         self.statusBar().addPermanentWidget(self.credit_label)
+        startup_timing.mark('window init')
 
-        # Initialize Media Player
-        self.media_player = QMediaPlayer()
-        self.audio_output = QAudioOutput()
-        self.media_player.setAudioOutput(self.audio_output)
+    def start_background_warm_up(self):
+        """Preloads WARM_UP_MODULES off the UI thread. Called once the window has painted."""
+        threading.Thread(target=_warm_up, name="WarmUp", daemon=True).start()
 
 
     def _create_actions(self):
         self.open_roadmap_action = QAction("&Open Roadmap", self, triggered=self.open_roadmap)
         self.settings_action = QAction("&Settings", self, triggered=self.open_settings)
         self.rescan_library_action = QAction("&Rescan Library Folder", self, triggered=self.rescan_library_folder)
+        self.find_duplicates_action = QAction("Find &Duplicates", self, triggered=self.open_duplicates)
+        self.burn_history_action = QAction("Burn &History", self, triggered=self.open_burn_history)
 
     def _create_menus(self):
         file_menu = self.menuBar().addMenu("&File")
         file_menu.addAction(self.settings_action)
         file_menu.addAction(self.rescan_library_action)
+        file_menu.addAction(self.find_duplicates_action)
+        file_menu.addAction(self.burn_history_action)
         file_menu.addSeparator()
         file_menu.addAction(QAction("E&xit", self, triggered=self.close))
         help_menu = self.menuBar().addMenu("&Help")
@@ -218,6 +293,12 @@ class AlphaBurnApp(QMainWindow):
     def open_settings(self):
         SettingsDialog(self).exec()
 
+    def open_burn_history(self):
+        BurnHistoryDialog(self).exec()
+
+    def open_duplicates(self):
+        DuplicatesDialog(self).exec()
+
     def open_advanced_burn_settings(self):
         dialog = AdvancedBurnSettingsDialog(self)
         dialog.exec()
@@ -230,69 +311,136 @@ class AlphaBurnApp(QMainWindow):
         except: QMessageBox.critical(self, "Error", "Could not open Project Roadmap.txt.")
 
     def _setup_library_model(self):
-        self.library_model = QStandardItemModel(0, 7)
-        self.library_model.setHorizontalHeaderLabels(['Title', 'Artist', 'Album', 'Year', 'Genre', 'Rating', 'File Path'])
+        self.library_model = LibraryTableModel(self)
         self.library_table.setModel(self.library_model)
-        self.library_table.setItemDelegateForColumn(5, StarRatingDelegate(self))
+        self.library_table.setItemDelegateForColumn(RATING_COLUMN, StarRatingDelegate(self))
         self.library_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         self.library_table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
-        self.library_table.setColumnHidden(6, True)
+        self.library_table.setColumnHidden(FILEPATH_COLUMN, True)
         self.library_table.horizontalHeader().setStretchLastSection(True)
         self.library_table.setColumnWidth(0, constants.TITLE_WIDTH)
         self.library_table.setColumnWidth(1, constants.ARTIST_WIDTH)
         self.library_table.setColumnWidth(2, constants.ALBUM_WIDTH)
-        self.library_table.setColumnWidth(5, constants.RATING_WIDTH)
+        self.library_table.setColumnWidth(RATING_COLUMN, constants.RATING_WIDTH)
 
     def load_library_from_db(self):
         print("[DEBUG] Loading library from DB...")
-        self.library_model.removeRows(0, self.library_model.rowCount())
-        songs = database.get_all_songs()
-        print(f"[DEBUG] Songs from DB: {songs}")
-        for song_data in songs:
-            row = [QStandardItem(str(field)) for field in song_data]
-            self.library_model.appendRow(row)
-        self.statusBar().showMessage(f"Library loaded with {len(songs)} tracks.", 3000)
+        search_text = self.library_search_input.text().strip()
+        # Rows are fetched lazily by the model as the table scrolls
+        self.library_model.reload(search_text)
+        if search_text:
+            self.statusBar().showMessage(f"{self.library_model.rowCount()} tracks match '{search_text}'.", 3000)
+        else:
+            self.statusBar().showMessage(f"Library loaded with {database.count_songs()} tracks.", 3000)
+
+    def on_library_search_changed(self, text):
+        # Restarting the timer on every keystroke debounces the query
+        self.search_timer.start()
 
     def rescan_library_folder(self):
+        if self.library_worker is not None and self.library_worker.isRunning():
+            # One full scan at a time; this one starts when the running scan's thread has ended
+            self.library_rescan_pending = True
+            return
+        self.library_rescan_pending = False
         self.rescan_library_action.setEnabled(False)
         self.library_worker = LibraryWorker(self.download_path)
-        self.library_worker.finished.connect(self.on_library_scan_finished)
+        self.library_worker.scan_finished.connect(self.on_library_scan_finished)
         self.library_worker.status_update.connect(self.statusBar().showMessage)
+        # Only once the thread has ended, so a new rescan never replaces a running worker
+        self.library_worker.finished.connect(self._on_library_worker_done)
         self.library_worker.start()
 
+    def _on_library_worker_done(self):
+        self.rescan_library_action.setEnabled(True)
+        if self.library_rescan_pending: self.rescan_library_folder()
+
     def on_library_scan_finished(self, found_new):
         print(f"[DEBUG] Library scan finished. Found new: {found_new}")
-        if found_new > 0:
+        # New rows have already reached the library model as change notifications
+        if self.library_worker.failed:
+            QMessageBox.warning(self, "Rescan Failed", f"The library scan did not complete; {found_new} new tracks were added before it stopped.")
+        elif found_new > 0:
             QMessageBox.information(self, "Rescan Complete", f"Found and added {found_new} new tracks.")
-            self.load_library_from_db()
         else:
             QMessageBox.information(self, "Rescan Complete", "No new tracks were found.")
-            self.load_library_from_db()
         self.statusBar().showMessage("Ready.", 3000)
-        self.rescan_library_action.setEnabled(True)
+
+    def restart_folder_watcher(self):
+        """Starts, restarts or stops the background folder watcher to match the settings."""
+        if self.folder_watcher is not None:
+            self.folder_watcher.requestInterruption()
+            self.folder_watcher.wait()
+            self.folder_watcher = None
+        if config.get_setting('LIBRARY', 'watch_folders', 'false').lower() != 'true':
+            return
+        folders = {config.get_setting('PATHS', 'DownloadFolder'), config.get_setting('PATHS', 'LocalMusicFolder')}
+        self.folder_watcher = FolderWatcher(sorted(folder for folder in folders if folder))
+        self.folder_watcher.paths_changed.connect(self.on_watched_paths_changed)
+        self.folder_watcher.status_update.connect(lambda msg: self.statusBar().showMessage(msg, 3000))
+        self.folder_watcher.start()
+
+    def on_watched_paths_changed(self, paths):
+        self.pending_watch_paths.update(paths)
+        if self.watch_scan_worker is None:
+            self._start_watch_scan()
+
+    def _start_watch_scan(self):
+        paths = sorted(self.pending_watch_paths)
+        self.pending_watch_paths.clear()
+        # Only the changed paths go through the incremental scanner, never a full rescan
+        self.watch_scan_worker = LibraryWorker(self.download_path, changed_paths=paths)
+        self.watch_scan_worker.status_update.connect(lambda msg: self.statusBar().showMessage(msg, 3000))
+        # QThread.finished rather than scan_finished: the worker is released only once run() has returned
+        self.watch_scan_worker.finished.connect(self.on_watch_scan_finished)
+        self.watch_scan_worker.start()
+
+    def on_watch_scan_finished(self):
+        self.watch_scan_worker.deleteLater()
+        self.watch_scan_worker = None
+        if self.pending_watch_paths:
+            self._start_watch_scan()
+
+    def closeEvent(self, event):
+        for watcher in (self.folder_watcher, self.drive_watcher):
+            if watcher is not None:
+                watcher.requestInterruption()
+                watcher.wait()
+        for worker in list(self.media_info_workers):
+            worker.wait()
+        self.burn_queue_model.stop_workers()
+        super().closeEvent(event)
 
     def _populate_drives(self):
-        # Windows: Use Win32_LogicalDisk to find optical drives (DriveType 5)
-        import platform
-        self.drive_selector.clear()
-        drives = []
-        if platform.system() == "Windows":
-            try:
-                import subprocess
-                result = subprocess.run([
-                    "powershell", "-Command",
-                    "Get-WmiObject Win32_LogicalDisk | Where-Object { $_.DriveType -eq 5 } | Select-Object -ExpandProperty DeviceID"
-                ], capture_output=True, text=True)
-                for line in result.stdout.splitlines():
-                    line = line.strip()
-                    if line:
-                        drives.append(line)
-            except Exception as e:
-                drives = []
-        if not drives:
-            self.drive_selector.addItem("No drives found")
-        else:
-            self.drive_selector.addItems(drives)
+        """Starts the background drive watcher, or makes it rescan now if it is running."""
+        if self.drive_watcher is not None and self.drive_watcher.isRunning(): self.drive_watcher.refresh(); return
+        self.drive_watcher = DriveWatcher(); self.drive_watcher.drives_changed.connect(self.on_drives_changed)
+        self.drive_watcher.status_update.connect(lambda msg: self.statusBar().showMessage(msg, 3000)); self.drive_watcher.start()
+
+    def on_drives_changed(self, found):
+        """Updates the drive selector and cd_state from the watcher; rereads the media if the selected drive's changed."""
+        previous, self.drive_infos = self.drive_infos, {info.name: info for info in found}
+        current = self.drive_selector.currentText(); names = list(self.drive_infos)
+        if names != [self.drive_selector.itemText(i) for i in range(self.drive_selector.count())]:
+            self.drive_selector.blockSignals(True); self.drive_selector.clear()
+            if names: self.drive_selector.addItems(names)
+            else: self.drive_selector.addItem("No drives found")
+            if current in names: self.drive_selector.setCurrentText(current)
+            self.drive_selector.blockSignals(False)
+        for i, name in enumerate(names): self.drive_selector.setItemData(i, self.drive_infos[name].description, Qt.ItemDataRole.ToolTipRole)
+        drive = self.drive_selector.currentText()
+        self.update_cd_state()
+        if drive != current or previous.get(drive) != self.drive_infos.get(drive): self.refresh_media_capacity()
+
+    def update_cd_state(self):
+        """Fills cd_state with what drive discovery knows about the selected drive and its media."""
+        info = self.drive_infos.get(self.drive_selector.currentText())
+        self.cd_state['drive'] = info.name if info else None
+        if info is None: return
+        self.cd_state['rewritable'] = info.rewritable; self.cd_state['finalized'] = info.finalized
+        self.cd_state['needs_wipe'] = bool(info.rewritable and info.media_state in ('appendable', 'complete'))
+        self.cd_state['space_mb'] = info.capacity_bytes / (1024 * 1024) if info.capacity_bytes else None
+        if not info.media: self.cd_state['files'] = []
 
     def browse_music_directory(self):
         from PyQt6.QtWidgets import QFileDialog
@@ -301,7 +449,8 @@ class AlphaBurnApp(QMainWindow):
             import config
             config.update_setting('PATHS', 'DownloadFolder', dir_path)
             self.download_path = dir_path
-            self.load_library_from_db()
+            self.restart_folder_watcher()
+            self.rescan_library_folder()
 
     def show_library_context_menu(self, position):
         indexes = self.library_table.selectionModel().selectedRows()
@@ -309,6 +458,8 @@ class AlphaBurnApp(QMainWindow):
         menu = QMenu()
         edit_action = QAction("Edit Metadata", self, triggered=self.edit_selected_song)
         menu.addAction(edit_action)
+        menu.addAction(QAction("Add to Burn Queue", self, triggered=self.add_selected_to_burn_queue))
+        menu.addAction(QAction("Split Selection Across Discs...", self, triggered=self.split_selection_across_discs))
         rating_menu = menu.addMenu("Set Rating")
         for i in range(1, 6):
             rating_action = QAction(f"{'★' * i}{'☆' * (5-i)}", self)
@@ -319,49 +470,192 @@ class AlphaBurnApp(QMainWindow):
     def edit_selected_song(self):
         indexes = self.library_table.selectionModel().selectedRows()
         if not indexes: return
-        filepath = self.library_model.item(indexes[0].row(), 6).text()
+        filepath = self.library_model.filepath(indexes[0].row())
         dialog = EditSongDialog(filepath, self)
-        if dialog.exec(): self.load_library_from_db()
+        dialog.exec()
 
     def set_song_rating(self, rating):
         indexes = self.library_table.selectionModel().selectedRows()
         if not indexes: return
-        for index in indexes:
-            filepath = self.library_model.item(index.row(), 6).text()
-            database.update_song_rating(filepath, rating)
-            self.library_model.item(index.row(), 5).setText(str(rating))
+        # The model picks up the new ratings from the database's change notification
+        database.update_ratings_bulk([(self.library_model.filepath(index.row()), rating) for index in indexes])
 
     def keyPressEvent(self, e: QKeyEvent):
         if e.key() == Qt.Key.Key_Delete and self.burn_queue_list.hasFocus():
-            for item in self.burn_queue_list.selectedItems(): self.burn_queue_list.takeItem(self.burn_queue_list.row(item))
+            self.burn_queue_model.remove_rows(index.row() for index in self.burn_queue_list.selectionModel().selectedRows())
             self.update_capacity_meter()
         else: super().keyPressEvent(e)
 
-    def add_to_burn_queue_from_index(self, index): self.add_filepath_to_burn_queue(self.library_model.item(index.row(), 6).text())
+    def add_to_burn_queue_from_index(self, index): self.add_filepath_to_burn_queue(self.library_model.filepath(index.row()))
 
     def add_filepath_to_burn_queue(self, filepath):
-        if any(self.burn_queue_list.item(i).data(Qt.ItemDataRole.UserRole) == filepath for i in range(self.burn_queue_list.count())): return
-        song_info = database.get_song_by_filepath(filepath)
-        if song_info:
-            item = QListWidgetItem(f"{song_info[1]} - {song_info[0]}"); item.setData(Qt.ItemDataRole.UserRole, filepath); self.burn_queue_list.addItem(item); self.update_capacity_meter()
+        if self.burn_queue_model.add_many([filepath]): self.update_capacity_meter()
+
+    def add_selected_to_burn_queue(self):
+        indexes = self.library_table.selectionModel().selectedRows()
+        if self.burn_queue_model.add_many([self.library_model.filepath(index.row()) for index in sorted(indexes, key=lambda index: index.row())]):
+            self.update_capacity_meter()
+
+    def split_selection_across_discs(self):
+        indexes = sorted(self.library_table.selectionModel().selectedRows(), key=lambda index: index.row())
+        self.open_disc_planner([self.library_model.filepath(index.row()) for index in indexes])
+
+    def split_queue_across_discs(self):
+        self.open_disc_planner(self.burn_queue_model.filepaths())
+
+    def open_disc_planner(self, filepaths):
+        """Plans filepaths onto discs of the current kind and size and, if accepted, burns them one after another."""
+        if not filepaths: QMessageBox.warning(self, "Nothing to Split", "Select some songs or fill the burn queue first."); return
+        if self.is_audio_cd_mode():
+            dialog = DiscPlanDialog(filepaths, disc_planner.audio_disc_capacity(self.audio_cd_capacity_frames()), by_duration=True, max_items=audio_cd.MAX_TRACKS, parent=self)
+        else:
+            cap_bytes = self.disc_capacity_bytes if self.disc_capacity_bytes else constants.DEFAULT_DISC_CAPACITY_MB * 1024 * 1024
+            dialog = DiscPlanDialog(filepaths, disc_planner.data_disc_capacity(cap_bytes), parent=self)
+        if not dialog.exec() or not dialog.plan: return
+        self.pending_disc_queues = list(dialog.plan); self.planned_disc_count = len(dialog.plan)
+        self._burn_next_planned_disc()
+
+    def _burn_next_planned_disc(self):
+        number = self.planned_disc_count - len(self.pending_disc_queues) + 1
+        self.burn_queue_model.set_filepaths(self.pending_disc_queues.pop(0)); self.update_capacity_meter()
+        self.statusBar().showMessage(f"Burning disc {number} of {self.planned_disc_count}...")
+        self.start_burn_process()
+        if self.burn_button.isEnabled(): self.pending_disc_queues = []  # The burn did not start
+
+    def is_audio_cd_mode(self):
+        return self.preset_selector.currentText() == audio_cd.AUDIO_CD_PRESET
+
+    def audio_cd_capacity_frames(self):
+        if self.disc_capacity_bytes:
+            return self.disc_capacity_bytes // disc.SECTOR_SIZE  # Blank media reports its length in sectors
+        try:
+            minutes = int(config.get_setting('BURN_SETTINGS', 'audio_cd_minutes', str(audio_cd.DEFAULT_DISC_MINUTES)))
+        except ValueError:
+            minutes = audio_cd.DEFAULT_DISC_MINUTES
+        return audio_cd.capacity_frames(minutes)
+
+    def fit_target_bytes(self):
+        """Disc size to re-encode the queue down to, or None to burn the original files."""
+        choice = self.fit_to_disc_selector.currentText()
+        if choice == "Fit to Disc":
+            return self.disc_capacity_bytes if self.disc_capacity_bytes else constants.DEFAULT_DISC_CAPACITY_MB * 1024 * 1024
+        if choice.startswith("Fit to "):
+            return int(choice.split()[2]) * 1024 * 1024
+        return None
+
+    def audio_cd_frames(self):
+        return audio_cd.LEAD_PREGAP_FRAMES + self.burn_queue_model.audio_frames if self.burn_queue_model.rowCount() else 0
 
     def update_capacity_meter(self):
-        total_size = sum(os.path.getsize(self.burn_queue_list.item(i).data(Qt.ItemDataRole.UserRole)) for i in range(self.burn_queue_list.count()) if os.path.exists(self.burn_queue_list.item(i).data(Qt.ItemDataRole.UserRole)))
-        total_mb = total_size / (1024*1024); cap_mb = 700.0; pct = (total_mb / cap_mb) * 100 if cap_mb > 0 else 0
-        self.capacity_progress.setStyleSheet("QProgressBar::chunk { background-color: red; }" if pct > 100 else ""); self.capacity_progress.setValue(int(pct)); self.capacity_label.setText(f"{total_mb:.1f} MB / {cap_mb:.1f} MB ({pct:.1f}%)")
+        if self.is_audio_cd_mode():
+            self.fit_to_disc_selector.setEnabled(False)  # Audio CDs are decoded, not re-encoded
+            total_frames = self.audio_cd_frames(); cap_frames = self.audio_cd_capacity_frames(); pct = (total_frames / cap_frames) * 100 if cap_frames > 0 else 0
+            self.capacity_progress.setStyleSheet("QProgressBar::chunk { background-color: red; }" if pct > 100 else ""); self.capacity_progress.setValue(min(int(pct), 100)); self.capacity_label.setText(f"{audio_cd.format_frames(total_frames)} / {audio_cd.format_frames(cap_frames)} ({pct:.1f}%)")
+            return
+        self.fit_to_disc_selector.setEnabled(True)
+        cap_bytes = self.disc_capacity_bytes if self.disc_capacity_bytes else constants.DEFAULT_DISC_CAPACITY_MB * 1024 * 1024
+        fit_bytes = self.fit_target_bytes()
+        if fit_bytes and self.burn_queue_model.rowCount():
+            tracks = self.burn_queue_model.fit_tracks(); bitrate = transcoder.choose_bitrate(tracks, fit_bytes)
+            fit_mb = fit_bytes / (1024*1024); total_mb = transcoder.fitted_bytes(tracks, bitrate or transcoder.MIN_FIT_BITRATE) / (1024*1024); pct = (total_mb / fit_mb) * 100
+            self.capacity_progress.setStyleSheet("QProgressBar::chunk { background-color: red; }" if bitrate is None else ""); self.capacity_progress.setValue(min(int(pct), 100))
+            self.capacity_label.setText(f"{total_mb:.1f} MB / {fit_mb:.1f} MB at {bitrate} kbps" if bitrate else f"Doesn't fit {fit_mb:.1f} MB even at {transcoder.MIN_FIT_BITRATE} kbps")
+            return
+        total_bytes = self.burn_queue_model.tally.image_bytes if self.burn_queue_model.rowCount() else 0
+        total_mb = total_bytes / (1024*1024); cap_mb = cap_bytes / (1024*1024); pct = (total_mb / cap_mb) * 100 if cap_mb > 0 else 0
+        self.capacity_progress.setStyleSheet("QProgressBar::chunk { background-color: red; }" if pct > 100 else ""); self.capacity_progress.setValue(min(int(pct), 100)); self.capacity_label.setText(f"{total_mb:.1f} MB / {cap_mb:.1f} MB ({pct:.1f}%)")
 
-    
+    def refresh_media_capacity(self):
+        """Reads the free space on the selected drive's media in the background."""
+        drive = self.drive_selector.currentText()
+        self.disc_capacity_bytes = None
+        self.update_capacity_meter()
+        if not drive or "No drives" in drive or "Error" in drive:
+            return
+        self.media_info_sequence += 1
+        worker = MediaInfoWorker(drive, self.media_info_sequence)
+        worker.media_read.connect(self.on_media_info_read)
+        worker.finished.connect(lambda: self._release_media_info_worker(worker))
+        self.media_info_workers.add(worker)
+        worker.start()
+
+    def _release_media_info_worker(self, worker):
+        self.media_info_workers.discard(worker)
+        worker.deleteLater()
+
+    def on_media_info_read(self, drive, free_bytes, sequence):
+        if sequence != self.media_info_sequence or drive != self.drive_selector.currentText():
+            return  # A newer read was started, or the selection changed while the drive was being read
+        self.disc_capacity_bytes = free_bytes
+        self.update_capacity_meter()
+        if free_bytes is None:
+            self.statusBar().showMessage(f"Could not read media in {drive}; assuming a {constants.DEFAULT_DISC_CAPACITY_MB} MB disc.", 5000)
+        else:
+            self.statusBar().showMessage(f"Media in {drive}: {free_bytes / (1024*1024):.1f} MB free.", 5000)
 
     def start_burn_process(self):
-        if self.burn_queue_list.count() == 0: QMessageBox.warning(self, "Empty Queue", "Burn queue is empty."); return
+        if self.burn_queue_model.rowCount() == 0: QMessageBox.warning(self, "Empty Queue", "Burn queue is empty."); return
         drive = self.drive_selector.currentText()
         if not drive or "No drives" in drive or "Error" in drive: QMessageBox.warning(self, "No Drive", "Please select a valid optical drive."); return
-        file_list = [self.burn_queue_list.item(i).data(Qt.ItemDataRole.UserRole) for i in range(self.burn_queue_list.count())]
+        file_list = self.burn_queue_model.filepaths()
+        if self.is_audio_cd_mode():
+            if len(file_list) > audio_cd.MAX_TRACKS: QMessageBox.warning(self, "Too Many Tracks", f"An audio CD holds at most {audio_cd.MAX_TRACKS} tracks."); return
+            if self.audio_cd_frames() > self.audio_cd_capacity_frames(): QMessageBox.warning(self, "Disc Full", f"The queue plays for {audio_cd.format_frames(self.audio_cd_frames())}, longer than the {audio_cd.format_frames(self.audio_cd_capacity_frames())} the disc holds."); return
+            self.burn_button.setEnabled(False)
+            from workers.audio_cd_worker import AudioCdWorker
+            self.burn_worker = AudioCdWorker(drive, file_list); self.burn_worker.finished.connect(self.on_burn_finished); self.burn_worker.error.connect(self.on_worker_error); self.burn_worker.progress.connect(lambda msg: self.statusBar().showMessage(msg)); self.burn_worker.progress_update.connect(self.on_burn_progress); self.burn_worker.start()
+            return
         iso_path = os.path.join(os.getcwd(), f"AlphaBurn_{int(time.time())}.iso")
         self.burn_button.setEnabled(False)
-        self.burn_worker = BurnWorker(drive, file_list, iso_path); self.burn_worker.finished.connect(self.on_burn_finished); self.burn_worker.error.connect(self.on_worker_error); self.burn_worker.progress.connect(lambda msg: self.statusBar().showMessage(msg)); self.burn_worker.start()
-
-    def on_burn_finished(self, message): QMessageBox.information(self, "Success", message); self.statusBar().showMessage(message, 5000); self.burn_button.setEnabled(True)
+        from workers.burn_worker import BurnWorker
+        self.burn_worker = BurnWorker(drive, file_list, iso_path, fit_to_bytes=self.fit_target_bytes()); self.burn_worker.finished.connect(self.on_burn_finished); self.burn_worker.error.connect(self.on_worker_error); self.burn_worker.progress.connect(lambda msg: self.statusBar().showMessage(msg)); self.burn_worker.progress_update.connect(self.on_burn_progress); self.burn_worker.start()
+
+    def on_burn_progress(self, reading):
+        self.burn_progress_bar.setVisible(True)
+        if reading.percent is None: self.burn_progress_bar.setRange(0, 0)
+        else: self.burn_progress_bar.setRange(0, 100); self.burn_progress_bar.setValue(int(reading.percent))
+        self.burn_progress_bar.setFormat(reading.describe())
+
+    def on_burn_finished(self, message):
+        self.statusBar().showMessage(message, 5000); self.burn_button.setEnabled(True); self.burn_progress_bar.setVisible(False); self.refresh_media_capacity()
+        if self.pending_disc_queues:
+            done = self.planned_disc_count - len(self.pending_disc_queues)
+            answer = QMessageBox.question(self, "Next Disc", f"Disc {done} of {self.planned_disc_count} burned. Insert a blank disc and click OK to burn disc {done + 1}.", QMessageBox.StandardButton.Ok | QMessageBox.StandardButton.Cancel)
+            if answer == QMessageBox.StandardButton.Ok: self._burn_next_planned_disc()
+            else: self.pending_disc_queues = []
+            return
+        QMessageBox.information(self, "Success", message)
+
+    def start_multi_burn_process(self):
+        if self.burn_queue_model.rowCount() == 0: QMessageBox.warning(self, "Empty Queue", "Burn queue is empty."); return
+        if self.is_audio_cd_mode(): QMessageBox.warning(self, "Data Discs Only", "Multi-drive burning writes data discs. Choose a data preset such as MP3 CD first."); return
+        drives = [self.drive_selector.itemText(i) for i in range(self.drive_selector.count())]
+        drives = [drive for drive in drives if drive and "No drives" not in drive and "Error" not in drive]
+        if not drives: QMessageBox.warning(self, "No Drive", "No optical drives were found."); return
+        dialog = DriveSelectionDialog(drives, checked=drives, parent=self)
+        if not dialog.exec(): return
+        selected = dialog.selected_drives()
+        if not selected: QMessageBox.warning(self, "No Drive", "Select at least one drive to burn to."); return
+        iso_path = os.path.join(os.getcwd(), f"AlphaBurn_{int(time.time())}.iso")
+        self.burn_button.setEnabled(False); self.multi_burn_button.setEnabled(False)
+        self.multi_burn_dialog = MultiBurnProgressDialog(selected, self); self.multi_burn_dialog.show()
+        from workers.multi_burn_worker import MultiBurnWorker
+        self.multi_burn_worker = MultiBurnWorker(selected, self.burn_queue_model.filepaths(), iso_path, fit_to_bytes=self.fit_target_bytes())
+        self.multi_burn_worker.progress.connect(lambda msg: self.statusBar().showMessage(msg))
+        self.multi_burn_worker.drive_progress.connect(self.multi_burn_dialog.update_drive)
+        self.multi_burn_worker.drive_progress_update.connect(self.multi_burn_dialog.update_drive_progress)
+        self.multi_burn_worker.drive_finished.connect(self.multi_burn_dialog.finish_drive)
+        self.multi_burn_worker.finished.connect(self.on_multi_burn_finished); self.multi_burn_worker.error.connect(self.on_multi_burn_error)
+        self.multi_burn_worker.start()
+
+    def on_multi_burn_finished(self, summary):
+        self.multi_burn_dialog.finish(); self.burn_button.setEnabled(True); self.multi_burn_button.setEnabled(True); self.statusBar().showMessage(summary, 5000)
+        if self.multi_burn_worker.failed_drives: QMessageBox.warning(self, "Multi-Drive Burn", summary)
+        else: QMessageBox.information(self, "Success", summary)
+        self.refresh_media_capacity()
+
+    def on_multi_burn_error(self, error_message):
+        self.multi_burn_dialog.finish(); self.multi_burn_button.setEnabled(True); self.on_worker_error(error_message)
 
     def start_download_handler(self):
         url = self.url_input.text()
@@ -372,6 +666,7 @@ class AlphaBurnApp(QMainWindow):
     def start_spotify_playlist_download(self, url):
         client_id = config.get_setting("API_KEYS", "spotify_client_id"); client_secret = config.get_setting("API_KEYS", "spotify_client_secret")
         if not client_id or not client_secret: QMessageBox.critical(self, "Spotify Credentials Missing", "Please set Spotify credentials in File > Settings."); return
+        from workers.spotify_worker import SpotifyWorker
         self.download_button.setEnabled(False); self.spotify_worker = SpotifyWorker(url, client_id, client_secret); self.spotify_worker.finished.connect(self.on_spotify_playlist_fetched); self.spotify_worker.error.connect(self.on_worker_error); self.spotify_worker.progress.connect(lambda msg: self.statusBar().showMessage(msg)); self.spotify_worker.start()
 
     def on_spotify_playlist_fetched(self, tracks):
@@ -382,6 +677,7 @@ class AlphaBurnApp(QMainWindow):
             self.is_batch_downloading = False; self.download_button.setEnabled(True); QMessageBox.information(self, "Batch Download Complete", "Finished downloading all tracks."); return
         if self.download_queue and self.download_button.isEnabled():
             url = self.download_queue.pop(0); self.statusBar().showMessage(f"Downloading: {url} ({len(self.download_queue)} left)"); self.download_button.setEnabled(False)
+            from workers.download_worker import DownloadWorker
             self.worker = DownloadWorker(url, self.download_path); self.worker.finished.connect(self.on_download_finished); self.worker.error.connect(self.on_worker_error); self.worker.start()
 
     def on_download_finished(self, info):
@@ -394,6 +690,7 @@ class AlphaBurnApp(QMainWindow):
         
         filepath = expected_filepath
         
+        from workers.tagger_worker import TaggerWorker
         self.tagger = TaggerWorker(filepath, info.get('title','')); self.tagger.finished.connect(self.on_tagging_finished); self.tagger.error.connect(self.on_worker_error); self.tagger.status_update.connect(lambda msg: self.statusBar().showMessage(msg)); self.tagger.start()
 
     def on_tagging_finished(self, file_path, metadata):
@@ -409,8 +706,11 @@ class AlphaBurnApp(QMainWindow):
                     file_path = dest_path
             except Exception as e:
                 self.statusBar().showMessage(f"Failed to move file: {e}", 5000)
+        try:
+            metadata.update(file_stats(file_path))
+        except OSError:
+            pass
         database.add_song(file_path, metadata)
-        self.load_library_from_db()
         self.url_input.clear()
         self.download_button.setEnabled(True)
         if self.is_batch_downloading:
@@ -418,7 +718,8 @@ class AlphaBurnApp(QMainWindow):
 
     def on_worker_error(self, error_message):
         QMessageBox.critical(self, "Error", f"{error_message}"); self.statusBar().showMessage("Error occurred.", 5000)
-        self.download_button.setEnabled(True); self.burn_button.setEnabled(True); self.chat_input.setEnabled(True)
+        if self.pending_disc_queues: self.pending_disc_queues = []; QMessageBox.warning(self, "Multi-Disc Burn Halted", "A disc failed to burn, so the remaining discs of the plan were not burned.")
+        self.download_button.setEnabled(True); self.burn_button.setEnabled(True); self.burn_progress_bar.setVisible(False); self.chat_input.setEnabled(True)
         if self.is_batch_downloading: self.is_batch_downloading = False; self.download_queue.clear(); QMessageBox.warning(self, "Batch Download Halted", "An error occurred, halting the playlist download.")
 
 
@@ -435,6 +736,7 @@ class AlphaBurnApp(QMainWindow):
             return
 
         try:
+            import google.generativeai as genai
             genai.configure(api_key=api_key)
             model = genai.GenerativeModel(model_name)
             
@@ -492,6 +794,7 @@ class AlphaBurnApp(QMainWindow):
         cd_state_str = f"[CD STATE] Drive: {self.cd_state.get('drive')}, Space: {self.cd_state.get('space_mb')}MB, Finalized: {self.cd_state.get('finalized')}, Rewritable: {self.cd_state.get('rewritable')}, Files: {self.cd_state.get('files')}, Needs wipe: {self.cd_state.get('needs_wipe')}\n"
         full_prompt = cd_state_str + prompt
 
+        from workers.gemini_sender import GeminiSender
         self.gemini_sender = GeminiSender(self.gemini_chat_session, full_prompt)
         self.gemini_sender.response_received.connect(self.on_gemini_response_received)
         self.gemini_sender.error_occurred.connect(self.on_gemini_error_occurred)
@@ -521,11 +824,11 @@ class AlphaBurnApp(QMainWindow):
         self.statusBar().showMessage("Gemini error occurred.", 5000)
 
     def save_preset(self):
-        if self.burn_queue_list.count() == 0: return
+        if self.burn_queue_model.rowCount() == 0: return
         name, ok = QInputDialog.getText(self, "Save Preset", "Preset name:")
         if ok and name:
-            paths = [self.burn_queue_list.item(i).data(Qt.ItemDataRole.UserRole) for i in range(self.burn_queue_list.count())]
-            config.update_setting("PRESETS", name, ",".join(paths))
+            paths = self.burn_queue_model.filepaths()
+            database.save_preset(name, paths)
             self._load_presets()
             self.preset_selector.setCurrentText(name)
 
@@ -533,25 +836,27 @@ class AlphaBurnApp(QMainWindow):
         name = self.preset_selector.currentText()
         if name in ["Standard Audio CD", "MP3 CD"]: return
         if QMessageBox.question(self, "Confirm", f"Delete preset '{name}'?") == QMessageBox.StandardButton.Yes:
-            cfg = config.get_config()
-            cfg.remove_option("PRESETS", name)
-            with open(config.CONFIG_FILE, 'w') as configfile:
-                cfg.write(configfile)
+            database.delete_preset(name)
             self._load_presets()
 
+    def _migrate_config_presets(self):
+        """Moves presets saved in config.ini by older versions (comma-joined paths) into the database."""
+        cfg = config.get_config()
+        if not cfg.has_section("PRESETS"): return
+        presets = {name: [p for p in value.split(',') if p] for name, value in cfg.items("PRESETS", raw=True)}
+        database.save_presets(presets, replace=False)
+        with config.transaction() as cfg:
+            cfg.remove_section("PRESETS")
+
     def _load_presets(self):
         current = self.preset_selector.currentText()
         self.preset_selector.clear(); self.preset_selector.addItems(["Standard Audio CD", "MP3 CD"])
-        cfg = config.get_config()
-        if cfg.has_section("PRESETS"):
-            self.preset_selector.addItems(cfg.options("PRESETS"))
-        self.preset_selector.setCurrentText(current if self.preset_selector.findText(current) != -1 else "Standard Audio CD")
+        self.preset_selector.addItems(database.get_preset_names())
+        self.preset_selector.setCurrentText(current if self.preset_selector.findText(current) != -1 else "MP3 CD")
 
     def load_preset(self):
-        name = self.preset_selector.currentText(); self.burn_queue_list.clear()
+        name = self.preset_selector.currentText(); paths = []
         if name not in ["Standard Audio CD", "MP3 CD"]:
-            paths_str = config.get_setting("PRESETS", name)
-            paths = paths_str.split(',')
-            for path in paths:
-                if path: self.add_filepath_to_burn_queue(path)
+            paths = database.get_preset_filepaths(name) or []
+        self.burn_queue_model.set_filepaths(paths)
         self.update_capacity_meter()
\ No newline at end of file
@@ -1,6 +1,6 @@
 from PyQt6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QFrame, QSplitter, 
-    QTableView, QListWidget, QComboBox, QProgressBar, QLabel, QWidget, QTextEdit
+    QTableView, QListView, QComboBox, QProgressBar, QLabel, QWidget, QTextEdit
 )
 from PyQt6.QtCore import Qt
 
@@ -42,6 +42,10 @@ class UiSetup:
     def create_left_pane(self):
         left_pane = QFrame()
         left_layout = QVBoxLayout(left_pane)
+        self.main_window.library_search_input = QLineEdit(placeholderText="Search library...")
+        self.main_window.library_search_input.setToolTip("Filter the library by title, artist, album or genre as you type.")
+        self.main_window.library_search_input.setClearButtonEnabled(True)
+        left_layout.addWidget(self.main_window.library_search_input)
         self.main_window.library_table = QTableView()
         self.main_window.library_table.setToolTip("Your local music library. Double-click a track to add it to the burn queue.")
         left_layout.addWidget(self.main_window.library_table)
@@ -76,7 +80,9 @@ class UiSetup:
         self.main_window.cd_content_table.setToolTip("Contents of the currently inserted CD. Tracks and files will appear here after scanning.")
         right_layout.addWidget(self.main_window.cd_content_table)
 
-        self.main_window.burn_queue_list = QListWidget()
+        self.main_window.burn_queue_list = QListView()
+        self.main_window.burn_queue_list.setSelectionMode(QListView.SelectionMode.ExtendedSelection)
+        self.main_window.burn_queue_list.setUniformItemSizes(True)
         self.main_window.burn_queue_list.setToolTip("Tracks queued for burning to disc. Drag and drop to reorder.")
         right_layout.addWidget(self.main_window.burn_queue_list)
 
@@ -110,6 +116,7 @@ class UiSetup:
         drive_layout.addWidget(self.main_window.browse_music_button)
         drive_layout.addWidget(QLabel("Preset:"))
         self.main_window.preset_selector = QComboBox()
+        self.main_window.preset_selector.setToolTip("\"Standard Audio CD\" burns the queue as an audio CD; other presets burn a data disc.")
         drive_layout.addWidget(self.main_window.preset_selector)
         layout.addLayout(drive_layout)
 
@@ -124,11 +131,15 @@ class UiSetup:
     def create_capacity_meter(self, layout):
         cap_layout = QHBoxLayout()
         self.main_window.capacity_label = QLabel("0.0 MB / 700.0 MB (0%)")
-        self.main_window.capacity_label.setToolTip("Shows the total size of your burn queue compared to the disc's capacity.")
+        self.main_window.capacity_label.setToolTip("Shows the estimated disc image size of your burn queue, including filesystem overhead, compared to the free space on the disc.")
         cap_layout.addWidget(self.main_window.capacity_label)
         self.main_window.capacity_progress = QProgressBar()
         self.main_window.capacity_progress.setToolTip("Visual indicator of how full your disc will be after burning.")
         cap_layout.addWidget(self.main_window.capacity_progress)
+        self.main_window.fit_to_disc_selector = QComboBox()
+        self.main_window.fit_to_disc_selector.addItems(["Original Files", "Fit to Disc", "Fit to 650 MB", "Fit to 700 MB", "Fit to 800 MB"])
+        self.main_window.fit_to_disc_selector.setToolTip("Re-encode copies of the queued tracks at the bitrate that makes the queue fit the disc. Your library files are not changed.")
+        cap_layout.addWidget(self.main_window.fit_to_disc_selector)
         layout.addLayout(cap_layout)
 
     def create_burn_controls(self, layout):
@@ -136,12 +147,22 @@ class UiSetup:
         self.main_window.advanced_burn_button = QPushButton("Advanced...")
         self.main_window.advanced_burn_button.setToolTip("Open advanced burning options and settings.")
         burn_ctrl_layout.addStretch()
+        self.main_window.split_discs_button = QPushButton("Split Across Discs...")
+        self.main_window.split_discs_button.setToolTip("Pack a queue that doesn't fit onto as few discs as possible and burn them one after another.")
+        burn_ctrl_layout.addWidget(self.main_window.split_discs_button)
         burn_ctrl_layout.addWidget(self.main_window.advanced_burn_button)
+        self.main_window.multi_burn_button = QPushButton("Burn to Multiple Drives...")
+        self.main_window.multi_burn_button.setToolTip("Burn the current queue to several drives at once from a single disc image.")
+        burn_ctrl_layout.addWidget(self.main_window.multi_burn_button)
         self.main_window.burn_button = QPushButton("Burn Disc")
         self.main_window.burn_button.setStyleSheet("background-color: #4CAF50;")
         self.main_window.burn_button.setToolTip("Start burning the current queue to the selected disc.")
         burn_ctrl_layout.addWidget(self.main_window.burn_button)
         layout.addLayout(burn_ctrl_layout)
+        self.main_window.burn_progress_bar = QProgressBar()
+        self.main_window.burn_progress_bar.setToolTip("Progress of the running burn: data written, write speed, drive buffer fill and time left.")
+        self.main_window.burn_progress_bar.setVisible(False)
+        layout.addWidget(self.main_window.burn_progress_bar)
 
     def create_chat_area(self, layout):
         chat_layout = QVBoxLayout()
@@ -175,16 +196,23 @@ class UiSetup:
         self.main_window.library_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.main_window.library_table.customContextMenuRequested.connect(self.main_window.show_library_context_menu)
         self.main_window.library_table.doubleClicked.connect(self.main_window.add_to_burn_queue_from_index)
+        self.main_window.library_search_input.textChanged.connect(self.main_window.on_library_search_changed)
         self.main_window.download_button.clicked.connect(self.main_window.start_download_handler)
         self.main_window.save_preset_button.clicked.connect(self.main_window.save_preset)
         self.main_window.delete_preset_button.clicked.connect(self.main_window.delete_preset)
         self.main_window.preset_selector.activated.connect(self.main_window.load_preset)
+        self.main_window.preset_selector.currentTextChanged.connect(self.main_window.update_capacity_meter)
+        self.main_window.fit_to_disc_selector.currentTextChanged.connect(self.main_window.update_capacity_meter)
         self.main_window.advanced_burn_button.clicked.connect(self.main_window.open_advanced_burn_settings)
         self.main_window.burn_button.clicked.connect(self.main_window.start_burn_process)
+        self.main_window.multi_burn_button.clicked.connect(self.main_window.start_multi_burn_process)
+        self.main_window.split_discs_button.clicked.connect(self.main_window.split_queue_across_discs)
         self.main_window.send_chat_button.clicked.connect(self.main_window.send_chat_message)
         self.main_window.chat_input.returnPressed.connect(self.main_window.send_chat_message)
         self.main_window.browse_music_button.clicked.connect(self.main_window.browse_music_directory)
         self.main_window.refresh_drive_button.clicked.connect(self.main_window._populate_drives)
+        self.main_window.drive_selector.currentTextChanged.connect(self.main_window.refresh_media_capacity)
+        self.main_window.drive_selector.currentTextChanged.connect(self.main_window.update_cd_state)
         self.main_window.eject_drive_button.clicked.connect(self.main_window.eject_selected_drive)
         self.main_window.wipe_drive_button.clicked.connect(self.main_window.wipe_selected_drive)
         self.main_window.read_cd_button.clicked.connect(self.main_window.read_selected_cd)
@@ -0,0 +1,211 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import audio_cd
+import burn_progress
+import database
+import disc
+import drive_capabilities
+import tag_reader
+from workers.burn_worker import BurnWorker
+
+# ffmpeg processes decoding at once.
+DECODE_WORKERS = max(1, min(4, os.cpu_count() or 1))
+# How often a feeder checks a track file that is still being decoded.
+FEED_POLL_SECONDS = 0.05
+
+
+class AudioCdWorker(BurnWorker):
+    """Burns the queue as a Red Book audio CD (DAO, with CD-TEXT from the library).
+
+    Tracks are decoded to raw CD-DA by a pool of ffmpeg processes into spool
+    files. Track lengths come from the stored durations, so the .inf files
+    wodim reads lengths and CD-TEXT from are written before decoding starts
+    and every track is padded or cut to exactly that length. On Linux each
+    track reaches wodim through a named pipe fed from its spool file, so the
+    burn starts as soon as track 1 is decoded while later tracks are still
+    converting; elsewhere every track is decoded before wodim starts.
+    """
+    mode = 'audio'
+
+    def __init__(self, drive, file_list):
+        # CD-DA can't be read back bit-exactly through the block device, so audio discs aren't verified
+        super().__init__(drive, file_list, iso_path=None, stream=False, verify=False)
+        self.pipelined = hasattr(os, 'mkfifo')
+        self._decode_errors = {}
+
+    def _tracks(self):
+        """Returns [(filepath, title, artist, album, frames)] in queue order."""
+        rows = database.get_audio_cd_tracks(self.file_list)
+        tracks = []
+        for filepath in self.file_list:
+            title, artist, album, duration = rows.get(filepath) or (os.path.basename(filepath), '', '', None)
+            if duration is None:
+                duration = tag_reader.read_audio_info(filepath)['duration']
+            if not duration:
+                raise ValueError(f"Could not determine the length of {os.path.basename(filepath)}")
+            tracks.append((filepath, title, artist, album, audio_cd.track_frames(duration)))
+        return tracks
+
+    def run(self):
+        work_dir = None
+        self.started_at = time.time()
+        try:
+            if len(self.file_list) > audio_cd.MAX_TRACKS:
+                raise ValueError(f"An audio CD holds at most {audio_cd.MAX_TRACKS} tracks.")
+            tracks = self._tracks()
+            self.write_plan = self._plan_write()
+            work_dir = tempfile.mkdtemp(prefix='alphaburn_cd_')
+            track_paths = self._write_track_info(work_dir, tracks)
+            self._burn_audio(tracks, track_paths)
+            self._finish("Audio CD burned successfully.")
+        except FileNotFoundError as e:
+            self._fail(f"Required program not found ({e.filename}). Audio CDs need ffmpeg and wodim.")
+        except subprocess.CalledProcessError as e:
+            self._fail(f"Burner failed with error: {e.stderr}", coaster=drive_capabilities.is_write_error(e.stderr))
+        except Exception as e:
+            self._fail(f"An error occurred during burning: {e}")
+        finally:
+            if work_dir:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    def _write_track_info(self, work_dir, tracks):
+        """Writes trackNN.inf for every track and returns the matching track file paths."""
+        album_title, album_performer = audio_cd.album_fields([(title, artist, album, frames) for _, title, artist, album, frames in tracks])
+        track_paths = []
+        start_frame = 0
+        for number, (_, title, artist, _, frames) in enumerate(tracks, 1):
+            base = os.path.join(work_dir, f"track{number:02d}")
+            with open(base + '.inf', 'w', encoding='utf-8') as f:
+                f.write(audio_cd.inf_text(number, frames, start_frame, title, artist, album_title, album_performer))
+            track_paths.append(base + '.cdda')
+            start_frame += frames
+        return track_paths
+
+    def _decode(self, filepath, spool_path, frames, done):
+        """Decodes one track into spool_path, padded or cut to exactly frames sectors."""
+        target = frames * audio_cd.FRAME_BYTES
+        written = 0
+        try:
+            process = subprocess.Popen(audio_cd.decode_command(filepath), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                       creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
+            with open(spool_path, 'wb') as spool:
+                while written < target:
+                    chunk = process.stdout.read(min(audio_cd.PCM_CHUNK_SIZE, target - written))
+                    if not chunk:
+                        break
+                    spool.write(chunk)
+                    spool.flush()
+                    written += len(chunk)
+                if written >= target:
+                    process.kill()  # Anything past the stored length is dropped
+                    process.wait()
+                else:
+                    stderr = process.stderr.read().decode(errors='replace')
+                    if process.wait() != 0:
+                        raise subprocess.CalledProcessError(process.returncode, 'ffmpeg', stderr=stderr.strip())
+                # A stored duration a little longer than the decoded audio leaves a short tail of silence
+                while written < target:
+                    size = min(audio_cd.PCM_CHUNK_SIZE, target - written)
+                    spool.write(bytes(size))
+                    written += size
+            process.stdout.close()
+            process.stderr.close()
+        except Exception as e:
+            self._decode_errors[filepath] = e
+        finally:
+            done.set()
+
+    def _feed(self, spool_path, fifo_path, target, done, stop):
+        """Copies a spool file into the track's named pipe as fast as it is decoded and the burner reads."""
+        try:
+            with open(fifo_path, 'wb') as fifo, open(spool_path, 'rb') as spool:
+                sent = 0
+                while sent < target and not stop.is_set():
+                    decoded = done.is_set()
+                    chunk = spool.read(audio_cd.PCM_CHUNK_SIZE)
+                    if chunk:
+                        fifo.write(chunk)
+                        sent += len(chunk)
+                    elif decoded:
+                        break  # Decoding failed short of the full length
+                    else:
+                        time.sleep(FEED_POLL_SECONDS)
+        except (BrokenPipeError, OSError):
+            pass  # The burner closed the pipe; its exit status says why
+
+    def _burn_audio(self, tracks, track_paths):
+        spool_paths = [path[:-len('.cdda')] + '.pcm' for path in track_paths] if self.pipelined else track_paths
+        decoded = [threading.Event() for _ in tracks]
+        stop = threading.Event()
+        feeders = []
+        for spool_path in spool_paths:
+            # Created up front so a feeder can open its spool file before the decoder gets to it
+            open(spool_path, 'wb').close()
+        self.progress.emit(f"Decoding {len(tracks)} tracks for an audio CD...")
+        with ThreadPoolExecutor(max_workers=DECODE_WORKERS) as pool:
+            futures = [pool.submit(self._decode, filepath, spool_path, frames, done)
+                       for (filepath, _, _, _, frames), spool_path, done in zip(tracks, spool_paths, decoded)]
+            try:
+                if self.pipelined:
+                    # Start with track 1 fully decoded so the drive never waits on the first track
+                    futures[0].result()
+                    self._check_decode_errors()
+                    for (_, _, _, _, frames), spool_path, fifo_path, done in zip(tracks, spool_paths, track_paths, decoded):
+                        os.mkfifo(fifo_path)
+                        feeder = threading.Thread(target=self._feed, args=(spool_path, fifo_path, frames * audio_cd.FRAME_BYTES, done, stop), daemon=True)
+                        feeder.start()
+                        feeders.append(feeder)
+                else:
+                    for number, future in enumerate(futures, 1):
+                        future.result()
+                        self._check_decode_errors()
+                        self.progress.emit(f"Decoded track {number} of {len(tracks)}.")
+                try:
+                    self._run_wodim(track_paths, sum(track[4] for track in tracks) * audio_cd.FRAME_BYTES)
+                finally:
+                    # A track that failed to decode is the real cause of a burner error
+                    self._check_decode_errors()
+            finally:
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                for fifo_path, feeder in zip(track_paths, feeders):
+                    self._release_feeder(fifo_path, feeder)
+
+    def _check_decode_errors(self):
+        if self._decode_errors:
+            filepath, error = next(iter(self._decode_errors.items()))
+            if isinstance(error, FileNotFoundError):
+                raise error
+            raise RuntimeError(f"Could not decode {os.path.basename(filepath)}: {getattr(error, 'stderr', None) or error}")
+
+    def _release_feeder(self, fifo_path, feeder):
+        # A feeder whose pipe the burner never opened is still blocked opening it for writing
+        if feeder.is_alive():
+            try:
+                os.close(os.open(fifo_path, os.O_RDONLY | os.O_NONBLOCK))
+            except OSError:
+                pass
+        feeder.join()
+
+    def _run_wodim(self, track_paths, total_bytes):
+        # CD-TEXT can only be written disc-at-once; a drive without it burns the tracks with 2 second gaps
+        text = ['-text'] if self.write_plan.mode == 'SAO' else []
+        command = ['wodim', '-v', f'dev={disc.device_path(self.drive)}'] + self.write_plan.wodim_args() + \
+                  ['-audio', '-useinfo'] + text + track_paths
+        self.progress.emit(f"Burning audio CD to drive {self.drive}...")
+        self.monitor = burn_progress.ProgressParser(total_bytes, burn_progress.AUDIO_BYTES_PER_X)
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
+        readers, stderr_lines = self._watch_output(process, self.monitor)
+        return_code = process.wait()
+        for reader in readers:
+            reader.join()
+        if return_code != 0:
+            raise subprocess.CalledProcessError(return_code, command, stderr='\n'.join(stderr_lines))
@@ -0,0 +1,39 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PyQt6.QtCore import QThread, pyqtSignal
+import database
+import tag_reader
+
+# Files read at once; reading is mostly waiting on the disk.
+MAX_READ_WORKERS = min(8, (os.cpu_count() or 4) * 2)
+
+
+def _read(filepath):
+    try:
+        audio_info = tag_reader.read_audio_info(filepath)
+        return audio_info['duration'], audio_info['bitrate']
+    except Exception:
+        return None, None
+
+
+class AudioInfoWorker(QThread):
+    """Reads duration and bitrate of files the library has no audio info for, off the UI thread, and stores them in the library."""
+    # {filepath: (duration, bitrate)}; files that can't be read map to (None, None)
+    info_read = pyqtSignal(dict)
+
+    def __init__(self, filepaths):
+        super().__init__()
+        self.filepaths = list(filepaths)
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=MAX_READ_WORKERS) as pool:
+            info = dict(zip(self.filepaths, pool.map(_read, self.filepaths)))
+        try:
+            # So the next queue or disc plan doesn't read the same files again
+            database.update_audio_info(info)
+        except Exception as e:
+            print(f"[AudioInfoWorker] Could not store audio info: {e}")
+        finally:
+            database.close_connection()
+        if not self.isInterruptionRequested():
+            self.info_read.emit(info)
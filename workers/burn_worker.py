@@ -1,74 +1,330 @@
 import os
 import sys
 import time
+import itertools
+import threading
 import subprocess
 import pycdlib
+import config
+import database
+import disc
+import disc_verify
+import drive_capabilities
+import burn_progress
+import iso_stream
+import image_cache
+import transcoder
 from PyQt6.QtCore import QThread, pyqtSignal
 
+# wodim's own FIFO in front of the drive when streaming, on top of our buffer.
+STREAM_FIFO_SIZE = '16m'
+# Everything besides the files that affects the image bytes; part of the image cache key.
+IMAGE_OPTIONS = {'format': 'iso9660+joliet', 'names': 'upper-basename', 'order': 'joliet'}
+
 class BurnWorker(QThread):
     finished = pyqtSignal(str)
     error = pyqtSignal(str)
     progress = pyqtSignal(str)
+    # burn_progress.BurnProgress readings parsed from the burner's output
+    progress_update = pyqtSignal(object)
+    # Recorded in the burn log
+    mode = 'data'
+
+    def __init__(self, drive, file_list, iso_path, stream=None, fit_to_bytes=None, verify=None):
+        """Burns file_list to drive. stream=None reads BURN_SETTINGS/stream_image, verify=None BURN_SETTINGS/verify.
 
-    def __init__(self, drive, file_list, iso_path):
+        In streaming mode the image goes straight into wodim's stdin; otherwise
+        (and always on Windows, where cdburn needs a file) it is written to
+        iso_path first. With fit_to_bytes, tracks are first re-encoded to the
+        bitrate that makes the queue fit a disc of that size (see transcoder).
+        With verify, the disc is read back after burning and compared with
+        digests taken of the image as it was written (see disc_verify).
+        Speed, write mode and BURN-Free come from the drive's probed
+        capabilities for the inserted media (see drive_capabilities).
+        """
         super().__init__()
         self.drive = drive
         self.file_list = file_list
         self.iso_path = iso_path
+        self.fit_to_bytes = fit_to_bytes
+        self.monitor = None
+        self.started_at = None
+        self.write_plan = None
+        if stream is None:
+            stream = config.get_setting('BURN_SETTINGS', 'stream_image', 'true').lower() == 'true'
+        self.stream = stream and sys.platform == "linux"
+        if verify is None:
+            verify = config.get_setting('BURN_SETTINGS', 'verify', 'false').lower() == 'true'
+        # A test burn writes nothing that could be read back
+        self.verify = verify and config.get_setting('BURN_SETTINGS', 'test_mode', 'false').lower() != 'true'
+
+    def _build_image(self):
+        """Lays out the ISO 9660/Joliet image. Returns the PyCdlib object and the Joliet paths in the order added."""
+        iso = pycdlib.PyCdlib()
+        iso.new(joliet=True)
+        # Added in directory-record order so pycdlib writes file data in one
+        # forward pass, which is what lets the image be streamed
+        entries = [(f'/{os.path.basename(filepath).upper()}', filepath) for filepath in self.file_list]
+        entries.sort(key=lambda entry: iso_stream.joliet_sort_key(entry[0]))
+        for iso_path_on_disc, filepath in entries:
+            iso.add_file(filepath, joliet_path=iso_path_on_disc)
+        return iso, [iso_path_on_disc for iso_path_on_disc, _ in entries]
+
+    def _fit_to_disc(self):
+        """Swaps file_list for copies re-encoded to fit fit_to_bytes, if set."""
+        if self.fit_to_bytes:
+            self.file_list, bitrate = transcoder.fit_to_disc(self.file_list, self.fit_to_bytes, self.progress.emit)
+            self.progress.emit(f"Queue fits the disc at {bitrate} kbps.")
+
+    def _cache_key(self, cache):
+        if not cache.enabled:
+            return None
+        try:
+            return image_cache.image_key(self.file_list, IMAGE_OPTIONS)
+        except OSError:
+            return None  # A missing file is reported when the image is built
 
     def run(self):
+        iso = None
+        cache = image_cache.ImageCache()
+        partial_path = None
+        self.started_at = time.time()
         try:
-            # Stage 1: Create ISO
-            self.progress.emit("Creating ISO 9660 disc image...")
-            iso = pycdlib.PyCdlib()
-            iso.new(joliet=True)
-            
-            for filepath in self.file_list:
-                basename = os.path.basename(filepath)
-                iso_path_on_disc = f'/{basename.upper()}'
-                iso.add_file(filepath, joliet_path=iso_path_on_disc)
-            
-            iso.write(self.iso_path)
+            self._fit_to_disc()
+            key = self._cache_key(cache)
+            cached_path = cache.lookup(key) if key else None
+            if cached_path:
+                self.progress.emit("Using cached disc image.")
+                digests = self._image_digests(cached_path)
+                self._burn_image_file(cached_path)
+                self._finish(self._verify_disc(digests))
+                return
+
+            # Stage 1: Lay out the ISO
+            iso, joliet_paths = self._build_image()
+
+            if self.stream:
+                head_size = iso_stream.plan_stream(iso, joliet_paths)
+                if head_size is not None:
+                    cacheable = key and cache.cache_streamed and cache.fits(self._image_size(iso))
+                    partial_path = cache.partial_path(key) if cacheable else None
+                    digests = self._burn_streaming(iso, head_size, partial_path)
+                    if partial_path:
+                        cache.commit(key, partial_path)
+                        partial_path = None
+                    self._finish(self._verify_disc(digests))
+                    return
+                self.progress.emit("Image can't be streamed; writing a temporary image file instead.")
+
+            image_path = self._write_image(iso, cache, key)
             iso.close()
+            iso = None
+            digests = self._image_digests(image_path)
 
             # Stage 2: Burn ISO to disc
-            self.progress.emit(f"Burning {os.path.basename(self.iso_path)} to drive {self.drive}...")
-            
-            if sys.platform == "win32":
-                # Assumes 'cdburn.exe' is in the system PATH or project root
-                command = ['cdburn', self.drive, self.iso_path]
-            elif sys.platform == "linux":
-                command = ['wodim', '-v', f'dev={self.drive}', self.iso_path]
-            else:
-                raise NotImplementedError("Burning is not supported on this OS.")
-
-            # --- REAL BURN LOGIC ---
-            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
-            
-            # Real-time progress reporting from the command line tool
-            while True:
-                output = process.stdout.readline()
-                if output == '' and process.poll() is not None:
-                    break
-                if output:
-                    self.progress.emit(output.strip())
-            
-            return_code = process.poll()
-            if return_code != 0:
-                stderr_output = process.stderr.read()
-                raise subprocess.CalledProcessError(return_code, command, stderr=stderr_output)
-            
-            self.finished.emit("Burn completed successfully.")
+            self._burn_image_file(image_path)
+            self._finish(self._verify_disc(digests))
 
+        except disc_verify.VerifyError as e:
+            self._fail(str(e), coaster=e.mismatch)
         except FileNotFoundError:
-            self.error.emit("Burn command not found. Ensure a command-line burning utility (e.g., cdburn.exe) is in your system's PATH.")
+            self._fail("Burn command not found. Ensure a command-line burning utility (e.g., cdburn.exe) is in your system's PATH.")
         except subprocess.CalledProcessError as e:
-            self.error.emit(f"Burner failed with error: {e.stderr}")
+            self._fail(f"Burner failed with error: {e.stderr}", coaster=drive_capabilities.is_write_error(e.stderr))
         except Exception as e:
-            self.error.emit(f"An error occurred during burning: {e}")
+            self._fail(f"An error occurred during burning: {e}")
         finally:
+            if iso is not None:
+                iso.close()
+            if partial_path is not None:
+                cache.discard(partial_path)
             if os.path.exists(self.iso_path):
                 try:
                     os.remove(self.iso_path)
                 except OSError as e:
                     self.progress.emit(f"Could not remove temporary ISO file: {e}")
+
+    def _image_digests(self, image_path):
+        """Digests of a finished image file for verify, taken while it is still in the page cache."""
+        return disc_verify.ImageDigests.from_file(image_path) if self.verify else None
+
+    def _verify_disc(self, digests, drive=None, on_progress=None):
+        """Reads the burned disc back and compares it with digests. Returns the completion message.
+
+        Does nothing without digests. Raises disc_verify.VerifyError if the
+        disc can't be read or doesn't match, naming the first bad sector.
+        """
+        if digests is None:
+            return "Burn completed successfully."
+        drive = drive or self.drive
+        on_progress = on_progress or self.progress_update.emit
+        total_mb = digests.size // burn_progress.MEGABYTE
+
+        def report(done, total, elapsed):
+            rate = done / elapsed if elapsed > 0 else 0
+            on_progress(burn_progress.BurnProgress(100.0 * done / total, done // burn_progress.MEGABYTE, total_mb,
+                                                   rate / burn_progress.DATA_BYTES_PER_X if rate else None,
+                                                   eta=(total - done) / rate if rate else None))
+
+        self.progress.emit(f"Verifying disc in drive {drive}...")
+        try:
+            result = disc_verify.verify_disc(drive, digests, report)
+        except OSError as e:
+            raise disc_verify.VerifyError(f"Could not read the disc back to verify it: {e}")
+        print(f"[BurnWorker] {drive}: {result.describe()}")
+        if not result.ok:
+            raise disc_verify.VerifyError(f"Verification failed. {result.describe()}", mismatch=result.error is None)
+        return f"Burn completed and verified successfully ({result.speed / burn_progress.DATA_BYTES_PER_X:.1f}x read)."
+
+    def _finish(self, message):
+        drive_capabilities.record_result(self.write_plan, True)
+        self._record_burn(True, message)
+        self.finished.emit(message)
+
+    def _fail(self, message, coaster=False):
+        """Reports a failed burn; coaster means the disc was written badly, so its speed is remembered as failing."""
+        if coaster:
+            drive_capabilities.record_result(self.write_plan, False)
+        self._record_burn(False, message)
+        self.error.emit(message)
+
+    def _plan_write(self, drive=None, on_message=None):
+        """Picks speed, write mode and flags for drive (see drive_capabilities.plan_burn()) and reports them."""
+        plan = drive_capabilities.plan_burn(drive or self.drive, audio=self.mode == 'audio')
+        (on_message or self.progress.emit)(plan.describe())
+        return plan
+
+    def _record_burn(self, success, message, drive=None, monitor=None):
+        """Adds the burn and the statistics its progress output showed to the burn log."""
+        monitor = monitor or self.monitor
+        entry = monitor.summary() if monitor else {}
+        entry.update(started_at=self.started_at, finished_at=time.time(), drive=drive or self.drive, mode=self.mode,
+                     success=int(success), message=message)
+        try:
+            database.add_burn_log(entry)
+        except Exception as e:
+            print(f"[BurnWorker] Could not record burn: {e}")
+
+    @staticmethod
+    def _image_size(iso):
+        """Size in bytes the laid-out image will have once written."""
+        return iso.pvd.space_size * iso.logical_block_size
+
+    def _write_image(self, iso, cache, key):
+        """Writes the image into the cache (or to iso_path when there is no cache key or it's too big to cache) and returns its path."""
+        self.progress.emit("Creating ISO 9660 disc image...")
+        if not key or not cache.fits(self._image_size(iso)):
+            iso.write(self.iso_path)
+            return self.iso_path
+        partial_path = cache.partial_path(key)
+        try:
+            iso.write(partial_path)
+        except BaseException:
+            cache.discard(partial_path)
+            raise
+        # Cached before burning, so a failed burn can be retried straight away
+        return cache.commit(key, partial_path)
+
+    def _burn_image_file(self, image_path):
+        self.progress.emit(f"Burning {os.path.basename(image_path)} to drive {self.drive}...")
+
+        if sys.platform == "win32":
+            self.write_plan = self._plan_write()
+            # Assumes 'cdburn.exe' is in the system PATH or project root
+            command = ['cdburn', self.drive, image_path] + self.write_plan.cdburn_args()
+        elif sys.platform == "linux":
+            self.write_plan = self._plan_write()
+            command = ['wodim', '-v', f'dev={disc.device_path(self.drive)}'] + self.write_plan.wodim_args() + [image_path]
+        else:
+            raise NotImplementedError("Burning is not supported on this OS.")
+
+        self.monitor = burn_progress.ProgressParser(os.path.getsize(image_path))
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
+        readers, stderr_lines = self._watch_output(process, self.monitor)
+        return_code = process.wait()
+        for reader in readers:
+            reader.join()
+        if return_code != 0:
+            raise subprocess.CalledProcessError(return_code, command, stderr='\n'.join(stderr_lines))
+
+    def _burn_streaming(self, iso, head_size, cache_path=None):
+        """Builds the image into a bounded buffer and pipes it into wodim as it is produced.
+
+        With cache_path, the image is also written there as it streams. Returns
+        the image's disc_verify.ImageDigests, taken from the same chunks, if
+        verify is set.
+        """
+        self.write_plan = self._plan_write()
+        self.progress.emit(f"Streaming disc image to drive {self.drive}...")
+        stream = iso_stream.ImageStream(iso, head_size)
+        stream.start()
+        chunks = stream.chunks()
+        # Let the buffer fill before the burner starts so the drive never waits on the image builder
+        prefill = list(itertools.islice(chunks, iso_stream.PREFILL_CHUNKS))
+        command = ['wodim', '-v', f'dev={disc.device_path(self.drive)}', f'fs={STREAM_FIFO_SIZE}'] + self.write_plan.wodim_args() + \
+                  [f'tsize={stream.total_size // disc.SECTOR_SIZE}s', '-']
+        self.monitor = burn_progress.ProgressParser(stream.total_size)
+        try:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError:
+            stream.abort()
+            raise
+
+        readers, stderr_lines = self._watch_output(process, self.monitor)
+        cache_file = open(cache_path, 'wb') if cache_path else None
+        digests = disc_verify.ImageDigests() if self.verify else None
+        try:
+            for chunk in itertools.chain(prefill, chunks):
+                if cache_file is not None:
+                    cache_file.write(chunk)
+                if digests is not None:
+                    digests.update(chunk)
+                process.stdin.write(chunk)
+        except BrokenPipeError:
+            # The burner exited early; its exit status says why
+            stream.abort()
+        except Exception:
+            stream.abort()
+            process.kill()
+            raise
+        finally:
+            if cache_file is not None:
+                cache_file.close()
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+            return_code = process.wait()
+            for reader in readers:
+                reader.join()
+        if return_code != 0:
+            raise subprocess.CalledProcessError(return_code, command, stderr='\n'.join(stderr_lines))
+        return digests.finish() if digests is not None else None
+
+    def _watch_output(self, process, monitor, on_progress=None, on_message=None):
+        """Reads the burner's stdout and stderr on separate threads so neither pipe can fill up and stall it.
+
+        Progress lines from either stream go to on_progress as BurnProgress
+        readings (default: progress_update), other stdout lines to on_message
+        (default: progress). Returns the reader threads and the list the
+        other stderr lines are collected in.
+        """
+        on_progress = on_progress or self.progress_update.emit
+        on_message = on_message or self.progress.emit
+        stderr_lines = []
+        readers = [
+            threading.Thread(target=self._read_output, args=(process.stdout, monitor, on_progress, on_message), daemon=True),
+            threading.Thread(target=self._read_output, args=(process.stderr, monitor, on_progress, stderr_lines.append), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+        return readers, stderr_lines
+
+    def _read_output(self, pipe, monitor, on_progress, on_line):
+        for line in burn_progress.iter_lines(pipe):
+            reading = monitor.feed(line)
+            if reading is not None:
+                on_progress(reading)
+            else:
+                on_line(line)
+        pipe.close()
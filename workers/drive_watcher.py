@@ -0,0 +1,137 @@
+import sys
+import time
+import select
+import socket
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+import drives
+
+# Seconds to wait after a kernel event before rescanning, so udev has updated its database.
+SETTLE_DELAY = 1.0
+# Seconds between sysfs sweeps on Linux when no event source is available (file reads only).
+LINUX_POLL_INTERVAL = 5.0
+# Seconds between drive/media fingerprint checks on Windows (API calls only; WMI runs on change).
+WINDOWS_POLL_INTERVAL = 2.0
+NETLINK_KOBJECT_UEVENT = 15
+
+
+class DriveWatcher(QThread):
+    """Enumerates the optical drives in the background and reports changes.
+
+    drives_changed carries the full drives.DriveInfo list: once at start and
+    again whenever a drive is added or removed or media is inserted,
+    ejected or swapped. On Linux it listens for block device events
+    (pyudev if installed, else the kernel's uevent socket) and only reads
+    sysfs and the udev database when one arrives; media changes are seen
+    when the kernel polls the drive (udisks normally enables that). On
+    Windows it compares a cheap GetLogicalDrives/volume serial fingerprint
+    and only runs the WMI query when it changes. refresh() forces a rescan.
+    """
+    drives_changed = pyqtSignal(list)
+    status_update = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self._refresh = threading.Event()
+        self._last = None
+
+    def refresh(self):
+        self._refresh.set()
+
+    def run(self):
+        self._rescan()
+        if sys.platform.startswith('linux'):
+            for backend in (self._run_pyudev, self._run_netlink):
+                try:
+                    backend()
+                    return
+                except (ImportError, OSError) as e:
+                    print(f"[DriveWatcher] {backend.__name__[5:]} unavailable ({e})")
+            self._run_polling(LINUX_POLL_INTERVAL)
+        elif sys.platform == 'win32':
+            self._run_polling(WINDOWS_POLL_INTERVAL, drives.windows_signature)
+        else:
+            self._run_polling(None)
+
+    def _rescan(self, force=False):
+        found = drives.list_drives()
+        if force or found != self._last:
+            self._last = found
+            self.drives_changed.emit(found)
+
+    def _wait_for_events(self, fileno, is_drive_event):
+        """Rescans SETTLE_DELAY after the last drive event read from fileno, until interrupted."""
+        due = None
+        while not self.isInterruptionRequested():
+            readable, _, _ = select.select([fileno], [], [], 0.5)
+            if readable and is_drive_event():
+                due = time.monotonic() + SETTLE_DELAY
+            if self._refresh.is_set():
+                self._refresh.clear()
+                self._rescan(force=True)
+                due = None
+            elif due is not None and time.monotonic() >= due:
+                due = None
+                self._rescan()
+
+    # --- pyudev backend ---
+    def _run_pyudev(self):
+        import pyudev
+        monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+        monitor.filter_by('block')
+        monitor.start()
+
+        def is_drive_event():
+            found = False
+            device = monitor.poll(timeout=0)
+            while device is not None:
+                found = found or device.sys_name.startswith('sr')
+                device = monitor.poll(timeout=0)
+            return found
+
+        self.status_update.emit("Watching optical drives for changes.")
+        self._wait_for_events(monitor.fileno(), is_drive_event)
+
+    # --- kernel uevent backend ---
+    def _run_netlink(self):
+        sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+        try:
+            sock.bind((0, 1))  # Group 1: kernel events
+            sock.setblocking(False)
+
+            def is_drive_event():
+                found = False
+                while True:
+                    try:
+                        message = sock.recv(65536)
+                    except BlockingIOError:
+                        return found
+                    # "ACTION@DEVPATH\0KEY=VALUE\0...", e.g. change@/devices/.../block/sr0
+                    header = message.split(b'\0', 1)[0]
+                    found = found or b'/block/sr' in header
+
+            self.status_update.emit("Watching optical drives for changes.")
+            self._wait_for_events(sock.fileno(), is_drive_event)
+        finally:
+            sock.close()
+
+    # --- Polling backend ---
+    def _run_polling(self, interval, signature=None):
+        """Rescans every interval seconds, or only when signature() changes if given. interval None waits for refresh()."""
+        last_signature = signature() if signature else None
+        next_check = time.monotonic() + interval if interval else None
+        while not self.isInterruptionRequested():
+            if self._refresh.wait(0.5):
+                self._refresh.clear()
+                self._rescan(force=True)
+                continue
+            if next_check is None or time.monotonic() < next_check:
+                continue
+            next_check = time.monotonic() + interval
+            if signature is None:
+                self._rescan()
+                continue
+            current = signature()
+            if current != last_signature:
+                last_signature = current
+                self._rescan()
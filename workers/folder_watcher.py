@@ -0,0 +1,213 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import ctypes
+import ctypes.util
+from PyQt6.QtCore import QThread, pyqtSignal
+
+# Changes are reported once the folders have been quiet for this long (seconds)...
+QUIET_PERIOD = 2.0
+# ...or at the latest this long after the first change, during a long copy.
+MAX_DELAY = 15.0
+# Seconds between directory sweeps when inotify isn't available.
+POLL_INTERVAL = 10.0
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def coalesce_paths(paths):
+    """Drops paths that sit inside another path of the set, since scanning a folder covers its contents."""
+    paths = set(paths)
+    result = []
+    for path in sorted(paths):
+        parent = os.path.dirname(path)
+        while parent and parent not in paths and os.path.dirname(parent) != parent:
+            parent = os.path.dirname(parent)
+        if parent not in paths:
+            result.append(path)
+    return result
+
+
+class FolderWatcher(QThread):
+    """Watches library folders and reports changed files and folders in coalesced batches.
+
+    Uses inotify on Linux. Elsewhere, or if inotify can't be set up, it sweeps
+    directory mtimes every POLL_INTERVAL seconds; that catches added, removed
+    and renamed files, while in-place tag edits wait for the next rescan.
+    """
+    paths_changed = pyqtSignal(list)
+    status_update = pyqtSignal(str)
+
+    def __init__(self, folders):
+        super().__init__()
+        self.folders = [folder for folder in folders if folder and os.path.isdir(folder)]
+        self._pending = set()
+        self._first_change = 0.0
+        self._last_change = 0.0
+
+    def run(self):
+        if not self.folders:
+            return
+        if sys.platform.startswith('linux'):
+            try:
+                self._run_inotify()
+                return
+            except OSError as e:
+                self.status_update.emit(f"inotify unavailable ({e}), watching the library folder by polling")
+        self._run_polling()
+
+    # --- Change batching ---
+    def _add_change(self, path):
+        now = time.monotonic()
+        if not self._pending:
+            self._first_change = now
+        self._last_change = now
+        self._pending.add(path)
+
+    def _emit_if_settled(self):
+        if not self._pending:
+            return
+        now = time.monotonic()
+        if now - self._last_change >= QUIET_PERIOD or now - self._first_change >= MAX_DELAY:
+            paths = coalesce_paths(self._pending)
+            self._pending.clear()
+            self.paths_changed.emit(paths)
+
+    # --- inotify backend ---
+    def _run_inotify(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        watches = {}
+        try:
+            for folder in self.folders:
+                self._add_watches(libc, fd, watches, folder)
+            self.status_update.emit(f"Watching {len(watches)} library folders for changes.")
+            while not self.isInterruptionRequested():
+                readable, _, _ = select.select([fd], [], [], 0.5)
+                if readable:
+                    self._read_events(libc, fd, watches)
+                self._emit_if_settled()
+        finally:
+            os.close(fd)
+
+    def _add_watches(self, libc, fd, watches, folder):
+        stack = [folder]
+        while stack:
+            directory = stack.pop()
+            wd = libc.inotify_add_watch(fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error == errno.ENOSPC:
+                    raise OSError(error, "inotify watch limit reached (raise fs.inotify.max_user_watches)")
+                continue
+            watches[wd] = directory
+            try:
+                with os.scandir(directory) as entries:
+                    stack.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+
+    def _read_events(self, libc, fd, watches):
+        try:
+            data = os.read(fd, 65536)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost; rescan everything we watch
+                for folder in self.folders:
+                    self._add_change(folder)
+                continue
+            directory = watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                watches.pop(wd, None)
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                self._add_change(directory)
+                continue
+            path = os.path.join(directory, name) if name else directory
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                self._add_watches(libc, fd, watches, path)
+                self._add_change(path)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE):
+                # Plain IN_CREATE is skipped for files: IN_CLOSE_WRITE follows once they're written
+                self._add_change(path)
+
+    # --- Polling backend ---
+    def _snapshot_dir(self, directory):
+        names, subdirs = set(), set()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    (subdirs if entry.is_dir(follow_symlinks=False) else names).add(entry.name)
+                except OSError:
+                    continue
+        return os.stat(directory).st_mtime_ns, names, subdirs
+
+    def _sweep(self, snapshot, report):
+        """Refreshes snapshot {dir: (mtime_ns, file names, subdir names)}, reporting changes when report is True."""
+        stack = list(self.folders)
+        seen = set()
+        while stack:
+            directory = stack.pop()
+            seen.add(directory)
+            previous = snapshot.get(directory)
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+                if previous is not None and previous[0] == mtime:
+                    stack.extend(os.path.join(directory, name) for name in previous[2])
+                    continue
+                current = self._snapshot_dir(directory)
+            except OSError:
+                continue
+            snapshot[directory] = current
+            stack.extend(os.path.join(directory, name) for name in current[2])
+            if report and previous is not None:
+                for name in (current[1] ^ previous[1]) | (current[2] ^ previous[2]):
+                    self._add_change(os.path.join(directory, name))
+            elif report:
+                self._add_change(directory)
+        for directory in [d for d in snapshot if d not in seen]:
+            del snapshot[directory]
+            if report:
+                self._add_change(directory)
+
+    def _run_polling(self):
+        snapshot = {}
+        self._sweep(snapshot, report=False)
+        self.status_update.emit(f"Polling {len(snapshot)} library folders for changes.")
+        next_sweep = time.monotonic() + POLL_INTERVAL
+        while not self.isInterruptionRequested():
+            self.msleep(500)
+            if time.monotonic() >= next_sweep:
+                self._sweep(snapshot, report=True)
+                next_sweep = time.monotonic() + POLL_INTERVAL
+            self._emit_if_settled()
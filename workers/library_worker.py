@@ -1,49 +1,246 @@
 import os
+import time
+import itertools
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from PyQt6.QtCore import QThread, pyqtSignal
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3
+import config
 import database
+import tag_reader
+
+# File extensions handed to mutagen; anything else is skipped without opening it.
+AUDIO_EXTENSIONS = {
+    '.mp3', '.mp2', '.flac', '.m4a', '.m4b', '.mp4', '.aac', '.ogg', '.oga', '.opus',
+    '.spx', '.wma', '.asf', '.wav', '.aif', '.aiff', '.ape', '.wv', '.mpc', '.tta',
+    '.ofr', '.dsf', '.dff',
+}
+
+# Number of parsed songs written per database transaction.
+INSERT_BATCH_SIZE = 200
+# Parsed songs are also written at least this often (seconds) so rows show up early.
+FLUSH_INTERVAL = 1.0
+# Discovered files checked against the database in one query.
+DISCOVERY_BATCH_SIZE = 500
+# Tag parsing and hashing mostly wait on disk or network I/O (hashlib releases the GIL
+# on large buffers), so use more threads than cores.
+MAX_SCAN_WORKERS = min(16, (os.cpu_count() or 4) * 2)
+
+def _entry_stats(stat_result, inode):
+    return {'file_size': stat_result.st_size, 'mtime_ns': stat_result.st_mtime_ns, 'inode': inode or None}
+
+def file_stats(filepath):
+    """Returns the stored file identity columns (size, mtime, inode) for a file on disk."""
+    stat_result = os.stat(filepath)
+    return _entry_stats(stat_result, stat_result.st_ino)
+
+def iter_audio_files(root, unreadable_dirs=None, unreadable_files=None):
+    """Yields (path, stats) for every audio file under root, walking subfolders with os.scandir.
+
+    Folders that can't be listed are appended to unreadable_dirs and audio
+    files that can't be stat'ed (e.g. mid-replace) to unreadable_files, if given.
+    """
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS and entry.is_file():
+                            # inode() is free on POSIX but opens the file on Windows, so there
+                            # it is only looked up later for files that need it
+                            inode = entry.inode() if os.name != 'nt' else None
+                            yield entry.path, _entry_stats(entry.stat(), inode)
+                    except OSError:
+                        if unreadable_files is not None and os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS:
+                            unreadable_files.append(entry.path)
+                        continue
+        except OSError:
+            if unreadable_dirs is not None:
+                unreadable_dirs.append(os.path.join(directory, ''))
+
+class _ParseError(RuntimeError):
+    def __init__(self, filepath, error):
+        super().__init__(f"{filepath}: {error}")
+        self.filepath = filepath
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
 class LibraryWorker(QThread):
-    """A worker to handle library scanning in the background."""
-    finished = pyqtSignal(int)
+    """A worker to handle library scanning in the background.
+
+    Scans are incremental: files whose size and mtime match the database are
+    skipped without being opened, changed files are re-read, files that moved
+    (same inode, size and mtime at a new path) keep their row, and rows for
+    files that are gone are removed.
+
+    scan_finished is emitted once at the end of every run, including failed
+    ones (see failed); release or replace the worker only on QThread.finished.
+    """
+    # Tracks added
+    scan_finished = pyqtSignal(int)
     status_update = pyqtSignal(str)
 
-    def __init__(self, download_path):
+    def __init__(self, download_path, changed_paths=None):
+        """Scans all of download_path, or only changed_paths (files or folders) when given."""
         super().__init__()
         self.download_path = download_path
+        self.changed_paths = changed_paths
+        self.found_files = 0
+        self.found_new = 0
+        self.updated = 0
+        self.moved = 0
+        self.removed = 0
+        self.failed = False
+        self._inserts = []
+        self._updates = []
+        self._unreadable = []
+        self._last_flush = 0.0
+        # Header-only MP3 parsing; turn off to read every file through mutagen
+        self.fast_tags = config.get_setting('LIBRARY', 'fast_tag_reading', 'true').lower() == 'true'
+
+    def _scan_scope(self, unreadable_dirs, unreadable_files):
+        """Returns the stored rows in scope and an iterable of (path, stats) for files on disk."""
+        if self.changed_paths is None:
+            return database.get_file_index(self.download_path), iter_audio_files(self.download_path, unreadable_dirs, unreadable_files)
+        known = database.get_file_index_for_paths(self.changed_paths)
+        sources = []
+        files = []
+        for path in self.changed_paths:
+            if os.path.isdir(path):
+                known.update(database.get_file_index(path))
+                sources.append(iter_audio_files(path, unreadable_dirs, unreadable_files))
+            elif os.path.isfile(path):
+                if os.path.splitext(path)[1].lower() in AUDIO_EXTENSIONS:
+                    try:
+                        files.append((path, file_stats(path)))
+                    except OSError:
+                        unreadable_files.append(path)
+            else:
+                # Gone: could have been a single file or a whole folder
+                known.update(database.get_file_index(path))
+        sources.append(files)
+        return known, itertools.chain.from_iterable(sources)
 
     def run(self):
         try:
-            self.status_update.emit(f"Scanning library folder: {self.download_path}")
-            print(f"[LibraryWorker] Scanning directory: {self.download_path}")
-            if not os.path.exists(self.download_path):
-                self.status_update.emit(f"Directory does not exist: {self.download_path}")
-                return
-            files = os.listdir(self.download_path)
-            print(f"[LibraryWorker] Files found: {files}")
-            all_db_songs = {song[-1] for song in database.get_all_songs()}
-            found_new = 0
-            for filename in files:
-                if filename.lower().endswith(".mp3"):
-                    filepath = os.path.join(self.download_path, filename)
-                    if filepath not in all_db_songs:
-                        try:
-                            audio = MP3(filepath, ID3=ID3)
-                            metadata = {
-                                'title': str(audio.get('TIT2', [''])[0]),
-                                'artist': str(audio.get('TPE1', [''])[0]),
-                                'album': str(audio.get('TALB', [''])[0]),
-                                'year': str(audio.get('TDRC', [''])[0]),
-                                'genre': str(audio.get('TCON', [''])[0])
-                            }
-                            database.add_song(filepath, metadata)
-                            found_new += 1
-                        except Exception as e:
-                            self.status_update.emit(f"Error processing {filepath}: {e}")
-                            print(f"Error processing {filepath}: {e}")
+            if self.changed_paths is None:
+                self.status_update.emit(f"Scanning library folder: {self.download_path}")
+                if not os.path.exists(self.download_path):
+                    self.status_update.emit(f"Directory does not exist: {self.download_path}")
+                    self.failed = True
+                    return
+            self._last_flush = time.monotonic()
+            unreadable_dirs = []
+            # Files that exist but couldn't be stat'ed this time; their rows are kept as they are
+            unreadable_files = []
+            known, entries = self._scan_scope(unreadable_dirs, unreadable_files)
+            # Stored identities of known files, used to recognise moves and renames
+            identities = {(inode, size, mtime): path for path, (size, mtime, inode, _) in known.items() if inode}
+            seen = set()
+            stat_refreshes = []
+            move_candidates = []
+            with ThreadPoolExecutor(max_workers=MAX_SCAN_WORKERS) as pool:
+                pending = set()
+                for chunk in _chunks(entries, DISCOVERY_BATCH_SIZE):
+                    self.found_files += len(chunk)
+                    for filepath, stats in chunk:
+                        seen.add(filepath)
+                        stored = known.get(filepath)
+                        if stored is not None:
+                            if stored[:2] != (stats['file_size'], stats['mtime_ns']) or stored[3]:
+                                # Changed on disk, or stored before audio info and hashes were recorded
+                                pending.add(pool.submit(self._parse, filepath, stats, 'update'))
+                            elif stats['inode'] is not None and stored[2] != stats['inode']:
+                                # Unchanged file whose identity wasn't recorded yet
+                                stat_refreshes.append((filepath, filepath, stats))
                             continue
-            self.finished.emit(found_new)
+                        if stats['inode'] is None:
+                            try:
+                                stats['inode'] = os.stat(filepath).st_ino or None
+                            except OSError:
+                                continue
+                        old_path = identities.get((stats['inode'], stats['file_size'], stats['mtime_ns']))
+                        if old_path is not None and old_path != filepath:
+                            # Decided once the walk shows whether old_path still exists
+                            move_candidates.append((old_path, filepath, stats))
+                        else:
+                            pending.add(pool.submit(self._parse, filepath, stats, 'insert'))
+                    # Collect whatever has finished; block only to keep the queue bounded
+                    pending = self._collect(pending, block=len(pending) > MAX_SCAN_WORKERS * 8)
+
+                seen.update(unreadable_files)
+                missing = {path for path in known if path not in seen
+                           and not any(path.startswith(directory) for directory in unreadable_dirs)}
+                moves = []
+                for old_path, filepath, stats in move_candidates:
+                    if old_path in missing:
+                        missing.discard(old_path)
+                        moves.append((old_path, filepath, stats))
+                    else:
+                        pending.add(pool.submit(self._parse, filepath, stats, 'insert'))
+                while pending:
+                    pending = self._collect(pending, block=True)
+            self._flush()
+            if moves or stat_refreshes:
+                database.move_songs(moves + stat_refreshes)
+                self.moved = len(moves)
+            if missing:
+                self.removed = database.delete_songs(missing)
+            self.status_update.emit(f"Library scan complete: {self.found_new} added, {self.updated} updated, "
+                                    f"{self.moved} moved, {self.removed} removed.")
         except Exception as e:
+            self.failed = True
             self.status_update.emit(f"Library scan failed: {e}")
-            print(f"Library scan failed: {e}")
+        finally:
+            database.close_connection()
+            self.scan_finished.emit(self.found_new)
+
+    def _parse(self, filepath, stats, kind):
+        try:
+            if stats['inode'] is None:
+                stats['inode'] = os.stat(filepath).st_ino or None
+            metadata = tag_reader.read_tags(filepath, self.fast_tags, with_hash=True)
+        except Exception as e:
+            raise _ParseError(filepath, e) from e
+        metadata.update(stats)
+        metadata[database.INFO_ATTEMPTED_COLUMN] = 1
+        return kind, filepath, metadata
+
+    def _collect(self, pending, block):
+        done, pending = wait(pending, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                kind, filepath, metadata = future.result()
+            except _ParseError as e:
+                self.status_update.emit(f"Error processing {e}")
+                self._unreadable.append(e.filepath)
+                continue
+            (self._inserts if kind == 'insert' else self._updates).append((filepath, metadata))
+        if len(self._inserts) + len(self._updates) >= INSERT_BATCH_SIZE or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self._flush()
+        return pending
+
+    def _flush(self):
+        if self._unreadable:
+            database.mark_info_attempted(self._unreadable)
+            self._unreadable = []
+        if self._inserts or self._updates:
+            if self._inserts:
+                self.found_new += database.add_songs_bulk(self._inserts)
+            if self._updates:
+                database.update_songs_bulk(self._updates)
+                self.updated += len(self._updates)
+            self._inserts = []
+            self._updates = []
+            self.status_update.emit(f"Scanning library: {self.found_files} audio files found, {self.found_new} new tracks added...")
+        self._last_flush = time.monotonic()
@@ -0,0 +1,15 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+import disc
+
+class MediaInfoWorker(QThread):
+    """Reads the free capacity of the media in a drive without blocking the UI."""
+    # drive, free bytes (None when no writable media could be read), request sequence number
+    media_read = pyqtSignal(str, object, int)
+
+    def __init__(self, drive, sequence=0):
+        super().__init__()
+        self.drive = drive
+        self.sequence = sequence
+
+    def run(self):
+        self.media_read.emit(self.drive, disc.query_media_free_bytes(self.drive), self.sequence)
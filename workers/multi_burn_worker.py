@@ -0,0 +1,159 @@
+import os
+import sys
+import mmap
+import time
+import threading
+import subprocess
+from PyQt6.QtCore import pyqtSignal
+import disc
+import burn_progress
+import disc_verify
+import drive_capabilities
+import image_cache
+from workers.burn_worker import BurnWorker, STREAM_FIFO_SIZE
+
+# Bytes handed to each burner per write, sliced straight out of the shared image mapping.
+FEED_CHUNK_SIZE = 1024 * 1024
+
+
+class MultiBurnWorker(BurnWorker):
+    """Burns one disc image to several drives at the same time.
+
+    The image is built once (or taken from the image cache) and mapped into
+    memory once; every drive's burner is fed slices of that one mapping, so
+    the drives share the page cache instead of each reading the file. Each
+    drive reports through drive_progress/drive_finished and a failure on one
+    drive does not stop the others. With verify, each drive reads its disc
+    back against digests of the image taken once before the burns start.
+    Every drive gets its own write plan from its capabilities for the media
+    in it. finished carries the combined summary.
+    """
+    drive_progress = pyqtSignal(str, str)
+    drive_progress_update = pyqtSignal(str, object)
+    drive_finished = pyqtSignal(str, bool, str)
+
+    def __init__(self, drives, file_list, iso_path, fit_to_bytes=None):
+        super().__init__(drives[0], file_list, iso_path, stream=False, fit_to_bytes=fit_to_bytes)
+        self.drives = list(drives)
+        self.results = {}
+        self.digests = None
+        self.write_plans = {}
+
+    @property
+    def failed_drives(self):
+        return [drive for drive in self.drives if not self.results.get(drive, (False, ''))[0]]
+
+    def run(self):
+        iso = None
+        cache = image_cache.ImageCache()
+        self.started_at = time.time()
+        try:
+            self._fit_to_disc()
+            key = self._cache_key(cache)
+            image_path = cache.lookup(key) if key else None
+            if image_path:
+                self.progress.emit("Using cached disc image.")
+            else:
+                iso, _ = self._build_image()
+                image_path = self._write_image(iso, cache, key)
+                iso.close()
+                iso = None
+
+            self.digests = self._image_digests(image_path)
+            self.progress.emit(f"Burning {os.path.basename(image_path)} to {len(self.drives)} drives...")
+            if sys.platform == "win32":
+                # cdburn only takes a file name, so each drive reads the image itself
+                self._burn_all(image_path, None)
+            else:
+                with open(image_path, 'rb') as image_file, mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+                    self._burn_all(image_path, mapping)
+
+            burned = len(self.drives) - len(self.failed_drives)
+            summary = f"Burned {burned} of {len(self.drives)} discs."
+            if self.failed_drives:
+                summary += " Failed: " + "; ".join(f"{drive} ({self.results.get(drive, (False, 'not started'))[1]})" for drive in self.failed_drives)
+            self.finished.emit(summary)
+
+        except Exception as e:
+            message = f"An error occurred while preparing the multi-drive burn: {e}"
+            self._record_burn(False, message, drive=", ".join(self.drives))
+            self.error.emit(message)
+        finally:
+            if iso is not None:
+                iso.close()
+            if os.path.exists(self.iso_path):
+                try:
+                    os.remove(self.iso_path)
+                except OSError as e:
+                    self.progress.emit(f"Could not remove temporary ISO file: {e}")
+
+    def _burn_all(self, image_path, mapping):
+        threads = [threading.Thread(target=self._burn_drive, args=(drive, image_path, mapping), name=f"Burn-{drive}", daemon=True)
+                   for drive in self.drives]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _burn_drive(self, drive, image_path, mapping):
+        """Burns the image to one drive and records (ok, message) in self.results; never raises."""
+        monitor = burn_progress.ProgressParser(len(mapping) if mapping is not None else os.path.getsize(image_path))
+        try:
+            self._run_burner(drive, image_path, mapping, monitor)
+            result = (True, self._verify_disc(self.digests, drive, lambda reading: self.drive_progress_update.emit(drive, reading)))
+            drive_capabilities.record_result(self.write_plans.get(drive), True)
+        except FileNotFoundError:
+            result = (False, "burn command not found")
+        except disc_verify.VerifyError as e:
+            result = (False, str(e))
+            if e.mismatch:
+                drive_capabilities.record_result(self.write_plans.get(drive), False)
+        except subprocess.CalledProcessError as e:
+            lines = (e.stderr or '').strip().splitlines()
+            result = (False, lines[-1] if lines else f"burner exited with status {e.returncode}")
+            if drive_capabilities.is_write_error(e.stderr):
+                drive_capabilities.record_result(self.write_plans.get(drive), False)
+        except Exception as e:
+            result = (False, str(e))
+        self.results[drive] = result
+        self._record_burn(*result, drive=drive, monitor=monitor)
+        self.drive_finished.emit(drive, *result)
+
+    def _run_burner(self, drive, image_path, mapping, monitor):
+        plan = self.write_plans[drive] = self._plan_write(drive, on_message=lambda line: self.drive_progress.emit(drive, line))
+        self.drive_progress.emit(drive, "Starting burn...")
+        if mapping is None:
+            command = ['cdburn', drive, image_path] + plan.cdburn_args()
+        else:
+            # Fed through stdin like a single-drive stream, so each burner gets the same FIFO in front of its drive
+            command = ['wodim', '-v', f'dev={disc.device_path(drive)}', f'fs={STREAM_FIFO_SIZE}'] + plan.wodim_args() + \
+                      [f'tsize={len(mapping) // disc.SECTOR_SIZE}s', '-']
+        process = subprocess.Popen(command, stdin=subprocess.PIPE if mapping is not None else None,
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
+        readers, stderr_lines = self._watch_output(process, monitor, on_progress=lambda reading: self.drive_progress_update.emit(drive, reading),
+                                                   on_message=lambda line: self.drive_progress.emit(drive, line))
+        try:
+            if mapping is not None:
+                view = memoryview(mapping)
+                try:
+                    for offset in range(0, len(view), FEED_CHUNK_SIZE):
+                        process.stdin.write(view[offset:offset + FEED_CHUNK_SIZE])
+                except BrokenPipeError:
+                    pass  # The burner exited early; its exit status says why
+                finally:
+                    view.release()
+        except Exception:
+            process.kill()
+            raise
+        finally:
+            if process.stdin is not None:
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+            return_code = process.wait()
+            for reader in readers:
+                reader.join()
+        if return_code != 0:
+            raise subprocess.CalledProcessError(return_code, command, stderr='\n'.join(stderr_lines))
@@ -6,6 +6,7 @@ from mutagen.id3 import ID3, APIC, TIT2, TPE1, TALB, TDRC, TCON, TRCK
 from PyQt6.QtCore import QThread, pyqtSignal
 import config
 import constants
+import tag_reader
 
 mb.set_useragent(constants.APP_NAME, constants.APP_VERSION, "https://github.com/josh-perry/alpha_burn")
 
@@ -71,6 +72,11 @@ class TaggerWorker(QThread):
                     audio.tags.add(APIC(encoding=3, mime='image/jpeg', type=3, desc='Cover', data=art_data))
             
             audio.save()
+            # Stream info was parsed when the file was opened, so record it with the tags
+            meta['duration'] = audio.info.length
+            meta['bitrate'] = audio.info.bitrate
+            meta['sample_rate'] = audio.info.sample_rate
+            meta['content_hash'] = tag_reader.hash_file(self.file_path)
             self.finished.emit(self.file_path, meta)
         except Exception as e:
             self.error.emit(f"Tagging failed for '{self.title}': {e}")